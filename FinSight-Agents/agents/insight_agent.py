@@ -1,81 +1,83 @@
 from core.agent_base import BaseAgent, AgentResult
-from utils.gemini_helpers import get_gemini_insight_async
+from utils.gemini_helpers import get_gemini_insight_async, cache_gemini_insight
+from utils.insight_cache_keys import CacheKeyStats, canonical_insight_key
+from utils.indicators import INDICATORS, latest_indicators, technical_signal
+from utils.market_frame import latest_bars
+from utils.symbol_master import get_symbol_master
 import asyncio
+import json
+import numpy as np
+import pandas as pd
+import re
 
-TICKER_TO_COMPANY = {
-    "RELIANCE.NS": "Reliance",
-    "TCS.NS": "TCS",
-    "HDFCBANK.NS": "HDFC Bank",
-    "INFY.NS": "Infosys",
-    "ICICIBANK.NS": "ICICI Bank",
-    "SBIN.NS": "State Bank of India",
-    "BHARTIARTL.NS": "Bharti Airtel",
-    "ITC.NS": "ITC",
-    "LT.NS": "Larsen & Toubro",
-    "AXISBANK.NS": "Axis Bank",
-    "KOTAKBANK.NS": "Kotak Mahindra Bank",
-    "HINDUNILVR.NS": "Hindustan Unilever",
-    "BAJFINANCE.NS": "Bajaj Finance",
-    "ASIANPAINT.NS": "Asian Paints",
-    "MARUTI.NS": "Maruti Suzuki",
-    "SUNPHARMA.NS": "Sun Pharma",
-    "ULTRACEMCO.NS": "UltraTech Cement",
-    "TITAN.NS": "Titan",
-    "WIPRO.NS": "Wipro",
-    "POWERGRID.NS": "Power Grid",
-    # Global
-    "AAPL": "Apple",
-    "GOOGL": "Google",
-    "MSFT": "Microsoft",
-    "TSLA": "Tesla",
-    "AMZN": "Amazon",
-    "META": "Meta",
-}
+INSIGHT_INSTRUCTION = (
+    "Based on this data, provide a one-sentence actionable insight for an investor, "
+    "including any risks or uncertainties."
+)
+BATCH_INSIGHT_INSTRUCTION = (
+    "For each stock above, provide a one-sentence actionable insight for an investor, "
+    "including any risks or uncertainties.\n"
+    "Respond with only a JSON object mapping each ticker to its insight, "
+    'e.g. {"AAPL": "...", "TCS.NS": "..."}. No markdown, no extra text.'
+)
 
 class InsightAgent(BaseAgent):
-    def __init__(self, sentiment_data, market_data):
+    def __init__(self, sentiment_data, market_data, batch_size=None, canonical_keys=None, weight_duplicates=False):
         super().__init__("InsightAgent")
         self.sentiment_data = sentiment_data
         self.market_data = market_data
+        # When set, tickers are packed into multi-stock prompts of this many tickers.
+        self.batch_size = batch_size
+        # Optional CanonicalKeyConfig: cache insights by bucketed features instead of
+        # the raw prompt text, so small intraday price moves still hit the cache.
+        self.canonical_keys = canonical_keys
+        self.cache_key_stats = CacheKeyStats()
+        # Count a collapsed story once per syndicated copy instead of once
+        self.weight_duplicates = weight_duplicates
 
     async def execute(self, task):
-        market_data = task['parameters'].get('market_data', [])
+        market_data = task['parameters'].get('market_data')
         sentiment_data = task['parameters'].get('sentiment', {})
+        batch_size = task['parameters'].get('batch_size', self.batch_size)
 
         insights = []
         prompts = []
+        stock_blocks = []
         insight_meta = []
 
-        ticker_to_company = {}
-        if market_data and isinstance(market_data, list) and len(market_data) > 0:
-            first_row = market_data[0]
-            for k in first_row.keys():
-                if isinstance(k, tuple) and len(k) == 2 and k[0] == 'Close':
-                    ticker_to_company[k[1]] = TICKER_TO_COMPANY.get(k[1], k[1])
-
-        for ticker, company in ticker_to_company.items():
-            close_price = open_price = volume = None
-            if market_data and isinstance(market_data, list) and len(market_data) > 0:
-                first_row = market_data[0]
-                close_price = first_row.get(('Close', ticker))
-                open_price = first_row.get(('Open', ticker))
-                volume = first_row.get(('Volume', ticker))
-            price_change_pct = None
-            trend = "No data"
-            if close_price is not None and open_price is not None and open_price != 0:
-                price_change_pct = ((close_price - open_price) / open_price) * 100
-                trend = "Uptrend" if close_price > open_price else "Downtrend" if close_price < open_price else "Flat"
+        symbols = get_symbol_master()
+        latest = latest_bars(market_data)
+        indicators = latest_indicators(market_data)
+        # Price change and trend for every ticker at once
+        opens = latest["open"].where(latest["open"] != 0)
+        change_pct = (latest["close"] - opens) / opens * 100
+        trends = np.select(
+            [change_pct > 0, change_pct < 0, change_pct == 0], ["Uptrend", "Downtrend", "Flat"], default="No data"
+        )
+
+        for ticker, row, pct, trend in zip(latest.index, latest.itertuples(index=False), change_pct, trends):
+            company = symbols.display_name(ticker)
+            close_price = None if pd.isna(row.close) else float(row.close)
+            open_price = None if pd.isna(row.open) else float(row.open)
+            volume = None if pd.isna(row.volume) else int(row.volume)
+            price_change_pct = None if pd.isna(pct) else float(pct)
+            trend = str(trend)
+            technicals = indicators.loc[ticker].to_dict() if ticker in indicators.index else {}
+            technicals["close"] = close_price
+            technical = technical_signal(technicals)
 
             sentiments = []
+            weights = []
             top_headline = ""
             if company in sentiment_data:
                 sentiments = [art['sentiment'] for art in sentiment_data[company]]
+                weights = [art.get('duplicates', 1) if self.weight_duplicates else 1 for art in sentiment_data[company]]
                 if sentiment_data[company]:
                     top_headline = sentiment_data[company][0]['headline']
             if sentiments:
-                pos = sentiments.count('Positive')
-                neg = sentiments.count('Negative')
-                neu = sentiments.count('Neutral')
+                pos = sum(w for label, w in zip(sentiments, weights) if label == 'Positive')
+                neg = sum(w for label, w in zip(sentiments, weights) if label == 'Negative')
+                neu = sum(w for label, w in zip(sentiments, weights) if label == 'Neutral')
                 if pos > neg and pos > neu:
                     overall = "Positive"
                 elif neg > pos and neg > neu:
@@ -93,6 +95,9 @@ class InsightAgent(BaseAgent):
                 recommendation = "Sell"
             elif overall == "No news":
                 recommendation = "Hold"
+            # Don't chase an overbought rally or sell into an oversold dip
+            if (recommendation, technical) in (("Buy", "Overbought"), ("Sell", "Oversold")):
+                recommendation = "Hold"
 
             # Highlight divergence
             divergence_flag = ""
@@ -102,19 +107,20 @@ class InsightAgent(BaseAgent):
                 divergence_flag = "⚠️ Price down but sentiment positive! Possible opportunity or lag."
 
             # Gemini LLM-powered insight with more context
-            prompt = (
+            stock_block = (
                 f"Stock: {company} ({ticker})\n"
                 f"Latest Close: {close_price}\n"
                 f"Latest Open: {open_price}\n"
                 f"Price Change: {price_change_pct:.2f}%\n"
                 f"Volume: {volume}\n"
                 f"Trend: {trend}\n"
+                f"{indicator_block(technicals)}"
                 f"Overall Sentiment: {overall}\n"
                 f"Headlines: {sentiments}\n"
                 f"Top Headline: {top_headline}\n"
-                f"Based on this data, provide a one-sentence actionable insight for an investor, including any risks or uncertainties."
             )
-            prompts.append(prompt)
+            stock_blocks.append(stock_block)
+            prompts.append(stock_block + INSIGHT_INSTRUCTION)
             insight_meta.append({
                 "ticker": ticker,
                 "company": company,
@@ -123,6 +129,9 @@ class InsightAgent(BaseAgent):
                 "price_change_pct": price_change_pct,
                 "trend": trend,
                 "volume": volume,
+                "indicators": {k: (None if pd.isna(technicals.get(k)) else float(technicals[k]))
+                               for k in INDICATORS if k in technicals},
+                "technical_signal": technical,
                 "overall_sentiment": overall,
                 "headline_count": len(sentiments),
                 "recommendation": recommendation,
@@ -132,14 +141,133 @@ class InsightAgent(BaseAgent):
 
         # Asynchronous batch processing for Gemini insights
         if prompts:
-            try:
-                llm_insights = await asyncio.gather(
-                    *(get_gemini_insight_async(prompt) for prompt in prompts)
-                )
-                for i, insight in enumerate(llm_insights):
-                    insight_meta[i]["llm_insight"] = insight
-            except Exception as e:
-                for i in range(len(prompts)):
-                    insight_meta[i]["llm_insight"] = f"LLM insight unavailable: {e}"
-
-        return AgentResult(success=True, data=insight_meta)
\ No newline at end of file
+            cache_keys = [self._cache_key(meta) for meta in insight_meta]
+            pending = self._fill_from_cache(prompts, cache_keys, insight_meta)
+            if batch_size and len(pending) > 1:
+                await self._batched_insights(pending, prompts, cache_keys, stock_blocks, insight_meta, batch_size)
+            elif pending:
+                await self._single_insights(pending, prompts, cache_keys, insight_meta)
+            if self.canonical_keys:
+                self.logger.info(f"Insight cache key stats: {self.cache_key_stats.report()}")
+
+        return AgentResult(success=True, data=insight_meta)
+
+    def _cache_key(self, meta):
+        if not self.canonical_keys:
+            return None
+        return canonical_insight_key(meta, self.canonical_keys)
+
+    def _cache_ttl(self):
+        return self.canonical_keys.max_staleness if self.canonical_keys else None
+
+    def _store(self, prompt, cache_key, insight):
+        cache_gemini_insight(prompt, insight)
+        if cache_key:
+            cache_gemini_insight(prompt, insight, ttl=self._cache_ttl(), key=cache_key)
+
+    def _fill_from_cache(self, prompts, cache_keys, insight_meta):
+        """Fills cached insights and returns the indices that still need the LLM."""
+        pending = []
+        for i, (prompt, cache_key) in enumerate(zip(prompts, cache_keys)):
+            exact = cache_gemini_insight(prompt)
+            cached = exact
+            if cache_key:
+                cached = cache_gemini_insight(prompt, key=cache_key) or exact
+                self.cache_key_stats.record(bool(exact), bool(cached))
+            if cached:
+                insight_meta[i]["llm_insight"] = cached
+            else:
+                pending.append(i)
+        return pending
+
+    async def _single_insights(self, indices, prompts, cache_keys, insight_meta):
+        llm_insights = await asyncio.gather(
+            *(get_gemini_insight_async(prompts[i], cache_key=cache_keys[i], ttl=self._cache_ttl())
+              for i in indices),
+            return_exceptions=True
+        )
+        for i, insight in zip(indices, llm_insights):
+            if isinstance(insight, Exception):
+                insight_meta[i]["llm_insight"] = f"LLM insight unavailable: {insight}"
+            else:
+                insight_meta[i]["llm_insight"] = insight
+                if cache_keys[i]:
+                    cache_gemini_insight(prompts[i], insight)
+
+    async def _batched_insights(self, pending, prompts, cache_keys, stock_blocks, insight_meta, batch_size):
+        """
+        Packs uncached tickers into multi-stock prompts of `batch_size` tickers,
+        asks for a JSON object keyed by ticker and fans the answers back into
+        `insight_meta`. Each answer is also cached under its single-ticker prompt
+        so later one-ticker queries hit the cache. A chunk that fails or omits a
+        ticker falls back to per-ticker calls.
+        """
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        missing = await asyncio.gather(
+            *(self._run_batch_chunk(chunk, prompts, cache_keys, stock_blocks, insight_meta) for chunk in chunks)
+        )
+        fallback = [i for chunk_missing in missing for i in chunk_missing]
+        if fallback:
+            self.logger.warning(f"Falling back to per-ticker insights for {len(fallback)} tickers")
+            await self._single_insights(fallback, prompts, cache_keys, insight_meta)
+
+    async def _run_batch_chunk(self, chunk, prompts, cache_keys, stock_blocks, insight_meta):
+        """Returns the indices in `chunk` that still need a per-ticker call."""
+        if len(chunk) == 1:
+            return chunk
+        batch_prompt = "\n".join(stock_blocks[i] for i in chunk) + BATCH_INSIGHT_INSTRUCTION
+        try:
+            # Parsed before it is cached, so an unparseable reply is not served again
+            by_ticker = await get_gemini_insight_async(batch_prompt, parse=parse_batch_insights)
+        except Exception as e:
+            self.logger.warning(f"Batched insight chunk failed: {e}")
+            return chunk
+
+        missing = []
+        for i in chunk:
+            insight = by_ticker.get(insight_meta[i]["ticker"])
+            if isinstance(insight, str) and insight.strip():
+                insight = insight.strip()
+                insight_meta[i]["llm_insight"] = insight
+                self._store(prompts[i], cache_keys[i], insight)
+            else:
+                missing.append(i)
+        return missing
+
+
+def indicator_block(values):
+    """Prompt lines for the indicators that are past their warm-up (empty for short histories)."""
+    def has(*names):
+        return all(values.get(n) is not None and not pd.isna(values.get(n)) for n in names)
+
+    lines = []
+    if has("sma_20", "sma_50"):
+        lines.append(f"SMA 20/50: {values['sma_20']:.2f} / {values['sma_50']:.2f}")
+    elif has("sma_20"):
+        lines.append(f"SMA 20: {values['sma_20']:.2f}")
+    if has("rsi_14"):
+        lines.append(f"RSI(14): {values['rsi_14']:.1f}")
+    if has("macd", "macd_signal"):
+        lines.append(f"MACD: {values['macd']:.2f} (signal {values['macd_signal']:.2f})")
+    if has("bb_lower", "bb_upper"):
+        lines.append(f"Bollinger Bands (20, 2): {values['bb_lower']:.2f} - {values['bb_upper']:.2f}")
+    if has("atr_14"):
+        lines.append(f"ATR(14): {values['atr_14']:.2f}")
+    if has("volatility_20"):
+        lines.append(f"Volatility (20d, annualized): {values['volatility_20'] * 100:.1f}%")
+    return "".join(line + "\n" for line in lines)
+
+
+def parse_batch_insights(response):
+    """Parses a `{ticker: insight}` JSON object, tolerating markdown code fences."""
+    text = response.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end == -1:
+        raise ValueError("No JSON object in batched insight response")
+    parsed = json.loads(text[start:end + 1])
+    if not isinstance(parsed, dict):
+        raise ValueError("Batched insight response is not a JSON object")
+    return {str(k).strip().upper(): v for k, v in parsed.items()}
@@ -1,13 +1,27 @@
 from typing import Dict
 from core.agent_base import BaseAgent, AgentResult
 # from utils.bigquery_helpers import BigQueryClient  # Unused for now
-from utils.yfinance_helper import fetch_stock_data  # <-- Import yfinance helper
+from utils.yfinance_helper import fetch_stock_frame_async  # <-- Import yfinance helper
+from utils.market_frame import to_long_frame
+from utils.screener import screen
+from utils.symbol_master import get_symbol_master
 import asyncio
+import time
+
+SCREEN_PERIOD = "1mo"          # enough history for volume-spike and volatility criteria
+SCREEN_LATENCY_BUDGET = 20.0   # seconds for a full universe scan
 
 class MarketDataAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, chunk_size=25, max_concurrency=4, period="1d", latency_budget=SCREEN_LATENCY_BUDGET):
         super().__init__("MarketDataAgent")
         # self.bq_client = BigQueryClient()  # Commented: not used in live fetch
+        # Large symbol lists are downloaded in chunks of `chunk_size`, at most
+        # `max_concurrency` chunks at a time, on worker threads.
+        self.chunk_size = chunk_size
+        self.max_concurrency = max_concurrency
+        # History to fetch per symbol; indicators need a few months ("6mo")
+        self.period = period
+        self.latency_budget = latency_budget
 
     async def execute(self, task: Dict) -> AgentResult:
         task_type = task['task_type']
@@ -15,29 +29,80 @@ class MarketDataAgent(BaseAgent):
         
         try:
             if task_type == "fetch_top_stocks":
-                data = await self._fetch_top_stocks(params['count'])
-                return AgentResult(success=True, data=data)
+                data, errors = await self._fetch_top_stocks(params['count'], params.get('period'))
+                return self._result(data, errors)
             elif task_type == "fetch_specific_stocks":
-                data = await self._fetch_specific_stocks(params['symbols'])
-                return AgentResult(success=True, data=data)
+                data, errors = await self._fetch_specific_stocks(params['symbols'], params.get('period'))
+                return self._result(data, errors)
+            elif task_type == "screen_universe":
+                return await self._screen_universe(params)
             # Add other task types...
         except Exception as e:
             return AgentResult(success=False, data=None, error=str(e))
 
-    async def _fetch_top_stocks(self, count: int):
-        # Add global and Indian stocks here
-        symbols = [
-            "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS",  # Indian
-            "AAPL", "GOOGL", "MSFT",                 # Global (US)
-            "TSLA", "AMZN", "META"                   # More US
-        ][:count]
-        data = fetch_stock_data(symbols)
-        return data
-
-    async def _fetch_specific_stocks(self, symbols):
+    async def _fetch_top_stocks(self, count: int, period=None):
+        # Top movers across the whole symbol master, with their recent history
+        ranked, data, errors, _ = await self._scan(self._universe({}), ["pct_move"], count, period)
+        return data[data["ticker"].isin(ranked.index)], errors
+
+    async def _screen_universe(self, params):
+        """
+        Scans every symbol in the symbol master (or `exchange` / `symbols`),
+        ranks by `criteria` and returns the top `top_n` as a DataFrame with a
+        ticker column, per-criterion values, latest close and score.
+        """
+        symbols = self._universe(params)
+        ranked, _, errors, stats = await self._scan(
+            symbols, params.get('criteria', ["pct_move"]), params.get('top_n', 10),
+            params.get('period'), params.get('latency_budget', self.latency_budget)
+        )
+        self.logger.info(f"Screened {stats['scanned']}/{len(symbols)} symbols in {stats['elapsed']}s")
+        return AgentResult(success=not ranked.empty, data=ranked.reset_index(),
+                           error=None if not ranked.empty else "No symbols could be screened",
+                           metadata={"errors": errors, **stats})
+
+    def _universe(self, params):
+        return params.get('symbols') or get_symbol_master().symbols(params.get('exchange'))
+
+    async def _scan(self, symbols, criteria, top_n, period=None, latency_budget=None):
+        timings = []
+        started = time.perf_counter()
+        frame, errors = await fetch_stock_frame_async(
+            symbols, period=period or SCREEN_PERIOD, chunk_size=self.chunk_size,
+            max_concurrency=self.max_concurrency,
+            timeout=latency_budget or self.latency_budget, timings=timings
+        )
+        data = to_long_frame(frame)
+        ranked = screen(data, criteria, top_n)
+        stats = {
+            "universe": len(symbols),
+            "scanned": len(symbols) - len(errors),
+            "elapsed": round(time.perf_counter() - started, 3),
+            "within_budget": not any("latency budget" in e for e in errors.values()),
+            "chunk_timings": sorted(timings, key=lambda t: t["chunk"]),
+        }
+        return ranked, data, errors, stats
+
+    async def _fetch_specific_stocks(self, symbols, period=None):
         # symbols: list of tickers (e.g., ["AAPL", "TSLA"])
-        data = fetch_stock_data(symbols)
-        return data
+        return await self._download(symbols, period)
+
+    async def _download(self, symbols, period=None):
+        frame, errors = await fetch_stock_frame_async(
+            symbols, period=period or self.period,
+            chunk_size=self.chunk_size, max_concurrency=self.max_concurrency
+        )
+        for symbol, error in errors.items():
+            self.logger.warning(f"{symbol}: {error}")
+        # Long format: one row per (ticker, date), columns ticker/date/open/high/low/close/volume
+        return to_long_frame(frame), errors
+
+    def _result(self, data, errors):
+        """Partial results still succeed; per-symbol errors are reported in metadata."""
+        if errors and data.empty:
+            return AgentResult(success=False, data=data, error=f"No market data for: {', '.join(errors)}",
+                               metadata={"errors": errors})
+        return AgentResult(success=True, data=data, metadata={"errors": errors})
 
     # def _fetch_top_stocks_from_bigquery(self, count: int):
     #     # Implementation using your BigQuery helpers (for future use)
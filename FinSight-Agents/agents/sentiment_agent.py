@@ -1,41 +1,101 @@
+import asyncio
 from core.agent_base import BaseAgent, AgentResult
 from utils.news_fetcher import NewsFetcherAdapter
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-from utils.tickers_to_company import TICKER_TO_COMPANY
+from utils.market_frame import market_tickers
+from utils.near_duplicates import NEWS_DUPLICATE_THRESHOLD, collapse_near_duplicates
+from utils.sentiment_scoring import get_sentiment_scorer
+from utils.symbol_master import get_symbol_master
 
 
 class SentimentAgent(BaseAgent):
-    def __init__(self, news_fetcher=None, sentiment_analyzer=None):
+    def __init__(self, news_fetcher=None, sentiment_analyzer=None, duplicate_threshold=NEWS_DUPLICATE_THRESHOLD):
         super().__init__("SentimentAgent")
         self.news_fetcher = news_fetcher or NewsFetcherAdapter()
-        self.sentiment_analyzer = sentiment_analyzer or SentimentIntensityAnalyzer()
+        # A SentimentScorer (see utils/sentiment_scoring.py); anything with nltk's polarity_scores also works
+        self.sentiment_analyzer = sentiment_analyzer or get_sentiment_scorer()
+        self.scorer_version = getattr(self.sentiment_analyzer, "version", None)
+        # Syndicated copies of one story are scored once; None keeps every article
+        self.duplicate_threshold = duplicate_threshold
 
     async def execute(self, task):
         symbols = task['parameters'].get('symbols', ['RELIANCE'])
         # Ensure symbols is a list
-        if isinstance(symbols, str):
+        if hasattr(symbols, "columns"):  # a market-data frame, e.g. "{{MarketDataAgent.result}}"
+            symbols = market_tickers(symbols)
+        elif isinstance(symbols, str):
             symbols = [symbols]
         elif isinstance(symbols, list) and len(symbols) == 1 and isinstance(symbols[0], list):
             symbols = symbols[0]  # Handle nested list
 
+        symbol_master = get_symbol_master()
+        # Use company name for news search, fallback to symbol if not mapped
+        companies = list(dict.fromkeys(symbol_master.display_name(symbol) for symbol in symbols))
         all_results = {}
-        for symbol in symbols:
-            # Use company name for news search, fallback to symbol if not mapped
-            company = TICKER_TO_COMPANY.get(symbol, symbol)
-            articles = self.news_fetcher.get_news(company, 10)
-            results = []
-            for article in articles:
-                content = (article.get("title", "") or "") + " " + (article.get("description") or "")
-                score = self.sentiment_analyzer.polarity_scores(content)
-                label = (
-                    "Positive" if score["compound"] > 0.05 else
-                    "Negative" if score["compound"] < -0.05 else
-                    "Neutral"
-                )
-                results.append({
-                    "headline": article.get("title"),
-                    "sentiment": label,
-                    "score": round(score["compound"], 2)
-                })
-            all_results[company] = results  # Use company name as key for clarity
-        return AgentResult(success=True, data=all_results)
\ No newline at end of file
+        new_scores = {}
+        # Score each company's articles as soon as they arrive
+        async for company, articles, error in self._stream_news(companies, 10):
+            if error is not None:
+                self.logger.warning(f"News fetch failed for {company}: {error}")
+            if self.duplicate_threshold:
+                articles = collapse_near_duplicates(articles, self.duplicate_threshold)
+            all_results[company] = await self._score_articles(articles, new_scores)
+        # Stored articles carry their score, so each one is only scored once
+        save_scores = getattr(self.news_fetcher, "save_scores", None)
+        if new_scores and save_scores is not None:
+            save_scores(new_scores, self.scorer_version)
+        # Use company name as key for clarity, in the order the symbols were given
+        return AgentResult(success=True, data={company: all_results[company] for company in companies})
+
+    async def _stream_news(self, companies, num_articles):
+        """Yields (company, articles, error) per company, concurrently and in completion order."""
+        fetch_many = getattr(self.news_fetcher, "fetch_many", None)
+        if fetch_many is not None:
+            async for item in fetch_many(companies, num_articles):
+                yield item
+            return
+
+        # Fetchers with only a blocking get_news still fan out, one thread each
+        async def fetch_one(company):
+            try:
+                return company, await asyncio.to_thread(self.news_fetcher.get_news, company, num_articles), None
+            except Exception as e:
+                return company, [], e
+
+        for next_done in asyncio.as_completed([fetch_one(company) for company in companies]):
+            yield await next_done
+
+    async def _compounds(self, texts):
+        score_async = getattr(self.sentiment_analyzer, "score_async", None)
+        if score_async is not None:
+            return [float(value) for value in await score_async(texts)]
+        score = getattr(self.sentiment_analyzer, "score", None)
+        if score is not None:
+            return [float(value) for value in score(texts)]
+        return [self.sentiment_analyzer.polarity_scores(text)["compound"] for text in texts]
+
+    async def _score_articles(self, articles, new_scores):
+        # Stored scores only count if this scorer produced them
+        compounds = [article.get("sentiment_score") if article.get("sentiment_scorer") == self.scorer_version else None
+                     for article in articles]
+        unscored = [i for i, compound in enumerate(compounds) if compound is None]
+        if unscored:
+            texts = [(articles[i].get("title", "") or "") + " " + (articles[i].get("description") or "")
+                     for i in unscored]
+            for i, compound in zip(unscored, await self._compounds(texts)):
+                compounds[i] = compound
+                if articles[i].get("id"):
+                    new_scores[articles[i]["id"]] = compound
+        return [self._result(article, compound) for article, compound in zip(articles, compounds)]
+
+    def _result(self, article, compound):
+        label = (
+            "Positive" if compound > 0.05 else
+            "Negative" if compound < -0.05 else
+            "Neutral"
+        )
+        return {
+            "headline": article.get("title"),
+            "sentiment": label,
+            "score": round(compound, 2),
+            "duplicates": article.get("duplicates", 1)
+        }
@@ -1,79 +1,80 @@
 import asyncio
 import logging
-from typing import Dict, List
-from dataclasses import dataclass
+import weakref
+from typing import Dict, List, Optional
 from core.agent_base import BaseAgent, AgentResult
-
-@dataclass
-class AgentTask:
-    agent_name: str
-    task_type: str
-    parameters: Dict
-    priority: int = 1
-    retries: int = 0
+# AgentTask and workflow_graph live with the workflow engine; re-exported for existing imports
+from core.pipeline import AgentTask, run_workflow, workflow_graph
 
 class SupervisorAgent(BaseAgent):
     def __init__(self):
         super().__init__("SupervisorAgent")
         self.agents: Dict[str, BaseAgent] = {}
-        self.task_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        # Steps of one agent allowed to run at once; agents not listed are unlimited
+        self.concurrency: Dict[str, int] = {}
         self.max_retries = 3
+        # asyncio semaphores are bound to the loop that created them, and Streamlit
+        # runs each script execution on a fresh loop.
+        self._loop_semaphores = weakref.WeakKeyDictionary()
 
-    def register_agent(self, agent: BaseAgent):
-        """Register subordinate agents"""
+    def register_agent(self, agent: BaseAgent, max_concurrency: Optional[int] = None):
+        """Register subordinate agents, optionally capping how many of their steps run at once"""
         if not isinstance(agent, BaseAgent):
             raise ValueError("Agent must inherit from BaseAgent")
         self.agents[agent.name] = agent
+        if max_concurrency:
+            self.concurrency[agent.name] = max_concurrency
         self.logger.info(f"Registered agent: {agent.name}")
 
-    async def add_task(self, task: AgentTask):
-        """Add task to processing queue"""
-        await self.task_queue.put((-task.priority, task))  # Negative for proper priority
+    def _semaphore(self, agent_name):
+        semaphores = self._loop_semaphores.setdefault(asyncio.get_running_loop(), {})
+        limit = self.concurrency.get(agent_name)
+        if limit and agent_name not in semaphores:
+            semaphores[agent_name] = asyncio.Semaphore(limit)
+        return semaphores.get(agent_name)
 
     async def execute_workflow(self, workflow: List[Dict]) -> Dict[str, AgentResult]:
-        """Execute a predefined workflow"""
-        # Add all workflow tasks to queue
-        for task_config in workflow:
-            task = AgentTask(**task_config)
-            await self.add_task(task)
-
-        # Process tasks
-        return await self._process_tasks()
-
-    async def _process_tasks(self) -> Dict[str, AgentResult]:
-        """Process all tasks in queue"""
-        results = {}
-        while not self.task_queue.empty():
-            _, task = await self.task_queue.get()
-            agent = self.agents.get(task.agent_name)
-            
-            if not agent:
-                self.logger.error(f"Agent {task.agent_name} not registered")
-                continue
+        """
+        Execute a predefined workflow with the shared engine in core/pipeline:
+        steps run as soon as the steps they reference have finished, and
+        references pass read-only views of earlier results, never copies.
+        Returns {step id: AgentResult}, in workflow order.
+        """
+        return await run_workflow(workflow, self._run_task)
 
+    async def _run_task(self, task: AgentTask) -> AgentResult:
+        agent = self.agents.get(task.agent_name)
+        if not agent:
+            self.logger.error(f"Agent {task.agent_name} not registered")
+            return AgentResult(success=False, data=None, error=f"Agent {task.agent_name} not registered")
+        semaphore = self._semaphore(task.agent_name)
+        if semaphore is None:
             result = await self._execute_with_retry(agent, task)
-            results[f"{task.agent_name}:{task.task_type}"] = result
-
-            # Handle task dependencies
-            if result.success and hasattr(agent, 'get_dependent_tasks'):
-                dependent_tasks = agent.get_dependent_tasks(task, result.data)
-                for dep_task in dependent_tasks:
-                    await self.add_task(dep_task)
+        else:
+            async with semaphore:
+                result = await self._execute_with_retry(agent, task)
 
-        return results
+        # Follow-up tasks an agent asks for run right away, outside the graph
+        if result.success and hasattr(agent, 'get_dependent_tasks'):
+            follow_ups = agent.get_dependent_tasks(task, result.data)
+            await asyncio.gather(*(self._run_task(dep_task) for dep_task in follow_ups))
+        return result
 
     async def _execute_with_retry(self, agent: BaseAgent, task: AgentTask) -> AgentResult:
         """Execute task with retry logic"""
         for attempt in range(task.retries + 1):
             try:
                 result = await agent.execute({
+                    'agent_name': task.agent_name,
                     'task_type': task.task_type,
-                    'parameters': task.parameters
+                    'parameters': task.parameters,
+                    'priority': task.priority,
+                    'retries': task.retries
                 })
-                
+
                 if result.success:
                     return result
-                
+
                 self.logger.warning(
                     f"Attempt {attempt + 1} failed for {task.agent_name}: {result.error}"
                 )
@@ -92,4 +93,4 @@ class SupervisorAgent(BaseAgent):
         """Main execution point for when Supervisor is used as an agent"""
         workflow = task.get('workflow', [])
         results = await self.execute_workflow(workflow)
-        return AgentResult(success=True, data=results)
\ No newline at end of file
+        return AgentResult(success=True, data=results)
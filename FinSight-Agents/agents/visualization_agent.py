@@ -1,18 +1,30 @@
 import os
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import warnings
+from functools import lru_cache
+import pandas as pd
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-try:
-    import mplfinance as mpf
-    HAS_MPLFINANCE = True
-except ImportError:
-    HAS_MPLFINANCE = False
+
+@lru_cache(maxsize=None)
+def _pyplot():
+    """matplotlib.pyplot on the Agg backend, imported on the first chart."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+@lru_cache(maxsize=None)
+def _mplfinance():
+    """The mplfinance module, or None if it is not installed."""
+    _pyplot()  # select the Agg backend before mplfinance loads matplotlib
+    try:
+        import mplfinance as mpf
+    except ImportError:
+        return None
+    return mpf
+
 
 class VisualizationAgent:
     def __init__(self, save_dir="data/processed"):
@@ -20,6 +32,8 @@ class VisualizationAgent:
         os.makedirs(self.save_dir, exist_ok=True)
 
     def bar_chart_with_labels(self, data: pd.DataFrame, x, y, title=None, filename='bar_chart.png', sort=True, palette='viridis'):
+        import seaborn as sns
+        plt = _pyplot()
         plt.figure(figsize=(10, 6))
         plot_data = data.copy()
         if sort:
@@ -43,6 +57,7 @@ class VisualizationAgent:
         counts = {"Positive": 0, "Neutral": 0, "Negative": 0}
         for s in sentiments:
             counts[s['sentiment']] = counts.get(s['sentiment'], 0) + 1
+        plt = _pyplot()
         plt.figure(figsize=(5,5))
         plt.pie(counts.values(), labels=counts.keys(), autopct='%1.1f%%', colors=['#4caf50', '#9e9e9e', '#f44336'])
         plt.title(f"Sentiment Distribution for {company}")
@@ -56,6 +71,7 @@ class VisualizationAgent:
         if 'Date' not in df.columns:
             print("No Date column for price/volume chart.")
             return
+        plt = _pyplot()
         fig, ax1 = plt.subplots(figsize=(8,4))
         ax1.bar(df['Date'], df['Volume'], color='lightblue', alpha=0.6, label='Volume')
         ax2 = ax1.twinx()
@@ -70,28 +86,21 @@ class VisualizationAgent:
         plt.close()
         print(f"Price & volume chart saved to {save_path}")
 
-    def candlestick_chart(self, ticker, filename='candlestick.png', period="5d"):
-        if not HAS_MPLFINANCE:
+    def candlestick_chart(self, ticker, filename='candlestick.png', period="5d", price_data=None):
+        """
+        Draws from `price_data` (a long market-data frame such as MarketDataAgent's
+        result) when given; only history older than what it holds is read from the
+        OHLCV store. Without `price_data` the store serves the whole period.
+        """
+        mpf = _mplfinance()
+        if mpf is None:
             print("mplfinance not installed, skipping candlestick chart.")
             return
-        import yfinance as yf
-        df = yf.download(ticker, period=period, interval="1d")
+        df = self._price_history(ticker, period, price_data)
         if df.empty:
             print("No data for candlestick chart.")
             return
 
-        # Handle MultiIndex columns (as returned by yfinance for multiple tickers or some single-ticker queries)
-        if isinstance(df.columns, pd.MultiIndex):
-            try:
-                df = df.xs(ticker, axis=1, level=1, drop_level=False)
-                df.columns = [col[0] for col in df.columns]
-            except Exception:
-                df.columns = ['_'.join(col).strip('_') for col in df.columns.values]
-                ohlc_cols = [f"{col}_{ticker}" for col in ['Open', 'High', 'Low', 'Close', 'Volume']]
-                if all(col in df.columns for col in ohlc_cols):
-                    df = df[ohlc_cols]
-                    df.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-
         # Now ensure we have the right columns
         for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
             if col not in df.columns:
@@ -122,6 +131,26 @@ class VisualizationAgent:
         )
         print(f"Enhanced candlestick chart saved to {save_path}")
 
+    def _price_history(self, ticker, period, price_data=None):
+        """Date-indexed OHLCV frame for one ticker covering `period`."""
+        from utils.ohlcv_store import get_ohlcv_store, period_to_range
+        start, end, bars = period_to_range(period)
+        store = get_ohlcv_store()
+        rows = price_data[price_data["ticker"] == ticker] if price_data is not None and len(price_data) else None
+        if rows is None or rows.empty:
+            frame = store.get_period([ticker], period=period, interval="1d")
+            return frame.xs(ticker, axis=1, level=1) if not frame.empty else frame
+
+        df = rows.set_index("date")[["open", "high", "low", "close", "volume"]].rename(columns=str.capitalize)
+        df.index.name = "Date"
+        earliest = df.index.min()
+        if (len(df) < bars) if bars else (earliest > start):
+            # Only the older bars the in-memory frame is missing
+            older = store.get_history([ticker], start, earliest, interval="1d")
+            if not older.empty:
+                df = pd.concat([older.xs(ticker, axis=1, level=1)[df.columns], df]).sort_index()
+        return df.tail(bars) if bars else df[df.index >= start]
+
     def sentiment_timeline(self, sentiments, company, filename='sentiment_timeline.png'):
         # Expects a list of dicts with 'score' and 'headline'
         if not sentiments:
@@ -129,6 +158,7 @@ class VisualizationAgent:
             return
         scores = [s['score'] for s in sentiments]
         headlines = [s['headline'][:40] + "..." if len(s['headline']) > 40 else s['headline'] for s in sentiments]
+        plt = _pyplot()
         plt.figure(figsize=(8, 3))
         plt.plot(range(1, len(scores)+1), scores, marker='o', color='purple')
         plt.xticks(range(1, len(scores)+1), headlines, rotation=45, ha='right', fontsize=8)
@@ -0,0 +1,44 @@
+"""
+Indicator engine benchmark: full computation over 500 tickers x 10 years of
+daily bars, then incremental updates for new bars.
+
+    python benchmarks/bench_indicators.py
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from utils.indicators import IndicatorEngine, compute_indicators
+
+TICKERS = 500
+DAYS = 252 * 10
+
+
+def random_walk(rng):
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, (TICKERS, DAYS)), axis=1))
+    spread = np.abs(rng.normal(0, 0.01, (TICKERS, DAYS)))
+    return close * (1 + spread), close * (1 - spread), close
+
+
+def best_of(fn, runs=5):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    high, low, close = random_walk(np.random.default_rng(0))
+    full = best_of(lambda: compute_indicators(high, low, close))
+    print(f"compute_indicators {TICKERS} tickers x {DAYS} days: {full * 1000:.1f} ms")
+
+    engine = IndicatorEngine(range(TICKERS), high[:, :-100], low[:, :-100], close[:, :-100])
+    start = time.perf_counter()
+    for t in range(DAYS - 100, DAYS):
+        engine.update(high[:, t], low[:, t], close[:, t])
+    per_bar = (time.perf_counter() - start) / 100
+    print(f"IndicatorEngine.update, {TICKERS} tickers: {per_bar * 1e6:.0f} us per bar")
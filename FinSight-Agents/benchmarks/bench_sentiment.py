@@ -0,0 +1,55 @@
+"""
+Sentiment scoring benchmark: nltk's per-article polarity_scores loop against
+the batch VADER scorer, single-process and over a process pool, on synthetic
+financial headlines.
+
+    python benchmarks/bench_sentiment.py [articles]
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from utils.sentiment_scoring import VADER_TOLERANCE, VaderBatchScorer
+
+ARTICLES = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+COMPANIES = ["Apple", "Tesla", "Reliance", "Infosys", "HDFC Bank", "Microsoft", "Nvidia", "Tata Motors"]
+SUBJECTS = ["shares", "stock", "profit", "revenue", "outlook", "deliveries", "margins", "guidance"]
+MOVES = ["surge", "slump", "rise", "fall", "beat estimates", "miss estimates", "hold steady",
+         "hit a record high", "crash", "recover", "disappoint investors", "impress analysts"]
+TAILS = ["after strong quarter", "amid weak demand", "on upbeat guidance", "despite lawsuit concerns",
+         "as costs rise", "but risks remain", "on takeover talk", "after CEO resigns", "", "!"]
+
+
+def headlines(n, seed=0):
+    rng = np.random.default_rng(seed)
+    picks = [rng.integers(0, len(words), n) for words in (COMPANIES, SUBJECTS, MOVES, TAILS)]
+    numbers = rng.integers(1, 500, n)
+    return [
+        f"{COMPANIES[c]} {SUBJECTS[s]} {MOVES[m]} {TAILS[t]} ({k} basis points)"
+        for c, s, m, t, k in zip(*picks, numbers)
+    ]
+
+
+def rate(label, fn, texts):
+    start = time.perf_counter()
+    result = fn(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {len(texts) / elapsed:>12,.0f} articles/s")
+    return np.asarray(result)
+
+
+if __name__ == "__main__":
+    texts = headlines(ARTICLES)
+    analyzer = SentimentIntensityAnalyzer()
+    scorer = VaderBatchScorer(analyzer)
+    sample = texts[:20_000]
+    baseline = rate("nltk polarity_scores loop", lambda t: [analyzer.polarity_scores(x)["compound"] for x in t], sample)
+    batch = rate("VaderBatchScorer", scorer.score, sample)
+    assert np.abs(batch - baseline).max() <= VADER_TOLERANCE
+    rate("VaderBatchScorer (full corpus)", scorer.score, texts)
+    processes = os.cpu_count() or 1
+    if processes > 1:
+        rate(f"VaderBatchScorer, {processes} processes", lambda t: scorer.score(t, processes=processes, chunk_size=10_000), texts)
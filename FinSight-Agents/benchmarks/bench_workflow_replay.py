@@ -0,0 +1,50 @@
+"""
+End-to-end workflow benchmark against the recorded provider corpus.
+
+Record once (needs network and API keys), then time offline replays:
+
+    FINSIGHT_PROVIDER_MODE=record python benchmarks/bench_workflow_replay.py
+    FINSIGHT_PROVIDER_MODE=replay python benchmarks/bench_workflow_replay.py
+    FINSIGHT_PROVIDER_MODE=replay FINSIGHT_REPLAY_LATENCY=1 python benchmarks/bench_workflow_replay.py
+
+Replay with latency 1 reproduces the recorded network timings; 0 measures
+the pipeline's own overhead. Gemini's response cache is pointed at scratch
+files so every run goes through the provider; the OHLCV and news stores are
+bypassed while recording or replaying, and period ranges use the corpus's
+recorded date, so a corpus replays the same on any day and machine.
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import main
+import utils.gemini_helpers as gemini_helpers
+from agents.visualization_agent import VisualizationAgent
+from core.pipeline import stock_query_workflow
+from utils.gemini_cache import GeminiCache
+from utils.providers import provider_mode
+
+SYMBOLS = ["AAPL", "MSFT", "RELIANCE.NS"]
+RUNS = 3 if provider_mode() == "replay" else 1
+
+WORKFLOW = stock_query_workflow(SYMBOLS)
+
+
+if __name__ == "__main__":
+    scratch = tempfile.mkdtemp()
+    main.visualization_agent = VisualizationAgent(save_dir=scratch)
+    timings = []
+    for _ in range(RUNS):
+        gemini_helpers.GEMINI_CACHE = GeminiCache(os.path.join(scratch, f"gemini_{len(timings)}.db"))
+        supervisor = main.SupervisorAgent()
+        supervisor.register_agent(main.MarketDataAgent())
+        supervisor.register_agent(main.SentimentAgent(main.NewsFetcherAdapter()))
+        supervisor.register_agent(main.InsightAgent(None, None, batch_size=10))
+        start = time.perf_counter()
+        asyncio.run(main.run_workflow(supervisor, WORKFLOW))
+        timings.append(time.perf_counter() - start)
+    print(f"run_workflow ({provider_mode()}, {len(SYMBOLS)} symbols): "
+          + ", ".join(f"{t * 1000:.0f} ms" for t in timings))
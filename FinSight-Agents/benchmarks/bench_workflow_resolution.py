@@ -0,0 +1,72 @@
+"""
+Reference-resolution benchmark: what passing MarketDataAgent and SentimentAgent
+results to InsightAgent costs with the old `copy.deepcopy` of the parameters
+against the shared engine's read-only views, for multi-year daily history.
+
+    python benchmarks/bench_workflow_resolution.py [tickers] [years]
+"""
+import copy
+import os
+import sys
+import time
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from core.agent_base import AgentResult
+from core.pipeline import resolve_parameters, stock_query_workflow
+from utils.market_frame import to_long_frame
+
+TICKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+YEARS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+RUNS = 5
+
+
+def market_data(tickers, years, seed=0):
+    dates = pd.bdate_range(end="2025-06-30", periods=252 * years, name="Date")
+    symbols = [f"T{i:04d}" for i in range(tickers)]
+    columns = pd.MultiIndex.from_product([["Open", "High", "Low", "Close", "Volume"], symbols],
+                                         names=["Price", "Ticker"])
+    values = np.random.default_rng(seed).uniform(10, 500, (len(dates), len(columns)))
+    return to_long_frame(pd.DataFrame(values, index=dates, columns=columns))
+
+
+def sentiment(companies, per_company=10):
+    return {
+        f"Company {i}": [{"headline": f"Company {i} headline {j}", "sentiment": "Neutral", "score": 0.0,
+                          "duplicates": 1} for j in range(per_company)]
+        for i in range(companies)
+    }
+
+
+def measure(label, fn):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {min(timings) * 1000:>10.3f} ms {peak / 2**20:>10.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    results = {
+        "MarketDataAgent": AgentResult(success=True, data=market_data(TICKERS, YEARS)),
+        "SentimentAgent": AgentResult(success=True, data=sentiment(TICKERS)),
+    }
+    parameters = stock_query_workflow([])[2]["parameters"]
+    rows = len(results["MarketDataAgent"].data)
+    print(f"{TICKERS} tickers x {YEARS}y daily bars = {rows:,} rows, "
+          f"{results['MarketDataAgent'].data.memory_usage(deep=True).sum() / 2**20:.1f} MiB")
+
+    def deepcopied():
+        # What the old executors did: resolve, then copy.deepcopy the parameters
+        resolved = {key: results[value[2:-2].split(".")[0]].data for key, value in parameters.items()}
+        return copy.deepcopy(resolved)
+
+    measure("deepcopy (before)", deepcopied)
+    measure("read-only views (engine)", lambda: resolve_parameters(parameters, results))
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 from typing import Any, Dict, Optional
 
@@ -8,6 +8,7 @@ class AgentResult:
     success: bool
     data: Any
     error: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
 class BaseAgent(ABC):
     def __init__(self, name: str):
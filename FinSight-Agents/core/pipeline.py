@@ -1,16 +1,199 @@
-from typing import Dict, Any, List
-from agents.supervisor_agent import AgentTask
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+import asyncio
 import re
-import copy
+import pandas as pd
+from core.agent_base import AgentResult
+
+# A parameter whose whole value is "{{StepId.result}}" takes that step's result data;
+# "{{StepId.result.key.0}}" follows keys, attributes or list indices into it, and
+# "{{StepId.metadata.errors}}" reads other AgentResult fields. Path segments are
+# split on dots, so keys that contain a dot cannot be addressed.
+REFERENCE = re.compile(r"^\{\{\s*(\w+)((?:\.[^.{}\s]+)+)\s*\}\}$")
+
+# read_only() hands out DataFrame views that must not write through to the
+# producing step. Copy-on-write guarantees that; it is always on from pandas 3.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+@dataclass
+class AgentTask:
+    agent_name: str
+    task_type: str
+    parameters: Dict
+    priority: int = 1
+    retries: int = 0
+    id: Optional[str] = None  # step id other steps reference; defaults to agent_name
+
+    @property
+    def step_id(self) -> str:
+        return self.id or self.agent_name
+
+    def dependencies(self) -> set:
+        """Ids of the steps this task's parameters reference."""
+        return {m.group(1) for v in self.parameters.values() if isinstance(v, str) and (m := REFERENCE.match(v))}
+
+def read_only(value):
+    """
+    A view of `value` that shares its data instead of copying it. Dicts become
+    read-only mapping proxies and lists tuples, recursively, so nested values
+    cannot be changed either; only these containers are rebuilt. DataFrames and
+    Series become shallow copies over the same buffers, and copy-on-write (see
+    above) keeps writes to them from reaching the original. Anything else is
+    passed as is, and consumers must treat it as read-only.
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: read_only(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(read_only(item) for item in value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    return value
+
+def _step(value, key):
+    if value is None:
+        return None
+    if isinstance(value, Mapping):
+        return value.get(key)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value[key] if key in value else None
+    if isinstance(value, (list, tuple)):
+        try:
+            return value[int(key)]
+        except (ValueError, IndexError):
+            return None
+    return getattr(value, key, None)
+
+def resolve_reference(reference: str, results: Mapping[str, Any]):
+    """
+    Value of a "{{Step.path}}" reference against {step id: AgentResult}, as a
+    read-only view. Results given as plain data are treated as the step's
+    `result`. Missing steps or keys along the path resolve to None.
+    """
+    match = REFERENCE.match(reference)
+    if not match:
+        raise ValueError(f"Not a workflow reference: {reference}")
+    step_id, path = match.group(1), match.group(2).split(".")[1:]
+    value = results.get(step_id)
+    field, rest = path[0], path[1:]
+    if isinstance(value, AgentResult):
+        value = value.data if field == "result" else getattr(value, field, None)
+    elif field != "result":
+        value = None
+    for key in rest:
+        value = _step(value, key)
+    return read_only(value)
+
+def resolve_parameters(parameters: Mapping[str, Any], results: Mapping[str, Any]) -> Dict[str, Any]:
+    """A new parameters dict with every reference resolved; frames and leaf values are not copied."""
+    return {
+        key: resolve_reference(value, results) if isinstance(value, str) and REFERENCE.match(value) else value
+        for key, value in parameters.items()
+    }
 
 def resolve_dependencies(task, results):
-    resolved = copy.deepcopy(task)
-    pattern = re.compile(r"\{\{(.+?)\}\}")
-    for k, v in resolved["parameters"].items():
-        if isinstance(v, str):
-            match = pattern.match(v)
-            if match:
-                ref = match.group(1)
-                agent_name, _ = ref.split(".")
-                resolved["parameters"][k] = results.get(agent_name, None)
-    return resolved
\ No newline at end of file
+    """`task` (a workflow step dict) with its parameters resolved against `results`."""
+    return {**task, "parameters": resolve_parameters(task["parameters"], results)}
+
+def workflow_graph(tasks: List[AgentTask]) -> Dict[str, set]:
+    """
+    {step id: ids it depends on} for a workflow. Raises ValueError on duplicate
+    ids, references to unknown steps and cycles.
+    """
+    graph = {}
+    for task in tasks:
+        if task.step_id in graph:
+            raise ValueError(f"Duplicate workflow step id: {task.step_id}")
+        graph[task.step_id] = task.dependencies()
+    for step, deps in graph.items():
+        unknown = deps - graph.keys()
+        if unknown:
+            raise ValueError(f"Step {step} references unknown steps: {', '.join(sorted(unknown))}")
+    # Kahn's algorithm: whatever never becomes ready is on a cycle
+    remaining = {step: set(deps) for step, deps in graph.items()}
+    ready = [step for step, deps in remaining.items() if not deps]
+    while ready:
+        done = ready.pop()
+        del remaining[done]
+        for step, deps in remaining.items():
+            if done in deps:
+                deps.discard(done)
+                if not deps:
+                    ready.append(step)
+    if remaining:
+        raise ValueError(f"Workflow has a dependency cycle through: {', '.join(sorted(remaining))}")
+    return graph
+
+def _start_order(tasks, graph):
+    # Dependencies first, then higher priority, so limited agents start the most important steps
+    depth = {}
+
+    def level(step_id):
+        if step_id not in depth:
+            depth[step_id] = 1 + max((level(dep) for dep in graph[step_id]), default=-1)
+        return depth[step_id]
+
+    return [t.step_id for t in sorted(tasks, key=lambda t: (level(t.step_id), -t.priority))]
+
+async def run_workflow(workflow: List, run_task: Callable[[AgentTask], Awaitable[AgentResult]]) -> Dict[str, AgentResult]:
+    """
+    Runs a workflow as a dependency graph built from its references: every step
+    starts as soon as the steps it references have finished, so independent
+    steps run concurrently. `run_task` executes one resolved AgentTask.
+    Returns {step id: AgentResult}, in workflow order.
+    """
+    tasks = [task if isinstance(task, AgentTask) else AgentTask(**task) for task in workflow]
+    graph = workflow_graph(tasks)
+    by_id = {task.step_id: task for task in tasks}
+    results: Dict[str, AgentResult] = {}
+    running: Dict[str, asyncio.Task] = {}
+
+    async def run_step(step_id):
+        if graph[step_id]:
+            await asyncio.gather(*(running[dep] for dep in graph[step_id]))
+        task = by_id[step_id]
+        parameters = resolve_parameters(task.parameters, results)
+        results[step_id] = await run_task(
+            AgentTask(task.agent_name, task.task_type, parameters, task.priority, task.retries, task.id)
+        )
+
+    for step_id in _start_order(tasks, graph):
+        running[step_id] = asyncio.create_task(run_step(step_id))
+    try:
+        await asyncio.gather(*running.values())
+    finally:
+        for pending in running.values():
+            pending.cancel()
+    return {task.step_id: results[task.step_id] for task in tasks}
+
+def stock_query_workflow(symbols, period="6mo"):
+    """
+    The workflow behind a user query, shared by main.py and streamlit_app.py:
+    prices and news for `symbols` in parallel, then insights from both.
+    """
+    return [
+        {
+            "agent_name": "MarketDataAgent",
+            "task_type": "fetch_specific_stocks",
+            "parameters": {"symbols": symbols, "period": period},
+            "priority": 1,
+            "retries": 2
+        },
+        {
+            # Only needs the symbols, so news is fetched while prices download
+            "agent_name": "SentimentAgent",
+            "task_type": "analyze_news",
+            "parameters": {"symbols": symbols},
+            "priority": 2
+        },
+        {
+            "agent_name": "InsightAgent",
+            "task_type": "generate_summary",
+            "parameters": {
+                "market_data": "{{MarketDataAgent.result}}",
+                "sentiment": "{{SentimentAgent.result}}"
+            },
+            "priority": 3
+        }
+    ]
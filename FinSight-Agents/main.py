@@ -3,89 +3,25 @@ from agents.market_data_agent import MarketDataAgent
 from agents.sentiment_agent import SentimentAgent
 from agents.insight_agent import InsightAgent
 from agents.visualization_agent import VisualizationAgent
-from utils.news_fetcher import NewsFetcherAdapter
-from utils.company_to_ticker import COMPANY_TO_TICKER
-from utils.gemini_helpers import get_gemini_insight  # Add this import
+from core.pipeline import stock_query_workflow
+from utils.news_fetcher import NEWS_CLIENT, NewsFetcherAdapter
+from utils.symbol_resolver import resolve_symbols_with_fallback
+from utils.gemini_helpers import get_gemini_insight_async
 import asyncio
-import copy
-import pandas as pd
 import re
 import dotenv
 dotenv.load_dotenv()
 
 
 
-def normalize_company_key(name):
-    return name.replace(" ", "").upper()
-
-def map_to_tickers(items):
-    tickers = []
-    # Build a normalized mapping for company names
-    normalized_company_map = {normalize_company_key(k): v for k, v in COMPANY_TO_TICKER.items()}
-    for item in items:
-        key = item.strip().upper()
-        # Try direct ticker match first
-        if key in COMPANY_TO_TICKER.values():
-            tickers.append(key)
-        else:
-            norm_key = normalize_company_key(item)
-            if norm_key in normalized_company_map:
-                tickers.append(normalized_company_map[norm_key])
-    return tickers
-
 async def run_workflow(supervisor, workflow):
-    results = {}
-    for step in workflow:
-        agent_name = step["agent_name"]
-        task_type = step["task_type"]
-        # Make a copy so we don't mutate the workflow definition
-        parameters = copy.deepcopy(step["parameters"])
-
-        # Resolve parameters that reference previous results
-        for key, value in parameters.items():
-            if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
-                ref_agent = value[2:-2]
-                # Special handling for SentimentAgent's symbols parameter
-                if agent_name == "SentimentAgent" and key == "symbols":
-                    ref = value[2:-2]  # e.g., "MarketDataAgent.result"
-                    ref_agent = ref.split(".")[0]
-                    market_data = results.get(ref_agent).data if ref_agent in results else None
-                    print("DEBUG: market_data for SentimentAgent:", market_data)
-                    if market_data and isinstance(market_data, list) and len(market_data) > 0:
-                        first_row = market_data[0]
-                        print("first_row keys and types:")
-                        for k in first_row.keys():
-                            print(f"  {k!r} (type: {type(k)})")
-                        symbols = [k[1] for k in first_row.keys() if isinstance(k, tuple) and len(k) == 2 and str(k[0]).strip().lower() == 'close']
-                        # if not symbols:
-                            # symbols = ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]
-                        # print("Extracted symbols:", symbols)
-                        parameters[key] = symbols
-                    else:
-                        print("DEBUG: market_data is empty or not a list")
-                        parameters[key] = []
-                else:
-                    # For other dependencies
-                    ref = value[2:-2]
-                    ref_agent = ref.split(".")[0]
-                    parameters[key] = results[ref_agent].data if ref_agent in results else None
-
-        if agent_name == "SentimentAgent":
-            print("Symbols being passed to SentimentAgent:", parameters.get("symbols"))
-
-        # Execute the task
-        result = await supervisor.agents[agent_name].execute({
-            "agent_name": agent_name,
-            "task_type": task_type,
-            "parameters": parameters,
-            "priority": step.get("priority", 0),
-            "retries": step.get("retries", 0)
-        })
-        results[agent_name] = result
+    # Steps run as soon as the steps they reference have finished
+    results = await supervisor.execute_workflow(workflow)
+    for agent_name, result in results.items():
         print(f"{agent_name} result:", result.data)
 
     print_sentiment_results(results["SentimentAgent"].data)
-    print_insight_results(results["InsightAgent"].data, visualization_agent)
+    print_insight_results(results["InsightAgent"].data, visualization_agent, results["MarketDataAgent"].data)
 
 def print_sentiment_results(sentiment_data):
     for company, articles in sentiment_data.items():
@@ -98,7 +34,7 @@ def print_sentiment_results(sentiment_data):
             print(f"  Sentiment: {art['sentiment']} (score: {art['score']})")
             print("-" * 40)
 
-def print_insight_results(insights, visualization_agent):
+def print_insight_results(insights, visualization_agent, market_data=None):
     if not insights:
         print("No insights available.")
         return
@@ -152,6 +88,7 @@ def print_insight_results(insights, visualization_agent):
             print("-" * 40)
 
         # --- Visualization for multiple stocks ---
+        import pandas as pd
         df = pd.DataFrame(insights)
         visualization_agent.bar_chart_with_labels(
             df, x='company', y='latest_close', title='Latest Close Prices', filename='close_prices_seaborn.png'
@@ -176,7 +113,7 @@ def print_insight_results(insights, visualization_agent):
         )
     # 3. Candlestick Chart (if mplfinance installed)
     visualization_agent.candlestick_chart(
-        info['ticker'], filename=f"{info['ticker']}_candlestick.png", period="5d"
+        info['ticker'], filename=f"{info['ticker']}_candlestick.png", period="5d", price_data=market_data
     )
     # 4. Price & Volume Chart (if you have historical data)
     # If you only have one day, skip or fetch more days in MarketDataAgent
@@ -193,7 +130,7 @@ def parse_user_query(query):
     # Remove empty strings and uppercase for tickers
     return [item.upper() for item in items if item]
 
-def extract_tickers_llm(query):
+async def extract_tickers_llm(query):
     """
     Use Gemini LLM to extract stock tickers from a natural language query.
     Returns a list of tickers (e.g., ["AAPL", "TSLA"]).
@@ -204,7 +141,7 @@ def extract_tickers_llm(query):
         "Return only a comma-separated list of tickers or company names, no explanation, no extra text.\n"
         f"Query: {query}"
     )
-    response = get_gemini_insight(prompt)
+    response = await get_gemini_insight_async(prompt)
     # Split by comma, strip whitespace, and filter out empty strings
     items = [item.strip().upper() for item in response.split(",") if item.strip()]
     return items
@@ -213,51 +150,24 @@ async def main():
     supervisor = SupervisorAgent()
     supervisor.register_agent(MarketDataAgent())
     supervisor.register_agent(SentimentAgent(NewsFetcherAdapter()))
-    supervisor.register_agent(InsightAgent(None, None))
+    supervisor.register_agent(InsightAgent(None, None, batch_size=10))
 
     while True:
         user_query = input("\nAsk your stock question (natural language, or 'exit' to quit):\n> ")
         if user_query.strip().lower() == 'exit':
             print("Goodbye!")
+            await NEWS_CLIENT.close()
             break
 
-        user_symbols_raw = extract_tickers_llm(user_query)  # LLM returns names/tickers
-        user_symbols = map_to_tickers(user_symbols_raw)
-        if not user_symbols:
+        # Local resolver first; Gemini is only asked when nothing matches locally
+        matches = await resolve_symbols_with_fallback(user_query, extract_tickers_llm)
+        if not matches:
             print("Sorry, I couldn't find any valid stock tickers in your query.")
             continue
+        print("Resolved symbols: " + ", ".join(f"{m.symbol} ({m.source})" for m in matches))
+        user_tickers = [m.symbol for m in matches]
 
-        # Map user symbols to actual tickers
-        user_tickers = map_to_tickers(user_symbols)
-        if not user_tickers:
-            print("Sorry, I couldn't map any of the provided symbols to known tickers.")
-            continue
-
-        workflow = [
-            {
-                "agent_name": "MarketDataAgent",
-                "task_type": "fetch_specific_stocks",
-                "parameters": {"symbols": user_tickers},
-                "priority": 1,
-                "retries": 2
-            },
-            {
-                "agent_name": "SentimentAgent",
-                "task_type": "analyze_news",
-                "parameters": {"symbols": "{{MarketDataAgent.result}}"},
-                "priority": 2
-            },
-            {
-                "agent_name": "InsightAgent",
-                "task_type": "generate_summary",
-                "parameters": {
-                    "market_data": "{{MarketDataAgent.result}}",
-                    "sentiment": "{{SentimentAgent.result}}"
-                },
-                "priority": 3
-            }
-        ]
-
+        workflow = stock_query_workflow(user_tickers)
         await run_workflow(supervisor, workflow)
 
 visualization_agent = VisualizationAgent()
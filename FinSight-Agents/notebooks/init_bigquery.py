@@ -6,7 +6,7 @@ import pandas as pd
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.yfinance_helper import fetch_stock_data, format_for_bigquery
+from utils.yfinance_helper import fetch_stock_data, format_for_bigquery, export_market_data
 from utils.bigquery_helpers import BigQueryClient
 
 # Load schema from JSON file
@@ -48,6 +48,12 @@ if __name__ == "__main__":
     df.to_csv(csv_path, index=False)
     print(f"Saved {len(records)} records to {csv_path}")
 
+    # Full history export (Parquet loads directly into BigQuery), written chunk by chunk
+    history_path = os.path.join(csv_dir, 'stock_history.parquet')
+    end = pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+    rows = export_market_data(symbols, history_path, start=end - pd.DateOffset(years=5), end=end)
+    print(f"Exported {rows} rows of history to {history_path}")
+
     # --- Uncomment below to use BigQuery streaming insert (not allowed in sandbox) ---
     # bq = BigQueryClient()
     # table_id = "market_data.stock_prices"  # dataset.table
@@ -1,4 +1,3 @@
-import nltk
 import streamlit as st
 import asyncio
 import pandas as pd
@@ -8,17 +7,13 @@ from agents.market_data_agent import MarketDataAgent
 from agents.sentiment_agent import SentimentAgent
 from agents.insight_agent import InsightAgent
 from agents.visualization_agent import VisualizationAgent
-from utils.news_fetcher import NewsFetcherAdapter
-from utils.company_to_ticker import COMPANY_TO_TICKER
-from utils.gemini_helpers import get_gemini_insight
-import copy
+from core.pipeline import stock_query_workflow
+from utils.news_fetcher import NEWS_CLIENT, NewsFetcherAdapter
+from utils.symbol_resolver import resolve_symbols_with_fallback
+from utils.gemini_helpers import get_gemini_insight_async
 import dotenv
 import random
 import os
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    nltk.download('vader_lexicon')
 dotenv.load_dotenv()
 
 # Page config
@@ -242,30 +237,14 @@ def shimmer_loader(num_bars=3):
 
 # --- Utility Functions (unchanged) ---
 
-def normalize_company_key(name):
-    return name.replace(" ", "").upper()
-
-def map_to_tickers(items):
-    tickers = []
-    normalized_company_map = {normalize_company_key(k): v for k, v in COMPANY_TO_TICKER.items()}
-    for item in items:
-        key = item.strip().upper()
-        if key in COMPANY_TO_TICKER.values():
-            tickers.append(key)
-        else:
-            norm_key = normalize_company_key(item)
-            if norm_key in normalized_company_map:
-                tickers.append(normalized_company_map[norm_key])
-    return tickers
-
-def extract_tickers_llm(query):
+async def extract_tickers_llm(query):
     prompt = (
         "Extract all stock tickers (e.g., AAPL, TSLA, RELIANCE.NS) or company names (e.g., Apple, Tesla, Reliance) "
         f"from the following user query. "
         "Return only a comma-separated list of tickers or company names, no explanation, no extra text.\n"
         f"Query: {query}"
     )
-    response = get_gemini_insight(prompt)
+    response = await get_gemini_insight_async(prompt)
     items = [item.strip().upper() for item in response.split(",") if item.strip()]
     return items
 
@@ -339,57 +318,10 @@ def format_cards(insights):
     return cards
 
 async def run_workflow(supervisor, user_tickers):
-    workflow = [
-        {
-            "agent_name": "MarketDataAgent",
-            "task_type": "fetch_specific_stocks",
-            "parameters": {"symbols": user_tickers},
-            "priority": 1,
-            "retries": 2
-        },
-        {
-            "agent_name": "SentimentAgent",
-            "task_type": "analyze_news",
-            "parameters": {"symbols": "{{MarketDataAgent.result}}"},
-            "priority": 2
-        },
-        {
-            "agent_name": "InsightAgent",
-            "task_type": "generate_summary",
-            "parameters": {
-                "market_data": "{{MarketDataAgent.result}}",
-                "sentiment": "{{SentimentAgent.result}}"
-            },
-            "priority": 3
-        }
-    ]
-    results = {}
-    for step in workflow:
-        agent_name = step["agent_name"]
-        task_type = step["task_type"]
-        parameters = copy.deepcopy(step["parameters"])
-        for key, value in parameters.items():
-            if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
-                ref_agent = value[2:-2].split(".")[0]
-                if agent_name == "SentimentAgent" and key == "symbols":
-                    market_data = results.get(ref_agent).data if ref_agent in results else None
-                    if market_data and isinstance(market_data, list) and len(market_data) > 0:
-                        first_row = market_data[0]
-                        symbols = [k[1] for k in first_row.keys() if isinstance(k, tuple) and len(k) == 2 and str(k[0]).strip().lower() == 'close']
-                        parameters[key] = symbols
-                    else:
-                        parameters[key] = []
-                else:
-                    parameters[key] = results[ref_agent].data if ref_agent in results else None
-        result = await supervisor.agents[agent_name].execute({
-            "agent_name": agent_name,
-            "task_type": task_type,
-            "parameters": parameters,
-            "priority": step.get("priority", 0),
-            "retries": step.get("retries", 0)
-        })
-        results[agent_name] = result
-    return results["InsightAgent"].data
+    workflow = stock_query_workflow(user_tickers)
+    # Steps run as soon as the steps they reference have finished
+    results = await supervisor.execute_workflow(workflow)
+    return results["InsightAgent"].data, results["MarketDataAgent"].data
 
 # --- Initialize Session State for Chat History ---
 if 'chat_history' not in st.session_state:
@@ -425,27 +357,33 @@ with st.form(key="fin_form"):
     with col2:
         submit = st.form_submit_button("🔎 Analyze", use_container_width=True)
 
-# Initialize agents
-supervisor = SupervisorAgent()
-supervisor.register_agent(MarketDataAgent())
-supervisor.register_agent(SentimentAgent(NewsFetcherAdapter()))
-supervisor.register_agent(InsightAgent(None, None))
-visualization_agent = VisualizationAgent()
+# Initialize agents once per process; Streamlit reruns this script on every interaction
+@st.cache_resource
+def build_agents():
+    supervisor = SupervisorAgent()
+    supervisor.register_agent(MarketDataAgent())
+    supervisor.register_agent(SentimentAgent(NewsFetcherAdapter()))
+    supervisor.register_agent(InsightAgent(None, None, batch_size=10))
+    return supervisor, VisualizationAgent()
+
+supervisor, visualization_agent = build_agents()
 
 # Process new query
 if submit and user_input:
-    user_symbols_raw = extract_tickers_llm(user_input)
-    user_tickers = map_to_tickers(user_symbols_raw)
-    if not user_tickers:
-        st.warning("Sorry, I couldn't find any valid stock tickers in your query.")
-    else:
-        # Show shimmer loader while processing
-        shimmer_placeholder = st.empty()
-        shimmer_placeholder.html(shimmer_loader(3))
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            insights = loop.run_until_complete(run_workflow(supervisor, user_tickers))
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        # Local resolver first; Gemini is only asked when nothing matches locally
+        matches = loop.run_until_complete(resolve_symbols_with_fallback(user_input, extract_tickers_llm))
+        user_tickers = [m.symbol for m in matches]
+        resolved_via = ", ".join(f"{m.symbol} ({m.source})" for m in matches)
+        if not user_tickers:
+            st.warning("Sorry, I couldn't find any valid stock tickers in your query.")
+        else:
+            # Show shimmer loader while processing
+            shimmer_placeholder = st.empty()
+            shimmer_placeholder.html(shimmer_loader(3))
+            insights, market_data = loop.run_until_complete(run_workflow(supervisor, user_tickers))
             # Store visualization paths
             visualization_paths = []
             if insights:
@@ -465,7 +403,8 @@ if submit and user_input:
                             visualization_paths.append(('Sentiment Timeline', timeline_path))
                     # Candlestick Chart
                     candle_path = os.path.join(visualization_agent.save_dir, f"{info['ticker']}_candlestick.png")
-                    visualization_agent.candlestick_chart(info['ticker'], filename=f"{info['ticker']}_candlestick.png", period="5d")
+                    visualization_agent.candlestick_chart(info['ticker'], filename=f"{info['ticker']}_candlestick.png", period="5d",
+                                                         price_data=market_data)
                     if os.path.exists(candle_path):
                         visualization_paths.append(('Candlestick Chart', candle_path))
                 else:
@@ -490,12 +429,14 @@ if submit and user_input:
             # Store in chat history
             st.session_state.chat_history.append({
                 'query': user_input,
+                'resolved_via': resolved_via,
                 'insights': insights,
                 'visualization_paths': visualization_paths
             })
-        finally:
-            loop.close()
-        shimmer_placeholder.empty()
+            shimmer_placeholder.empty()
+    finally:
+        loop.run_until_complete(NEWS_CLIENT.close())
+        loop.close()
 
 # Display Chat History
 if st.session_state.chat_history:
@@ -503,6 +444,8 @@ if st.session_state.chat_history:
     # st.markdown("### Chat History")
     for entry in reversed(st.session_state.chat_history):  # Show newest first
         st.markdown(f'<div class="chat-query">Query: {entry["query"]}</div>', unsafe_allow_html=True)
+        if entry.get('resolved_via'):
+            st.caption(f"Resolved: {entry['resolved_via']}")
         st.markdown(format_cards(entry['insights']), unsafe_allow_html=True)
         for caption, path in entry['visualization_paths']:
             if os.path.exists(path):
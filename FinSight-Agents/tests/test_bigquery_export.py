@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import utils.yfinance_helper as yfinance_helper
+from utils.market_frame import to_long_frame
+from utils.ohlcv_store import OHLCVStore
+
+def fake_fetch(symbols, start, end, interval="1d"):
+    dates = pd.date_range(start, end, freq="B", inclusive="left", name="Date")
+    columns = pd.MultiIndex.from_product([["Close", "High", "Low", "Open", "Volume"], symbols],
+                                         names=["Price", "Ticker"])
+    return pd.DataFrame(10.0, index=dates, columns=columns)
+
+def test_format_for_bigquery_has_full_ohlcv():
+    frame = fake_fetch(["AAPL", "MSFT"], "2025-06-02", "2025-06-04")
+    frame.loc[:, ("Volume", "MSFT")] = np.nan
+    records = yfinance_helper.format_for_bigquery(to_long_frame(frame), ["MSFT"])
+    assert records == [
+        {"symbol": "MSFT", "date": "2025-06-02", "open": 10.0, "high": 10.0, "low": 10.0, "close": 10.0, "volume": None},
+        {"symbol": "MSFT", "date": "2025-06-03", "open": 10.0, "high": 10.0, "low": 10.0, "close": 10.0, "volume": None},
+    ]
+
+def test_export_writes_every_chunk(tmp_path, monkeypatch):
+    store = OHLCVStore(root=str(tmp_path / "store"), fetch=fake_fetch)
+    monkeypatch.setattr(yfinance_helper, "get_ohlcv_store", lambda: store)
+    symbols = ["AAPL", "MSFT", "TSLA", "NVDA", "AMZN"]
+
+    parquet_path = str(tmp_path / "history.parquet")
+    rows = yfinance_helper.export_market_data(symbols, parquet_path, "2025-01-01", "2025-03-01", chunk_size=2)
+    table = pq.read_table(parquet_path)
+    assert rows == table.num_rows == 5 * 43
+    assert table.column_names == yfinance_helper.BIGQUERY_COLUMNS
+    assert pq.ParquetFile(parquet_path).num_row_groups == 3
+
+    ndjson_path = str(tmp_path / "history.ndjson")
+    yfinance_helper.export_market_data(symbols, ndjson_path, "2025-01-01", "2025-03-01", chunk_size=2)
+    with open(ndjson_path) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == rows
+    assert lines[0] == {"symbol": "AAPL", "date": "2025-01-01", "open": 10.0, "high": 10.0,
+                        "low": 10.0, "close": 10.0, "volume": 10}
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+from utils.gemini_cache import GeminiCache
+
+def test_namespaces_are_isolated(tmp_path):
+    cache = GeminiCache(str(tmp_path / "cache.db"))
+    cache.set("k", "flash answer", namespace="gemini-2.0-flash")
+    assert cache.get("k", namespace="gemini-2.0-flash") == "flash answer"
+    assert cache.get("k", namespace="gemini-pro") is None
+
+def test_ttl_expires_entries(tmp_path):
+    cache = GeminiCache(str(tmp_path / "cache.db"))
+    cache.set("k", "v", ttl=0.05)
+    assert cache.get("k") == "v"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+def test_lru_limit_evicts_least_recently_used(tmp_path):
+    cache = GeminiCache(str(tmp_path / "cache.db"), max_entries=2, touch_interval=0)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    assert cache.get("a") == "1"  # refreshes "a"
+    time.sleep(0.01)
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+
+def test_import_legacy_json(tmp_path):
+    legacy = tmp_path / "gemini_cache.json"
+    legacy.write_text(json.dumps({"abc": "old response"}))
+    cache = GeminiCache(str(tmp_path / "cache.db"))
+    assert cache.import_json(str(legacy), namespace="gemini-2.0-flash") == 1
+    assert cache.get("abc", namespace="gemini-2.0-flash") == "old response"
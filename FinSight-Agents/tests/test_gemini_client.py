@@ -0,0 +1,187 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from google.api_core import exceptions as api_exceptions
+from utils.gemini_client import AsyncGeminiClient, ProcessSemaphore, TokenBucket
+
+def test_token_bucket_reserves_into_debt():
+    bucket = TokenBucket(per_minute=60)  # 1 token/second, burst of 60
+    assert bucket.reserve(60) == 0.0
+    wait = bucket.reserve(2)
+    assert 1.9 < wait <= 2.0
+
+def test_generate_retries_rate_limit_errors():
+    attempts = []
+
+    class FakeModel:
+        async def generate_content_async(self, prompt):
+            attempts.append(prompt)
+            if len(attempts) < 3:
+                raise api_exceptions.ResourceExhausted("quota")
+            return SimpleNamespace(text=" ok ", usage_metadata=None)
+
+    client = AsyncGeminiClient("test-model", api_key="x", base_delay=0.001)
+    client._configured = True
+    client._state_for_loop = lambda: (FakeModel(), asyncio.Semaphore(1))
+    assert asyncio.run(client.generate("hello")) == "ok"
+    assert len(attempts) == 3
+
+def test_backoff_releases_the_concurrency_slot():
+    calls = []
+
+    class FakeModel:
+        async def generate_content_async(self, prompt):
+            calls.append(prompt)
+            if calls == ["limited"]:
+                raise api_exceptions.ResourceExhausted("quota")
+            return SimpleNamespace(text=prompt, usage_metadata=None)
+
+    client = AsyncGeminiClient("test-model", api_key="x")
+    client._configured = True
+    client._retry_delay = lambda attempt: 0.05
+    semaphore = asyncio.Semaphore(1)
+    client._state_for_loop = lambda: (FakeModel(), semaphore)
+
+    async def run():
+        limited = asyncio.create_task(client.generate("limited"))
+        await asyncio.sleep(0)
+        return await asyncio.gather(limited, client.generate("other"))
+
+    assert asyncio.run(run()) == ["limited", "other"]
+    # "other" ran while "limited" was sleeping off its rate-limit error
+    assert calls == ["limited", "other", "limited"]
+
+def test_concurrency_limit_is_shared_across_event_loops():
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    class FakeModel:
+        async def generate_content_async(self, prompt):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return SimpleNamespace(text=prompt, usage_metadata=None)
+
+    client = AsyncGeminiClient("test-model", api_key="x", max_concurrency=2)
+    client._configured = True
+    client._state_for_loop = lambda: (FakeModel(), client._semaphore)
+
+    def session(n):
+        # Each Streamlit session runs on its own thread and event loop
+        async def run():
+            return await asyncio.gather(*(client.generate(f"{n}-{i}") for i in range(4)))
+        return asyncio.run(run())
+
+    with ThreadPoolExecutor(3) as pool:
+        results = list(pool.map(session, range(3)))
+    assert results[2] == ["2-0", "2-1", "2-2", "2-3"]
+    assert peak[0] == 2
+
+def test_cancelled_waiters_do_not_leak_slots():
+    semaphore = ProcessSemaphore(1)
+
+    async def cancel_waiting():
+        await semaphore.acquire()
+        waiting = asyncio.create_task(semaphore.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        semaphore.release()
+
+    async def cancel_after_hand_over():
+        await semaphore.acquire()
+        granted = asyncio.create_task(semaphore.acquire())
+        after = asyncio.create_task(semaphore.acquire())
+        await asyncio.sleep(0)
+        semaphore.release()  # hands the slot to `granted`...
+        granted.cancel()  # ...which is cancelled before it runs, so `after` gets it
+        await asyncio.gather(granted, return_exceptions=True)
+        await asyncio.wait_for(after, 1)
+        semaphore.release()
+
+    asyncio.run(cancel_waiting())
+    assert semaphore._value == 1
+    asyncio.run(cancel_after_hand_over())
+    assert semaphore._value == 1
+
+def test_each_event_loop_gets_its_own_async_client():
+    # _state_for_loop relies on google-generativeai internals pinned in requirements.txt
+    from google.ai import generativelanguage as glm
+
+    client = AsyncGeminiClient("test-model", api_key="test-key")
+    client._configure()
+
+    async def state_twice():
+        return client._state_for_loop(), client._state_for_loop()
+
+    (first, again), (second, _) = asyncio.run(state_twice()), asyncio.run(state_twice())
+    assert first is again
+    assert isinstance(first[0]._async_client, glm.GenerativeServiceAsyncClient)
+    assert first[0]._async_client is not second[0]._async_client
+    # The concurrency limit is process-wide, not per loop
+    assert first[1] is second[1]
+
+def test_identical_inflight_prompts_are_coalesced(monkeypatch):
+    import utils.gemini_helpers as helpers
+
+    calls = []
+
+    class FakeClient:
+        async def generate(self, prompt):
+            calls.append(prompt)
+            await asyncio.sleep(0.05)
+            return "shared answer"
+
+    monkeypatch.setattr(helpers, "get_gemini_client", lambda: FakeClient())
+    monkeypatch.setattr(helpers, "cache_gemini_insight", lambda prompt, response=None, ttl=None, key=None: response)
+    monkeypatch.setattr(helpers, "INFLIGHT", helpers.InflightRequests())
+
+    async def run():
+        return await asyncio.gather(*(helpers.get_gemini_insight_async("same prompt") for _ in range(5)))
+
+    assert asyncio.run(run()) == ["shared answer"] * 5
+    assert len(calls) == 1
+    assert helpers.INFLIGHT.stats() == {"issued": 1, "coalesced": 4, "in_flight": 0}
+
+def test_unparseable_replies_are_not_cached(monkeypatch):
+    import utils.gemini_helpers as helpers
+    from agents.insight_agent import parse_batch_insights
+
+    replies = ["Sorry, here are the insights: AAPL looks strong.", '{"AAPL": "Momentum is strong."}']
+    cache, in_flight_at_write = {}, []
+
+    class FakeClient:
+        async def generate(self, prompt):
+            return replies.pop(0)
+
+    def fake_cache(prompt, response=None, ttl=None, key=None):
+        if response is not None:
+            in_flight_at_write.append(helpers.INFLIGHT.stats()["in_flight"])
+            cache[prompt] = response
+        return cache.get(prompt)
+
+    monkeypatch.setattr(helpers, "get_gemini_client", lambda: FakeClient())
+    monkeypatch.setattr(helpers, "cache_gemini_insight", fake_cache)
+    monkeypatch.setattr(helpers, "INFLIGHT", helpers.InflightRequests())
+
+    def ask():
+        return asyncio.run(helpers.get_gemini_insight_async("batch prompt", parse=parse_batch_insights))
+
+    with pytest.raises(ValueError):
+        ask()
+    assert cache == {}
+    assert ask() == {"AAPL": "Momentum is strong."}
+    # The reply that parsed is cached and parsed again on the next hit
+    assert ask() == {"AAPL": "Momentum is strong."}
+    assert replies == []
+    # The request stays in flight until its reply is cached, so no caller slips in between
+    assert in_flight_at_write == [1]
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Cold-start budget for `import main`, in milliseconds (it took over 3 s with eager imports)
+IMPORT_BUDGET_MS = float(os.getenv("FINSIGHT_IMPORT_BUDGET_MS", "1500"))
+# Only loaded on the code path that needs them
+LAZY_MODULES = [
+    "matplotlib", "seaborn", "mplfinance", "yfinance", "nltk", "google.generativeai",
+    "google.cloud.bigquery", "aiohttp", "requests", "pyarrow.parquet",
+]
+
+def import_profile(module):
+    """{module: cumulative import time in microseconds} from `python -X importtime -c "import module"`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    profile = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative)
+    return profile
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    loaded = set(import_profile("main"))
+    assert [m for m in LAZY_MODULES if m in loaded] == []
+
+def test_main_import_time_within_budget():
+    # Best of three, so one slow run on a busy machine does not fail the test
+    ms = min(import_profile("main")["main"] for _ in range(3)) / 1000
+    assert ms < IMPORT_BUDGET_MS, f"import main took {ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+from utils.indicators import INDICATORS, IndicatorEngine, compute_indicators, latest_indicators, technical_signal
+
+def prices(tickers=3, days=120, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (tickers, days)), axis=1))
+    return close * 1.01, close * 0.99, close
+
+def test_matches_pandas_reference():
+    high, low, close = prices()
+    ind = compute_indicators(high, low, close)
+    s = pd.Series(close[1])
+    np.testing.assert_allclose(ind["sma_50"][1], s.rolling(50).mean(), equal_nan=True)
+    np.testing.assert_allclose(ind["ema_26"][1][25:], s.ewm(span=26, adjust=False).mean()[25:])
+    np.testing.assert_allclose(ind["bb_upper"][1], s.rolling(20).mean() + 2 * s.rolling(20).std(ddof=0),
+                               equal_nan=True)
+    delta = s.diff().fillna(0)
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    np.testing.assert_allclose(ind["rsi_14"][1][14:], (100 - 100 / (1 + gain / loss))[14:])
+    returns = np.log(s).diff()
+    np.testing.assert_allclose(ind["volatility_20"][1], returns.rolling(20).std() * np.sqrt(252), equal_nan=True)
+
+def test_incremental_update_matches_full_recompute():
+    high, low, close = prices(days=80)
+    for start in (10, 40, 70):
+        engine = IndicatorEngine("ABC", high[:, :start], low[:, :start], close[:, :start])
+        for t in range(start, 80):
+            engine.update(high[:, t], low[:, t], close[:, t])
+        full = compute_indicators(high, low, close)
+        for name in INDICATORS:
+            np.testing.assert_allclose(engine.values[name], full[name][:, -1], err_msg=name)
+
+def test_latest_indicators_from_long_frame_and_signal():
+    days = pd.bdate_range("2025-01-01", periods=60)
+    rising = np.linspace(100, 160, 60)
+    market_data = pd.DataFrame({
+        "ticker": ["UP"] * 60, "date": days, "open": rising, "high": rising + 1, "low": rising - 1,
+        "close": rising, "volume": 1e6,
+    })
+    latest = latest_indicators(market_data)
+    assert list(latest.index) == ["UP"]
+    values = latest.loc["UP"].to_dict()
+    assert values["rsi_14"] == 100.0
+    assert technical_signal({**values, "close": 160.0}) == "Overbought"
+    assert technical_signal({"rsi_14": np.nan}) is None
+
+def test_short_history_warms_up_on_its_own_bars():
+    high, low, close = prices(tickers=2, days=80)
+    days = pd.bdate_range("2025-01-01", periods=80)
+    rows = [pd.DataFrame({"ticker": "LONG", "date": days, "open": close[0], "high": high[0],
+                          "low": low[0], "close": close[0], "volume": 1e6}),
+            pd.DataFrame({"ticker": "SHORT", "date": days[-30:], "open": close[1, -30:], "high": high[1, -30:],
+                          "low": low[1, -30:], "close": close[1, -30:], "volume": 1e6})]
+    together = latest_indicators(pd.concat(rows)).loc["SHORT"]
+    alone = latest_indicators(rows[1]).loc["SHORT"]
+
+    # 30 bars: past the EMA-26 and RSI warm-ups, not the SMA-50 or MACD signal (34)
+    assert np.isnan(together["sma_50"]) and np.isnan(together["macd_signal"])
+    assert not np.isnan(together["ema_26"]) and not np.isnan(together["rsi_14"])
+    np.testing.assert_allclose(together[INDICATORS].to_numpy(float), alone[INDICATORS].to_numpy(float))
+
+    padded = np.full((3, 80), np.nan)
+    padded[:, -30:] = high[1, -30:], low[1, -30:], close[1, -30:]
+    full, short = compute_indicators(*padded), compute_indicators(high[1, -30:], low[1, -30:], close[1, -30:])
+    for name in INDICATORS:
+        np.testing.assert_allclose(full[name][0, -30:], short[name][0], err_msg=name)
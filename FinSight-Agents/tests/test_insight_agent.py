@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import json
+import pandas as pd
+import agents.insight_agent as insight_module
+from agents.insight_agent import InsightAgent, parse_batch_insights
+from utils.insight_cache_keys import CanonicalKeyConfig
+
+def _market_rows(tickers, close=110.0):
+    return pd.DataFrame({
+        "ticker": tickers,
+        "date": pd.Timestamp("2025-06-02"),
+        "open": 100.0, "high": 111.0, "low": 99.0, "close": close,
+        "volume": 1_000_000.0,
+    })
+
+def _install_fakes(monkeypatch, responder):
+    cache, calls = {}, []
+
+    def fake_cache(prompt, response=None, ttl=None, key=None):
+        key = key or prompt
+        if response is not None:
+            cache[key] = response
+        return cache.get(key)
+
+    async def fake_llm(prompt, cache_key=None, ttl=None, parse=None):
+        if (cache_key or prompt) in cache:
+            cached = cache[cache_key or prompt]
+            return parse(cached) if parse else cached
+        calls.append(prompt)
+        reply = responder(prompt)
+        parsed = parse(reply) if parse else reply
+        fake_cache(prompt, reply, key=cache_key)
+        return parsed
+
+    monkeypatch.setattr(insight_module, "cache_gemini_insight", fake_cache)
+    monkeypatch.setattr(insight_module, "get_gemini_insight_async", fake_llm)
+    return cache, calls
+
+def test_parse_batch_insights_strips_code_fences():
+    text = '```json\n{"aapl": "Buy the dip.", "TCS.NS": "Hold."}\n```'
+    assert parse_batch_insights(text) == {"AAPL": "Buy the dip.", "TCS.NS": "Hold."}
+
+def test_batched_mode_packs_tickers_and_fills_per_ticker_cache(monkeypatch):
+    tickers = ["AAPL", "MSFT", "TSLA"]
+    cache, calls = _install_fakes(
+        monkeypatch, lambda prompt: json.dumps({t: f"insight {t}" for t in tickers})
+    )
+    agent = InsightAgent(None, None, batch_size=3)
+    task = {"parameters": {"market_data": _market_rows(tickers), "sentiment": {}}}
+    result = asyncio.run(agent.execute(task))
+
+    assert len(calls) == 1
+    assert [m["llm_insight"] for m in result.data] == [f"insight {t}" for t in tickers]
+    # Single-ticker prompts are cached, so a second (unbatched) run makes no calls
+    calls.clear()
+    asyncio.run(InsightAgent(None, None).execute(task))
+    assert calls == []
+
+def test_failed_chunk_falls_back_to_per_ticker_calls(monkeypatch):
+    def responder(prompt):
+        if "JSON object" in prompt:
+            return "not json"
+        return "single"
+    _, calls = _install_fakes(monkeypatch, responder)
+    agent = InsightAgent(None, None, batch_size=2)
+    task = {"parameters": {"market_data": _market_rows(["AAPL", "MSFT"]), "sentiment": {}}}
+    result = asyncio.run(agent.execute(task))
+
+    assert len(calls) == 3
+    assert all(m["llm_insight"] == "single" for m in result.data)
+
+def test_canonical_keys_hit_across_small_price_moves(monkeypatch):
+    _, calls = _install_fakes(monkeypatch, lambda prompt: "insight")
+    agent = InsightAgent(None, None, canonical_keys=CanonicalKeyConfig(price_bucket_pct=1.0))
+    for close in (110.0, 110.2, 110.4):
+        rows = _market_rows(["AAPL"], close=close)
+        asyncio.run(agent.execute({"parameters": {"market_data": rows, "sentiment": {}}}))
+
+    assert len(calls) == 1
+    report = agent.cache_key_stats.report()
+    assert report["canonical_hits"] == 2
+    assert report["exact_hits"] == 0
+    assert report["hit_rate_improvement"] > 0
+
+def test_indicators_reach_prompt_and_temper_recommendation(monkeypatch):
+    _, calls = _install_fakes(monkeypatch, lambda prompt: "insight")
+    rising = [100.0 + i for i in range(60)]
+    market_data = pd.DataFrame({
+        "ticker": "AAPL", "date": pd.bdate_range("2025-01-01", periods=60),
+        "open": [c - 0.5 for c in rising], "high": [c + 1 for c in rising], "low": [c - 1 for c in rising],
+        "close": rising, "volume": 1e6,
+    })
+    sentiment = {"Apple": [{"headline": "Record iPhone sales", "sentiment": "Positive"}]}
+    result = asyncio.run(InsightAgent(None, None).execute(
+        {"parameters": {"market_data": market_data, "sentiment": sentiment}}))
+
+    meta = result.data[0]
+    assert meta["technical_signal"] == "Overbought"
+    assert meta["recommendation"] == "Hold"  # positive uptrend, but not chased while overbought
+    assert meta["indicators"]["sma_50"] is not None
+    assert "RSI(14): 100.0" in calls[0]
+
+def test_duplicate_counts_can_weight_sentiment(monkeypatch):
+    _install_fakes(monkeypatch, lambda prompt: "insight")
+    sentiment = {"Apple": [
+        {"headline": "Apple shares rise on iPhone beat", "sentiment": "Positive", "duplicates": 1},
+        {"headline": "Apple faces EU fine", "sentiment": "Negative", "duplicates": 4},
+        {"headline": "Apple to hold event", "sentiment": "Neutral", "duplicates": 1},
+    ]}
+    task = {"parameters": {"market_data": _market_rows(["AAPL"]), "sentiment": sentiment}}
+    assert asyncio.run(InsightAgent(None, None).execute(task)).data[0]["overall_sentiment"] == "Neutral"
+    weighted = asyncio.run(InsightAgent(None, None, weight_duplicates=True).execute(task)).data[0]
+    assert weighted["overall_sentiment"] == "Negative"
@@ -0,0 +1,126 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import utils.yfinance_helper as yfinance_helper
+from agents.market_data_agent import MarketDataAgent
+from utils.market_frame import latest_bars, market_tickers, to_long_frame
+from utils.screener import screen
+
+def fake_frame(symbols, days=1, missing=()):
+    dates = pd.date_range("2025-06-02", periods=days, freq="B", name="Date")
+    columns = pd.MultiIndex.from_product([["Close", "High", "Low", "Open", "Volume"], symbols],
+                                         names=["Price", "Ticker"])
+    frame = pd.DataFrame(100.0, index=dates, columns=columns)
+    for symbol in missing:
+        frame.loc[:, [c for c in columns if c[1] == symbol]] = np.nan
+    return frame
+
+def test_downloads_chunks_off_the_loop_and_reports_per_symbol_errors(monkeypatch):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow_download(symbols, period="1d", interval="1d"):
+        assert threading.current_thread() is not threading.main_thread()
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        if "BAD1" in symbols:
+            raise RuntimeError("boom")
+        return fake_frame(symbols, missing=[s for s in symbols if s == "EMPTY"])
+
+    monkeypatch.setattr(yfinance_helper, "download_stock_frame", slow_download)
+    agent = MarketDataAgent(chunk_size=2, max_concurrency=2)
+    symbols = ["AAPL", "MSFT", "TSLA", "EMPTY", "BAD1", "BAD2"]
+
+    async def run():
+        ticks = 0
+        task = asyncio.create_task(agent.execute({"task_type": "fetch_specific_stocks",
+                                                  "parameters": {"symbols": symbols}}))
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(0.005)
+        return await task, ticks
+
+    result, ticks = asyncio.run(run())
+    assert ticks > 5  # the loop kept running while downloads were in flight
+    assert peak[0] == 2
+    assert result.success
+    assert set(result.metadata["errors"]) == {"EMPTY", "BAD1", "BAD2"}
+    assert set(result.data["ticker"]) == {"AAPL", "MSFT", "TSLA"}
+
+def test_long_frame_has_one_row_per_ticker_and_day():
+    frame = fake_frame(["AAPL", "MSFT"], days=3)
+    frame[("Close", "MSFT")] = [1.0, 2.0, 3.0]
+    long = to_long_frame(frame)
+    assert list(long.columns) == ["ticker", "date", "open", "high", "low", "close", "volume"]
+    assert len(long) == 6
+    assert market_tickers(long) == ["AAPL", "MSFT"]
+    latest = latest_bars(long)
+    assert latest.loc["MSFT", "close"] == 3.0
+    assert latest.loc["MSFT", "date"] == pd.Timestamp("2025-06-04")
+
+def test_screen_universe_ranks_within_latency_budget(monkeypatch):
+    moves = {"AAPL": 1.0, "MSFT": -6.0, "TSLA": 3.0, "NVDA": 0.5, "SLOW": 9.0}
+
+    def download(symbols, period="1d", interval="1d"):
+        if "SLOW" in symbols:
+            time.sleep(1.0)
+        frame = fake_frame(symbols, days=2)
+        for symbol in symbols:
+            frame.loc[frame.index[-1], ("Close", symbol)] = 100.0 * (1 + moves[symbol] / 100)
+        return frame
+
+    monkeypatch.setattr(yfinance_helper, "download_stock_frame", download)
+    agent = MarketDataAgent(chunk_size=2, max_concurrency=3)
+    result = asyncio.run(agent.execute({"task_type": "screen_universe", "parameters": {
+        "symbols": ["AAPL", "MSFT", "TSLA", "NVDA", "SLOW"], "criteria": "pct_move",
+        "top_n": 2, "latency_budget": 0.3,
+    }}))
+
+    assert result.success
+    assert list(result.data["ticker"]) == ["MSFT", "TSLA"]
+    assert result.metadata["within_budget"] is False
+    assert set(result.metadata["errors"]) == {"SLOW"}
+    assert result.metadata["elapsed"] < 0.9
+    statuses = {t["chunk"]: t["status"] for t in result.metadata["chunk_timings"]}
+    assert statuses == {0: "ok", 1: "ok", 2: "timeout"}
+
+def test_screen_combines_criteria_by_percentile_rank():
+    frame = fake_frame(["A", "B", "C"], days=21)
+    frame.loc[frame.index[-1], ("Volume", "A")] = 500.0   # 5x volume spike, no price move
+    frame.loc[frame.index[-1], ("Close", "B")] = 104.0    # 4% move, normal volume
+    frame.loc[frame.index[-1], ("Close", "C")] = 105.0    # leads on both
+    frame.loc[frame.index[-1], ("Volume", "C")] = 600.0
+    ranked = screen(to_long_frame(frame), {"pct_move": 1.0, "volume_spike": 1.0}, top_n=2)
+    assert list(ranked.index) == ["C", "A"]
+    assert list(ranked["score"]) == [1.0, 0.25]
+    assert ranked.loc["A", "volume_spike"] == 5.0
+
+def test_screen_uses_each_tickers_own_sessions():
+    # NSE has already traded today (IST) while the US session has not opened yet
+    us = pd.bdate_range("2025-06-02", "2025-06-27", name="Date")
+    nse = pd.bdate_range("2025-06-02", "2025-06-30", name="Date")
+    rows = []
+    for ticker, dates, last_close, last_volume in (("AAPL", us, 108.0, 300.0), ("TCS.NS", nse, 101.0, 100.0)):
+        for i, date in enumerate(dates):
+            last = i == len(dates) - 1
+            rows.append({"ticker": ticker, "date": date, "open": 100.0, "high": 110.0, "low": 99.0,
+                         "close": last_close if last else 100.0, "volume": last_volume if last else 100.0})
+    data = pd.DataFrame(rows)
+
+    moves = screen(data, "pct_move", top_n=2)
+    assert list(moves.index) == ["AAPL", "TCS.NS"]
+    assert moves.loc["AAPL", "pct_move"] == pytest.approx(8.0)
+    assert moves.loc["AAPL", "close"] == 108.0
+    spikes = screen(data, "volume_spike", top_n=2)
+    assert spikes.loc["AAPL", "volume_spike"] == 3.0
+    assert spikes.loc["TCS.NS", "volume_spike"] == 1.0
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+from agents.sentiment_agent import SentimentAgent
+from utils.near_duplicates import collapse_near_duplicates, hamming, near_duplicate_clusters, simhash
+
+STORIES = [
+    ("Apple shares rise after strong iPhone sales beat Wall Street expectations",
+     "Apple Inc shares rose on Thursday after iPhone sales in the holiday quarter beat analyst estimates."),
+    ("Tesla deliveries fall short as price cuts fail to lift demand",
+     "Tesla delivered fewer vehicles than expected in the third quarter despite aggressive price cuts."),
+    ("Apple shares climb after strong iPhone sales beat Wall Street expectations",
+     "Apple Inc shares rose on Thursday after iPhone sales in the holiday quarter beat analysts' estimates."),
+    ("Apple shares fall as iPhone sales miss Wall Street expectations",
+     "Apple Inc shares dropped on Thursday after iPhone sales in the holiday quarter missed analyst estimates."),
+    ("Apple stock rises as iPhone sales beat expectations - Reuters",
+     "Apple Inc shares rose on Thursday after iPhone sales in the holiday quarter beat analyst estimates."),
+]
+
+def articles():
+    return [{"title": title, "description": description} for title, description in STORIES]
+
+def test_simhash_is_stable_and_close_for_reworded_copies():
+    assert simhash("Apple shares rise") == simhash("APPLE, shares rise!")
+    assert hamming(simhash(" ".join(STORIES[0])), simhash(" ".join(STORIES[2]))) <= 9
+    assert hamming(simhash(" ".join(STORIES[0])), simhash(" ".join(STORIES[1]))) > 20
+
+def test_collapse_keeps_first_of_each_story_with_counts():
+    collapsed = collapse_near_duplicates(articles(), threshold=0.85)
+    assert [(a["title"], a["duplicates"]) for a in collapsed] == [
+        (STORIES[0][0], 3), (STORIES[1][0], 1), (STORIES[3][0], 1)]
+    # Exact-match threshold only joins identical texts
+    assert near_duplicate_clusters(["a b c", "a b c", "a b d"], threshold=1.0) == [0, 0, 2]
+
+def test_sentiment_agent_scores_each_story_once():
+    class Fetcher:
+        def get_news(self, query, num_articles):
+            return articles()
+
+    class Analyzer:
+        calls = 0
+
+        def polarity_scores(self, text):
+            Analyzer.calls += 1
+            return {"compound": 0.5}
+
+    result = asyncio.run(SentimentAgent(Fetcher(), Analyzer()).execute({"parameters": {"symbols": ["AAPL"]}}))
+    assert [a["duplicates"] for a in result.data["Apple"]] == [3, 1, 1]
+    assert Analyzer.calls == 3
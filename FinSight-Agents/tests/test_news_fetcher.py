@@ -0,0 +1,120 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+from aiohttp import web
+import utils.news_fetcher as news_fetcher
+from agents.sentiment_agent import SentimentAgent
+from utils.news_fetcher import AsyncNewsClient
+from utils.news_router import ArticleRouter, combined_groups, combined_query
+from utils.sentiment_scoring import VaderBatchScorer
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get("/v2/everything", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v2/everything"
+
+def test_fetch_many_is_concurrent_pooled_and_times_out(monkeypatch):
+    monkeypatch.setenv("NEWSAPI_KEY", "test")
+    peers = set()
+
+    async def handler(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        query = request.query["q"].split(" ")[0]
+        await asyncio.sleep(2 if query == "Slow" else 0.2)
+        return web.json_response({"articles": [{"title": f"{query} stock rises", "description": ""}]})
+
+    async def run():
+        runner, url = await serve(handler)
+        monkeypatch.setattr(news_fetcher, "NEWSAPI_URL", url)
+        client = AsyncNewsClient(max_concurrency=4, timeout=1)
+        try:
+            started = time.perf_counter()
+            first = [item async for item in client.fetch_many(["A", "B", "C", "D"], 5)]
+            elapsed = time.perf_counter() - started
+            second = [item async for item in client.fetch_many(["E", "F", "G", "H", "Slow"], 5)]
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return first, elapsed, second
+
+    first, elapsed, second = asyncio.run(run())
+    assert sorted(q for q, _, _ in first) == ["A", "B", "C", "D"]
+    assert all(articles == [{"title": f"{q} stock rises", "content": None, "description": "",
+                             "url": None, "published_at": None, "source": None}] for q, articles, _ in first)
+    assert elapsed < 0.6  # close to one request, not four
+    # Keep-alive: the second batch reuses the first batch's connections (nine without it)
+    assert len(peers) <= 5
+    slow = [item for item in second if item[0] == "Slow"][0]
+    assert slow[1] == [] and isinstance(slow[2], asyncio.TimeoutError)
+    assert second[-1][0] == "Slow"
+
+class SlowFetcher:
+    def get_news(self, query, num_articles):
+        if query == "Tesla":
+            raise RuntimeError("boom")
+        time.sleep(0.2)
+        return [{"title": f"{query} shares surge to record gains", "description": ""}]
+
+def test_sentiment_agent_fans_out_and_keeps_symbol_order():
+    agent = SentimentAgent(SlowFetcher(), VaderBatchScorer())
+    started = time.perf_counter()
+    result = asyncio.run(agent.execute({"parameters": {"symbols": ["AAPL", "TSLA", "MSFT", "AAPL"]}}))
+    assert time.perf_counter() - started < 0.35
+    assert list(result.data) == ["Apple", "Tesla", "Microsoft"]
+    assert result.data["Tesla"] == []
+    assert result.data["Apple"][0]["sentiment"] == "Positive"
+
+def test_combined_groups_fit_query_and_page_limits():
+    companies = [f"Company Number {i}" for i in range(40)]
+    groups = combined_groups(companies, per_company=20)
+    assert [c for group in groups for c in group] == companies
+    assert all(len(group) <= 5 for group in groups)
+    groups = combined_groups(companies, per_company=1)
+    assert all(len(combined_query(group)) <= 500 for group in groups) and len(groups) > 1
+    assert combined_query(["Apple", "HDFC Bank"]) == '(Apple OR "HDFC Bank") AND (stock OR share OR market)'
+
+def test_router_matches_names_and_aliases():
+    router = ArticleRouter(["Reliance Industries", "Apple", "Tesla"])
+    assert router.companies_for({"title": "Reliance shares climb", "description": None}) == ["Reliance Industries"]
+    assert router.companies_for({"title": "APPLE and Tesla stock slide", "description": ""}) == ["Apple", "Tesla"]
+    assert router.companies_for({"title": "Pineapple market booms", "description": ""}) == []
+
+def test_router_matches_names_with_punctuation():
+    router = ArticleRouter(["Larsen & Toubro Ltd.", "M&M"])
+    assert router.companies_for({"title": "Larsen & Toubro Ltd. wins metro order", "description": ""}) == ["Larsen & Toubro Ltd."]
+    assert router.companies_for({"title": "Shares of M&M rise", "description": "(M&M) beats estimates"}) == ["M&M"]
+    assert router.companies_for({"title": "SAM&MAX stock rally", "description": ""}) == []
+
+def test_combined_fetch_routes_and_falls_back_for_thin_coverage(monkeypatch):
+    requests_made = []
+
+    async def fake_get(self, params):
+        requests_made.append(params["q"])
+        if " AND " in params["q"]:
+            return ([{"title": f"Apple stock note {i}", "description": ""} for i in range(3)]
+                    + [{"title": f"Microsoft share note {i}", "description": ""} for i in range(3)]
+                    + [{"title": "Tesla market note", "description": ""}])
+        return [{"title": f"Tesla stock story {i}", "description": ""} for i in range(3)]
+
+    monkeypatch.setattr(AsyncNewsClient, "_get", fake_get)
+    monkeypatch.setattr(news_fetcher, "_api_key", lambda: "test")
+
+    async def run():
+        client = AsyncNewsClient()
+        return {company: (articles, error)
+                async for company, articles, error in client.fetch_many_combined(["Apple", "Microsoft", "Tesla"], 3)}
+
+    results = asyncio.run(run())
+    assert requests_made == ["(Apple OR Microsoft OR Tesla) AND (stock OR share OR market)",
+                             "Tesla stock OR Tesla share OR Tesla market"]
+    assert [a["title"] for a in results["Apple"][0]] == [f"Apple stock note {i}" for i in range(3)]
+    assert len(results["Microsoft"][0]) == 3
+    assert [a["title"] for a in results["Tesla"][0]] == [f"Tesla stock story {i}" for i in range(3)]
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import utils.news_fetcher as news_fetcher
+from agents.sentiment_agent import SentimentAgent
+from utils.news_fetcher import AsyncNewsClient, NewsFetcherAdapter, fetch_and_process_news
+from utils.news_store import NewsStore, article_id
+
+def article(n, day, url=None):
+    return {"title": f"Apple stock story {n}", "content": None, "description": "", "source": "Reuters",
+            "url": url or f"https://example.com/apple/{n}", "published_at": f"2025-01-{day:02d}T10:00:00Z"}
+
+def test_store_dedupes_by_url_and_tracks_newest(tmp_path):
+    store = NewsStore(str(tmp_path / "news.db"), ttl=60)
+    assert store.state("Apple") == (None, None)
+    assert store.add("Apple", [article(1, 1), article(2, 3)], now=1000) == 2
+    # Same story under another query and with a tracking query string
+    assert store.add("Tim Cook", [article(2, 3, url="https://EXAMPLE.com/apple/2?utm_source=x")], now=1000) == 0
+    assert article_id(article(2, 3)) == article_id({"url": "https://example.com/apple/2/#top"})
+    assert store.state("Apple") == (1000, "2025-01-03T10:00:00Z")
+    assert store.is_fresh("Apple", now=1059) and not store.is_fresh("Apple", now=1061)
+    assert [a["title"] for a in store.articles("Apple", 5)] == ["Apple stock story 2", "Apple stock story 1"]
+    assert len(store.articles("Tim Cook")) == 1
+
+    store.set_scores({article_id(article(1, 1)): 0.5})
+    assert [a["sentiment_score"] for a in store.articles("Apple")] == [None, 0.5]
+
+def test_query_parameters_that_pick_the_story_are_kept(tmp_path):
+    store = NewsStore(str(tmp_path / "news.db"))
+    first = article(1, 1, url="https://news.example.com/article.php?id=123")
+    second = article(2, 2, url="https://news.example.com/article.php?id=124")
+    assert article_id(first) != article_id(second)
+    assert article_id(first) == article_id(
+        {"url": "https://news.example.com/article.php?utm_medium=rss&fbclid=abc&id=123#comments"})
+    assert article_id({"url": "https://x.example.com/a?page=2&id=9"}) == article_id({"url": "https://x.example.com/a?id=9&page=2"})
+    assert store.add("Apple", [first, second]) == 2
+    store.set_scores({article_id(first): 0.5, article_id(second): -0.5})
+    assert [a["sentiment_score"] for a in store.articles("Apple")] == [-0.5, 0.5]
+
+def test_refresh_asks_only_for_newer_articles(tmp_path, monkeypatch):
+    store = NewsStore(str(tmp_path / "news.db"), ttl=60)
+    calls = []
+    batches = [[article(1, 1), article(2, 2)], [article(2, 2), article(3, 4)]]
+
+    def fake_live(query, num_articles, since=None):
+        calls.append(since)
+        return batches[len(calls) - 1]
+
+    monkeypatch.setattr(news_fetcher, "_fetch_news_live", fake_live)
+    assert len(fetch_and_process_news("Apple", 5, store=store)) == 2
+    assert len(fetch_and_process_news("Apple", 5, store=store)) == 2
+    assert calls == [None]  # second call served from the store
+
+    store.ttl = 0
+    titles = [a["title"] for a in fetch_and_process_news("Apple", 5, store=store)]
+    assert calls == [None, "2025-01-02T10:00:00Z"]
+    assert titles == ["Apple stock story 3", "Apple stock story 2", "Apple stock story 1"]
+
+class CountingAnalyzer:
+    def __init__(self):
+        self.calls = 0
+
+    def polarity_scores(self, text):
+        self.calls += 1
+        return {"compound": 0.6}
+
+def test_articles_are_scored_once(tmp_path, monkeypatch):
+    async def fake_get(self, params):
+        return [{"title": "Apple stock gains", "description": "", "url": "https://example.com/a"}]
+
+    monkeypatch.setattr(AsyncNewsClient, "_get", fake_get)
+    monkeypatch.setattr(news_fetcher, "_api_key", lambda: "test")
+    store = NewsStore(str(tmp_path / "news.db"), ttl=0)
+    analyzer = CountingAnalyzer()
+    agent = SentimentAgent(NewsFetcherAdapter(AsyncNewsClient(store=store)), analyzer)
+    for _ in range(2):
+        result = asyncio.run(agent.execute({"parameters": {"symbols": ["AAPL"]}}))
+        assert result.data["Apple"] == [{"headline": "Apple stock gains", "sentiment": "Positive", "score": 0.6,
+                                           "duplicates": 1}]
+    assert analyzer.calls == 1
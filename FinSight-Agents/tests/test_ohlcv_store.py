@@ -0,0 +1,84 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+from utils.ohlcv_store import OHLCVStore, missing_ranges
+
+def fake_fetch(calls):
+    def fetch(symbols, start, end, interval="1d"):
+        calls.append((tuple(symbols), start, end))
+        dates = pd.date_range(start, end, freq="B", inclusive="left", name="Date")
+        columns = pd.MultiIndex.from_product([["Close", "High", "Low", "Open", "Volume"], symbols],
+                                             names=["Price", "Ticker"])
+        return pd.DataFrame(100.0, index=dates, columns=columns)
+    return fetch
+
+def test_missing_ranges():
+    day = pd.Timestamp
+    covered = [(day("2025-01-05"), day("2025-01-10")), (day("2025-01-08"), day("2025-01-12"))]
+    assert missing_ranges(covered, day("2025-01-01"), day("2025-01-15")) == [
+        (day("2025-01-01"), day("2025-01-05")), (day("2025-01-12"), day("2025-01-15"))]
+    assert missing_ranges(covered, day("2025-01-06"), day("2025-01-11")) == []
+
+def test_only_missing_ranges_are_fetched(tmp_path):
+    calls = []
+    store = OHLCVStore(root=str(tmp_path), fetch=fake_fetch(calls))
+
+    frame = store.get_history(["AAPL", "MSFT"], "2025-03-03", "2025-03-10")
+    assert calls == [(("AAPL", "MSFT"), "2025-03-03", "2025-03-10")]
+    assert len(frame) == 5 and ("Close", "MSFT") in frame.columns
+
+    # Fully covered: served from disk by a fresh store instance
+    calls.clear()
+    store = OHLCVStore(root=str(tmp_path), fetch=fake_fetch(calls))
+    assert len(store.get_history(["AAPL"], "2025-03-04", "2025-03-07")) == 3
+    assert calls == []
+
+    # Extending the window only downloads the new tail; a new ticker gets the whole range
+    frame = store.get_history(["AAPL", "NVDA"], "2025-03-03", "2025-03-14")
+    assert calls == [(("AAPL",), "2025-03-10", "2025-03-14"), (("NVDA",), "2025-03-03", "2025-03-14")]
+    assert len(frame) == 9
+
+def test_today_is_never_marked_covered(tmp_path):
+    calls = []
+    store = OHLCVStore(root=str(tmp_path), fetch=fake_fetch(calls))
+    today = pd.Timestamp.now().normalize()
+    start, end = today - pd.Timedelta(days=10), today + pd.Timedelta(days=1)
+
+    store.get_history(["AAPL"], start, end)
+    store.get_history(["AAPL"], start, end)
+    assert len(calls) == 2
+    assert calls[1][1] == today.date().isoformat()
+
+def test_ticker_without_bars_does_not_fail_the_batch(tmp_path):
+    calls = []
+    fetch_all = fake_fetch(calls)
+
+    def fetch(symbols, start, end, interval="1d"):
+        # yfinance leaves an all-NaN column for a delisted symbol
+        frame = fetch_all(symbols, start, end, interval)
+        frame.loc[:, frame.columns.get_level_values(1) == "BAJAJAUTO.NS"] = float("nan")
+        return frame
+
+    store = OHLCVStore(root=str(tmp_path), fetch=fetch)
+    frame = store.get_history(["AAPL", "BAJAJAUTO.NS"], "2025-03-03", "2025-03-10")
+    assert len(frame) == 5 and ("Close", "BAJAJAUTO.NS") not in frame.columns
+
+    # The empty ticker's gap is not marked covered, so it is asked for again
+    calls.clear()
+    store.get_history(["AAPL", "BAJAJAUTO.NS"], "2025-03-03", "2025-03-10")
+    assert calls == [(("BAJAJAUTO.NS",), "2025-03-03", "2025-03-10")]
+
+def test_intraday_period_keeps_whole_sessions(tmp_path):
+    def fetch(symbols, start, end, interval="1d"):
+        days = pd.bdate_range(start, end, inclusive="left")
+        dates = pd.DatetimeIndex([d + pd.Timedelta(hours=h) for d in days for h in (10, 11, 12)], name="Date")
+        columns = pd.MultiIndex.from_product([["Close", "High", "Low", "Open", "Volume"], symbols],
+                                             names=["Price", "Ticker"])
+        return pd.DataFrame(100.0, index=dates, columns=columns)
+
+    store = OHLCVStore(root=str(tmp_path), fetch=fetch)
+    frame = store.get_period(["AAPL"], period="2d", interval="1h")
+    assert len(frame) == 6
+    assert frame.index.normalize().nunique() == 2
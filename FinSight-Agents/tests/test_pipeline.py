@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from core.agent_base import AgentResult
+from core.pipeline import AgentTask, resolve_dependencies, resolve_reference, run_workflow, stock_query_workflow
+
+def market_frame():
+    return pd.DataFrame({"ticker": ["AAPL", "AAPL", "MSFT"], "close": [190.0, 191.5, 410.0]})
+
+def test_results_are_passed_as_views_not_copies():
+    frame = market_frame()
+    sentiment = {"Apple": [{"headline": "Apple shares rally", "sentiment": "Positive"}]}
+    results = {"MarketDataAgent": AgentResult(True, frame), "SentimentAgent": AgentResult(True, sentiment)}
+
+    resolved = resolve_dependencies(stock_query_workflow(["AAPL"])[2], results)["parameters"]
+    assert np.shares_memory(resolved["market_data"]["close"].to_numpy(), frame["close"].to_numpy())
+    assert resolved["sentiment"]["Apple"][0]["headline"] is sentiment["Apple"][0]["headline"]
+    with pytest.raises(TypeError):
+        resolved["sentiment"]["Tesla"] = []
+
+def test_writes_through_resolved_values_do_not_reach_the_producer():
+    frame = market_frame()
+    sentiment = {"Apple": [{"headline": "Apple shares rally", "sentiment": "Positive"}]}
+    results = {"MarketDataAgent": AgentResult(True, frame), "SentimentAgent": AgentResult(True, sentiment)}
+
+    resolved = resolve_dependencies(stock_query_workflow(["AAPL"])[2], results)["parameters"]
+    resolved["market_data"].loc[0, "close"] = -1.0
+    resolved["market_data"].iloc[1, 1] = -1.0
+    with pytest.raises(TypeError):
+        resolved["sentiment"]["Apple"][0]["sentiment"] = "Negative"
+    with pytest.raises(AttributeError):
+        resolved["sentiment"]["Apple"].append({"headline": "Apple shares slide"})
+
+    pd.testing.assert_frame_equal(frame, market_frame())
+    assert results["MarketDataAgent"].data is frame
+    assert sentiment == {"Apple": [{"headline": "Apple shares rally", "sentiment": "Positive"}]}
+
+def test_dotted_paths():
+    results = {
+        "SentimentAgent": AgentResult(True, {"Apple": [{"headline": "Apple shares rally"}]}),
+        "MarketDataAgent": AgentResult(True, market_frame(), metadata={"errors": {"XYZ": "No data returned"}}),
+    }
+    assert resolve_reference("{{SentimentAgent.result.Apple.0.headline}}", results) == "Apple shares rally"
+    assert resolve_reference("{{MarketDataAgent.metadata.errors.XYZ}}", results) == "No data returned"
+    assert list(resolve_reference("{{MarketDataAgent.result.ticker}}", results)) == ["AAPL", "AAPL", "MSFT"]
+    assert resolve_reference("{{SentimentAgent.result.Tesla.0}}", results) is None
+    assert resolve_reference("{{Missing.result}}", results) is None
+
+def test_run_workflow_resolves_references_between_steps():
+    seen = []
+
+    async def run_task(task: AgentTask):
+        seen.append((task.step_id, task.parameters))
+        if task.step_id == "prices":
+            return AgentResult(True, {"AAPL": {"close": 190.0}})
+        return AgentResult(True, task.parameters["close"] * 2)
+
+    workflow = [
+        {"id": "prices", "agent_name": "MarketDataAgent", "task_type": "fetch", "parameters": {}},
+        {"id": "double", "agent_name": "Calc", "task_type": "double",
+         "parameters": {"close": "{{prices.result.AAPL.close}}"}},
+    ]
+    results = asyncio.run(run_workflow(workflow, run_task))
+    assert results["double"].data == 380.0
+    assert seen[1] == ("double", {"close": 190.0})
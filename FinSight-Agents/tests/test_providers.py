@@ -0,0 +1,133 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import utils.gemini_helpers as gemini_helpers
+import utils.news_fetcher as news_fetcher
+import utils.ohlcv_store as ohlcv_store
+import utils.providers as providers
+from utils.gemini_cache import GeminiCache
+from utils.news_store import NewsStore
+from utils.ohlcv_store import OHLCVStore
+from utils.quote_cache import QUOTE_CACHE
+from utils.sentiment_scoring import VaderBatchScorer
+from utils.yfinance_helper import export_market_data
+
+@pytest.fixture(autouse=True)
+def live_mode_after_test():
+    yield
+    providers.configure("live")
+    QUOTE_CACHE.clear()
+
+def test_record_then_replay_with_latency(tmp_path):
+    corpus = str(tmp_path / "corpus.db")
+    calls = []
+
+    def slow_live():
+        calls.append(1)
+        time.sleep(0.05)
+        return [{"title": "Apple beats estimates"}]
+
+    providers.configure("record", corpus)
+    assert providers.NEWSAPI.call(("everything", "Apple", 5), slow_live) == [{"title": "Apple beats estimates"}]
+
+    providers.configure("replay", corpus, latency_scale=0)
+    assert providers.NEWSAPI.call(("everything", "Apple", 5), slow_live) == [{"title": "Apple beats estimates"}]
+    assert len(calls) == 1
+    providers.configure("replay", corpus, latency_scale=1.0)
+    started = time.perf_counter()
+    providers.NEWSAPI.call(("everything", "Apple", 5), slow_live)
+    assert time.perf_counter() - started >= 0.04
+    with pytest.raises(providers.ReplayMiss):
+        providers.NEWSAPI.call(("everything", "Tesla", 5), slow_live)
+
+def fake_range(symbols, start, end, interval="1d"):
+    dates = pd.bdate_range(start, end, inclusive="left", name="Date")
+    columns = pd.MultiIndex.from_product([["Close", "High", "Low", "Open", "Volume"], symbols],
+                                         names=["Price", "Ticker"])
+    values = np.tile(np.linspace(100, 130, len(dates))[:, None], len(columns))
+    return pd.DataFrame(values, index=dates, columns=columns)
+
+def test_full_workflow_replays_offline(tmp_path, monkeypatch):
+    import main
+    from agents.visualization_agent import VisualizationAgent
+
+    class FakeGemini:
+        async def generate(self, prompt):
+            return '{"AAPL": "Momentum is strong.", "MSFT": "Watch valuation."}' if "JSON" in prompt else "ok"
+
+    supervisor = main.SupervisorAgent()
+    supervisor.register_agent(main.MarketDataAgent())
+    supervisor.register_agent(main.SentimentAgent(main.NewsFetcherAdapter(), VaderBatchScorer()))
+    supervisor.register_agent(main.InsightAgent(None, None, batch_size=10))
+    monkeypatch.setattr(main, "visualization_agent", VisualizationAgent(save_dir=str(tmp_path / "charts")))
+    workflow = [
+        {"agent_name": "MarketDataAgent", "task_type": "fetch_specific_stocks",
+         "parameters": {"symbols": ["AAPL", "MSFT"], "period": "6mo"}},
+        {"agent_name": "SentimentAgent", "task_type": "analyze_news",
+         "parameters": {"symbols": "{{MarketDataAgent.result}}"}},
+        {"agent_name": "InsightAgent", "task_type": "generate_summary",
+         "parameters": {"market_data": "{{MarketDataAgent.result}}", "sentiment": "{{SentimentAgent.result}}"}},
+    ]
+
+    recorded_on = pd.Timestamp("2025-06-30")
+
+    def run(label, populated=False):
+        # Fresh local stores, optionally holding data that differs from the corpus
+        QUOTE_CACHE.clear()
+        prices = OHLCVStore(root=str(tmp_path / f"ohlcv_{label}"))
+        news = NewsStore(str(tmp_path / f"news_{label}.db"))
+        if populated:
+            stale = fake_range(["AAPL"], recorded_on - pd.Timedelta(days=60), recorded_on) * 10
+            prices.write("AAPL", "1d", stale.xs("AAPL", axis=1, level=1),
+                         [(recorded_on - pd.Timedelta(days=60), recorded_on)])
+            news.add("Apple", [{"title": "Apple stock in stale story", "url": "https://example.com/stale"}])
+        monkeypatch.setattr(ohlcv_store, "_STORE", prices)
+        monkeypatch.setattr(news_fetcher.NEWS_CLIENT, "store", news)
+        monkeypatch.setattr(gemini_helpers, "GEMINI_CACHE", GeminiCache(str(tmp_path / f"gemini_{label}.db")))
+        captured = {}
+        original = main.print_insight_results
+        monkeypatch.setattr(main, "print_insight_results",
+                            lambda data, agent, market_data: captured.update(data=data, market=market_data)
+                            or original(data, agent, market_data))
+        asyncio.run(main.run_workflow(supervisor, workflow))
+        # Chart history older than the workflow's 6 months, and a full export, come from the store too
+        history = main.visualization_agent._price_history("AAPL", "1y", captured["market"])
+        export_path = str(tmp_path / f"export_{label}.csv")
+        rows = export_market_data(["AAPL", "MSFT"], export_path, recorded_on - pd.Timedelta(days=800), recorded_on)
+        with open(export_path) as f:
+            return captured["data"], history, rows, f.read()
+
+    corpus = str(tmp_path / "corpus.db")
+    providers.configure("record", corpus, today=recorded_on)
+    monkeypatch.setattr(ohlcv_store, "_download_range", fake_range)
+    async def fake_news(self, params):
+        return [{"title": f"{name} shares rally", "description": ""}
+                for name in ("Apple", "Microsoft") if name in params["q"]]
+
+    monkeypatch.setattr(news_fetcher.AsyncNewsClient, "_get", fake_news)
+    monkeypatch.setattr(gemini_helpers, "get_gemini_client", lambda: FakeGemini())
+    recorded, recorded_history, recorded_rows, recorded_export = run("record")
+
+    def offline(*args, **kwargs):
+        raise AssertionError("network access during replay")
+
+    # Replayed on a later day (the real clock), against stores that already hold other data
+    providers.configure("replay", corpus)
+    assert providers.current_date() == recorded_on != pd.Timestamp.now().normalize()
+    monkeypatch.setattr(ohlcv_store, "_download_range", offline)
+    monkeypatch.setattr(news_fetcher.AsyncNewsClient, "_get", offline)
+    monkeypatch.setattr(gemini_helpers, "get_gemini_client", offline)
+    replayed, history, rows, export = run("replay", populated=True)
+
+    assert history.index[-1] - history.index[0] > pd.Timedelta(days=300)
+    pd.testing.assert_frame_equal(history, recorded_history)
+    assert rows == recorded_rows > 500
+    assert export == recorded_export
+    assert [m["llm_insight"] for m in replayed] == ["Momentum is strong.", "Watch valuation."]
+    assert replayed == recorded
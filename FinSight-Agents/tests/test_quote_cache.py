@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import pandas as pd
+import utils.yfinance_helper as yfinance_helper
+from utils.quote_cache import QuoteCache, quote_expiry
+
+NY = ZoneInfo("America/New_York")
+IST = ZoneInfo("Asia/Kolkata")
+
+def ts(tz, *args):
+    return datetime(*args, tzinfo=tz).timestamp()
+
+def test_expiry_follows_exchange_sessions():
+    # Monday 2 June 2025, US market open: short TTL
+    now = ts(NY, 2025, 6, 2, 10, 0)
+    assert quote_expiry("AAPL", now, open_ttl=60) == now + 60
+    # Never past the close, so the closing bar is fetched once
+    assert quote_expiry("AAPL", ts(NY, 2025, 6, 2, 15, 59, 30), open_ttl=60) == ts(NY, 2025, 6, 2, 16, 0)
+    # Friday after the close: valid until Monday's open
+    assert quote_expiry("AAPL", ts(NY, 2025, 6, 6, 17, 0)) == ts(NY, 2025, 6, 9, 9, 30)
+    # Same instant, NSE symbol: Indian session is already closed, next open is Monday 9:15 IST
+    assert quote_expiry("TCS.NS", ts(NY, 2025, 6, 6, 17, 0)) == ts(IST, 2025, 6, 9, 9, 15)
+    # Before the NSE open on a weekday
+    assert quote_expiry("TCS.NS", ts(IST, 2025, 6, 3, 8, 0)) == ts(IST, 2025, 6, 3, 9, 15)
+
+def test_entries_expire_with_the_clock():
+    now = [ts(NY, 2025, 6, 2, 10, 0)]
+    cache = QuoteCache(open_ttl=60, clock=lambda: now[0])
+    cache.set_many({("AAPL", "1d", "1d"): "a", ("MSFT", "1d", "1d"): "m"})
+    hits, misses = cache.get_many([("AAPL", "1d", "1d"), ("TSLA", "1d", "1d")])
+    assert hits == {("AAPL", "1d", "1d"): "a"} and misses == [("TSLA", "1d", "1d")]
+    now[0] += 61
+    assert cache.get(("AAPL", "1d", "1d")) is None
+
+def test_bulk_download_fetches_only_misses(monkeypatch):
+    requested = []
+
+    class FakeStore:
+        def get_period(self, symbols, period="1d", interval="1d"):
+            requested.append(list(symbols))
+            columns = pd.MultiIndex.from_product([["Close", "Open"], symbols], names=["Price", "Ticker"])
+            return pd.DataFrame(1.0, index=pd.DatetimeIndex(["2025-06-02"], name="Date"), columns=columns)
+
+    monkeypatch.setattr(yfinance_helper, "get_ohlcv_store", lambda: FakeStore())
+    cache = QuoteCache(open_ttl=3600)
+    yfinance_helper.download_stock_frame(["AAPL", "MSFT"], cache=cache)
+    frame = yfinance_helper.download_stock_frame(["AAPL", "MSFT", "TSLA"], cache=cache)
+    assert requested == [["AAPL", "MSFT"], ["TSLA"]]
+    assert {c[1] for c in frame.columns} == {"AAPL", "MSFT", "TSLA"}
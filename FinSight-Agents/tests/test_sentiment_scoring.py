@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from agents.sentiment_agent import SentimentAgent
+from utils.sentiment_scoring import (VADER_TOLERANCE, CachedScorer, MicroBatcher, ScoreCache, SentimentScorer,
+                                     VaderBatchScorer)
+
+EDGE_CASES = [
+    "", "   ", "a", "The stock is not good!!!", "Shares are kind of bad but the outlook is the shit",
+    "At least it works", "least good quarter", "never so good", "Is this good??", "Is this good????",
+    "cut the mustard", "yeah right, great results", "NOT BAD at all", "GREAT quarter for Apple",
+    "Earnings were :) good", "\"Terrible\" guidance, analysts say", "Good good good news", "It isn't great",
+]
+
+def random_texts(analyzer, n=3000, seed=0):
+    rng = random.Random(seed)
+    constants = analyzer.constants
+    vocab = (list(analyzer.lexicon)[:3000:7] + list(constants.BOOSTER_DICT) + list(constants.NEGATE)
+             + ["but", "least", "at", "very", "never", "so", "this", "kind", "of", "the", "shit", "yeah",
+                "right", "stock", "shares", "Apple"])
+    punctuation = ["", "", ".", "!", "?", ",", "!!", "?!?", "'s", "-"]
+    texts = []
+    for _ in range(n):
+        words = []
+        for _ in range(rng.randint(0, 15)):
+            word = rng.choice(vocab)
+            word = word.upper() if rng.random() < 0.15 else word
+            words.append(rng.choice(punctuation[:3]) + word + rng.choice(punctuation))
+        texts.append(" ".join(words))
+    return texts
+
+def test_batch_scores_match_nltk():
+    analyzer = SentimentIntensityAnalyzer()
+    texts = EDGE_CASES + random_texts(analyzer)
+    expected = np.array([analyzer.polarity_scores(text)["compound"] for text in texts])
+    scores = VaderBatchScorer(analyzer).score(texts)
+    assert scores.dtype == np.float64 and scores.shape == (len(texts),)
+    assert np.abs(scores - expected).max() <= VADER_TOLERANCE
+
+def test_process_pool_matches_single_process():
+    scorer = VaderBatchScorer()
+    texts = EDGE_CASES * 20
+    np.testing.assert_array_equal(scorer.score(texts, processes=2, chunk_size=50), scorer.score(texts))
+    assert scorer.score([]).shape == (0,)
+
+class FakeScorer(SentimentScorer):
+    max_batch_size = 2
+
+    def __init__(self, version="fake-1"):
+        self.version = version
+        self.batches = []
+
+    def score(self, texts):
+        self.batches.append(list(texts))
+        return np.array([len(text) / 100 for text in texts])
+
+def test_cache_is_keyed_by_scorer_version_and_text(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.db"))
+    light, heavy = FakeScorer("light"), FakeScorer("heavy")
+    texts = ["up", "down", "flat", "up", "sideways"]
+    np.testing.assert_allclose(CachedScorer(light, cache).score(texts), [0.02, 0.04, 0.04, 0.02, 0.08])
+    assert light.batches == [["up", "down"], ["flat", "sideways"]]  # unique texts, max_batch_size at a time
+    CachedScorer(heavy, cache).score(texts)
+    CachedScorer(light, cache).score(texts + ["new"])
+    assert light.batches[-1] == ["new"] and len(heavy.batches) == 2
+
+def test_micro_batcher_coalesces_concurrent_sessions():
+    class SlowScorer(FakeScorer):
+        max_batch_size = None
+
+        def score(self, texts):
+            time.sleep(0.05)
+            return super().score(texts)
+
+    scorer = SlowScorer()
+    batcher = MicroBatcher(scorer, max_wait=0.05)
+
+    def session(n):
+        # Each thread runs its own event loop, like a Streamlit session
+        return asyncio.run(batcher.score_async(["x" * n, "y" * n]))
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(session, range(1, 9)))
+    for n, scores in enumerate(results, start=1):
+        np.testing.assert_allclose(scores, [n / 100, n / 100])
+    assert batcher.calls < 8 and sum(len(b) for b in scorer.batches) == 16
+
+def test_sentiment_agent_reuses_only_matching_scorer_results():
+    class Fetcher:
+        def get_news(self, query, num_articles):
+            return [{"title": "Apple stock gains", "description": "", "sentiment_score": 0.9,
+                     "sentiment_scorer": "other"}]
+
+    scorer = FakeScorer()
+    result = asyncio.run(SentimentAgent(Fetcher(), MicroBatcher(scorer)).execute({"parameters": {"symbols": ["AAPL"]}}))
+    assert result.data["Apple"][0]["score"] == 0.18 and scorer.batches == [["Apple stock gains "]]
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import time
+import pytest
+from agents.supervisor_agent import AgentTask, SupervisorAgent, workflow_graph
+from core.agent_base import AgentResult, BaseAgent
+
+class SleepyAgent(BaseAgent):
+    """Sleeps `delay` seconds, then returns its parameters; records peak concurrency and (start, end) spans."""
+
+    def __init__(self, name, delay=0.1):
+        super().__init__(name)
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self.spans = []
+
+    async def execute(self, task):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.calls.append(task['parameters'])
+        start = time.perf_counter()
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+            self.spans.append((start, time.perf_counter()))
+        return AgentResult(success=True, data={"from": self.name, **task['parameters']})
+
+def standard_workflow():
+    return [
+        {"agent_name": "MarketDataAgent", "task_type": "fetch", "parameters": {"symbols": ["AAPL"]}},
+        {"agent_name": "SentimentAgent", "task_type": "news", "parameters": {"symbols": ["AAPL"]}},
+        {"agent_name": "InsightAgent", "task_type": "summary",
+         "parameters": {"market_data": "{{MarketDataAgent.result}}", "sentiment": "{{SentimentAgent.result}}"}},
+    ]
+
+def test_independent_steps_overlap():
+    supervisor = SupervisorAgent()
+    agents = {name: SleepyAgent(name, delay=0.05) for name in ("MarketDataAgent", "SentimentAgent", "InsightAgent")}
+    for agent in agents.values():
+        supervisor.register_agent(agent)
+
+    results = asyncio.run(supervisor.execute_workflow(standard_workflow()))
+
+    (market_start, market_end), = agents["MarketDataAgent"].spans
+    (news_start, news_end), = agents["SentimentAgent"].spans
+    (insight_start, _), = agents["InsightAgent"].spans
+    # Prices and news run at the same time; insights wait for both
+    assert market_start < news_end and news_start < market_end
+    assert insight_start >= max(market_end, news_end)
+    assert list(results) == ["MarketDataAgent", "SentimentAgent", "InsightAgent"]
+    insight = results["InsightAgent"].data
+    assert insight["market_data"]["from"] == "MarketDataAgent"
+    assert insight["sentiment"]["from"] == "SentimentAgent"
+
+def test_per_agent_concurrency_limit():
+    supervisor = SupervisorAgent()
+    agent = SleepyAgent("MarketDataAgent", delay=0.05)
+    supervisor.register_agent(agent, max_concurrency=2)
+    workflow = [{"id": f"chunk{i}", "agent_name": "MarketDataAgent", "task_type": "fetch",
+                 "parameters": {"chunk": i}} for i in range(6)]
+
+    results = asyncio.run(supervisor.execute_workflow(workflow))
+    assert agent.peak == 2
+    assert [r.data["chunk"] for r in results.values()] == list(range(6))
+
+def test_workflow_definition_is_not_mutated():
+    supervisor = SupervisorAgent()
+    for name in ("MarketDataAgent", "SentimentAgent", "InsightAgent"):
+        supervisor.register_agent(SleepyAgent(name, delay=0))
+    workflow = standard_workflow()
+    asyncio.run(supervisor.execute_workflow(workflow))
+    assert workflow == standard_workflow()
+
+def test_invalid_graphs_are_rejected():
+    def task(step_id, *refs):
+        return AgentTask("A", "t", {r: f"{{{{{r}.result}}}}" for r in refs}, id=step_id)
+
+    assert workflow_graph([task("a"), task("b", "a")]) == {"a": set(), "b": {"a"}}
+    with pytest.raises(ValueError, match="unknown"):
+        workflow_graph([task("a", "missing")])
+    with pytest.raises(ValueError, match="cycle"):
+        workflow_graph([task("a", "b"), task("b", "a")])
+    with pytest.raises(ValueError, match="Duplicate"):
+        workflow_graph([task("a"), task("a")])
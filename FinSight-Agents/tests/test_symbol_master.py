@@ -0,0 +1,29 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from utils.symbol_master import SymbolMaster, get_symbol_master
+
+def test_forward_reverse_and_alias_lookups():
+    master = get_symbol_master()
+    assert master.get("TCS.NS").exchange == "NSE"
+    assert master.get("AAPL").currency == "USD"
+    assert master.display_name("GOOGL") == "Alphabet"
+    assert master.lookup("Tata Consultancy Services") == "TCS.NS"
+    assert master.lookup("hdfcbank") == "HDFCBANK.NS"
+    assert master.lookup("Google") == "GOOGL"
+    assert master.lookup("msft") == "MSFT"
+    assert master.lookup("Unknown Corp") is None
+
+def test_loads_full_exchange_listing_quickly(tmp_path):
+    path = tmp_path / "symbols.csv"
+    with open(path, "w") as f:
+        f.write("symbol,exchange,currency,name,aliases\n")
+        for i in range(30_000):
+            f.write(f"SYM{i}.NS,NSE,INR,Company {i} Limited,CO{i}|Company {i}\n")
+    start = time.perf_counter()
+    master = SymbolMaster.load(str(path))
+    assert time.perf_counter() - start < 2.0
+    assert len(master) == 30_000
+    assert master.lookup("Company 29999") == "SYM29999.NS"
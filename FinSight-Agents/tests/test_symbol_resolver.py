@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+from utils.symbol_resolver import resolve_symbols, resolve_symbols_with_fallback
+
+def _resolved(query):
+    return [(m.symbol, m.source) for m in resolve_symbols(query)]
+
+def test_plain_tickers_and_names():
+    assert _resolved("AAPL, TSLA") == [("AAPL", "ticker"), ("TSLA", "ticker")]
+    assert _resolved("Insights on Tata Motors and Tesla") == [("TATAMOTORS.NS", "name"), ("TSLA", "name")]
+    assert _resolved("HDFC Bank vs icici bank") == [("HDFCBANK.NS", "name"), ("ICICIBANK.NS", "name")]
+
+def test_short_tickers_need_capitals_and_stopwords_are_ignored():
+    assert _resolved("C and V") == [("C", "ticker"), ("V", "ticker")]
+    assert _resolved("should I buy it now?") == []
+
+def test_lowercase_words_that_spell_tickers_are_not_tickers():
+    assert _resolved("What is the cost of buying Tesla shares?") == [("TSLA", "name")]
+    assert _resolved("COST vs WMT") == [("COST", "ticker"), ("WMT", "ticker")]
+    assert _resolved("AAPL's results") == [("AAPL", "ticker")]
+
+def test_bounded_fuzzy_matching():
+    assert _resolved("Micorsoft and Nvidai") == [("MSFT", "fuzzy"), ("NVDA", "fuzzy")]
+    assert _resolved("Tata Motrs") == [("TATAMOTORS.NS", "fuzzy")]
+    assert _resolved("beta stock") == []
+
+def test_llm_is_only_used_when_nothing_matches_locally():
+    calls = []
+
+    async def fake_llm(query):
+        calls.append(query)
+        return ["APPLE"]
+
+    local = asyncio.run(resolve_symbols_with_fallback("AAPL", fake_llm))
+    assert [(m.symbol, m.source) for m in local] == [("AAPL", "ticker")]
+    assert calls == []
+
+    fallback = asyncio.run(resolve_symbols_with_fallback("the iPhone maker", fake_llm))
+    assert [(m.symbol, m.source) for m in fallback] == [("AAPL", "llm")]
+    assert calls == ["the iPhone maker"]
+
+    calls.clear()
+    asyncio.run(resolve_symbols_with_fallback("is the pep talk over?", fake_llm))
+    assert calls == ["is the pep talk over?"]
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+import utils.ohlcv_store as ohlcv_store
+from agents.visualization_agent import VisualizationAgent
+
+def long_rows(ticker, dates):
+    return pd.DataFrame({"ticker": ticker, "date": pd.DatetimeIndex(dates), "open": 1.0, "high": 2.0,
+                         "low": 0.5, "close": 1.5, "volume": 100.0})
+
+class RecordingStore:
+    def __init__(self):
+        self.calls = []
+
+    def get_history(self, tickers, start, end, interval="1d"):
+        self.calls.append((tickers, pd.Timestamp(end)))
+        dates = pd.bdate_range(start, end, inclusive="left", name="Date")
+        columns = pd.MultiIndex.from_product([["Open", "High", "Low", "Close", "Volume"], tickers])
+        return pd.DataFrame(1.0, index=dates, columns=columns)
+
+    def get_period(self, tickers, period="1d", interval="1d"):
+        raise AssertionError("whole period should not be fetched")
+
+def test_chart_history_comes_from_price_data(tmp_path, monkeypatch):
+    store = RecordingStore()
+    monkeypatch.setattr(ohlcv_store, "get_ohlcv_store", lambda: store)
+    agent = VisualizationAgent(save_dir=str(tmp_path))
+    today = pd.Timestamp.now().normalize()
+
+    # Enough bars in memory: no store access at all
+    dates = pd.bdate_range(end=today, periods=8)
+    df = agent._price_history("AAPL", "5d", long_rows("AAPL", dates))
+    assert len(df) == 5 and list(df.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert store.calls == []
+
+    # Only today's bar in memory: just the older bars are requested
+    df = agent._price_history("AAPL", "5d", long_rows("AAPL", [today]))
+    assert store.calls == [(["AAPL"], today)]
+    assert len(df) == 5 and df.index[-1] == today
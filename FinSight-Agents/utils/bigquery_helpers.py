@@ -1,7 +1,6 @@
-from google.cloud import bigquery
-
 class BigQueryClient:
     def __init__(self, project=None):
+        from google.cloud import bigquery  # heavy; only loaded when a client is created
         # No credentials needed for sandbox if you've run gcloud auth application-default login
         self.client = bigquery.Client(project=project)
 
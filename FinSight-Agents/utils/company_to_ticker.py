@@ -1,94 +1,11 @@
-COMPANY_TO_TICKER = {
-    # Indian Companies
-    "RELIANCE": "RELIANCE.NS",
-    "TCS": "TCS.NS",
-    "HDFC BANK": "HDFCBANK.NS",
-    "INFOSYS": "INFY.NS",
-    "ICICI BANK": "ICICIBANK.NS",
-    "STATE BANK OF INDIA": "SBIN.NS",
-    "BHARTI AIRTEL": "BHARTIARTL.NS",
-    "KOTAK MAHINDRA BANK": "KOTAKBANK.NS",
-    "ITC": "ITC.NS",
-    "HUL": "HINDUNILVR.NS",
-    "HINDUSTAN UNILEVER": "HINDUNILVR.NS",
-    "SUN PHARMA": "SUNPHARMA.NS",
-    "MARUTI SUZUKI": "MARUTI.NS",
-    "AXIS BANK": "AXISBANK.NS",
-    "BAJAJ FINANCE": "BAJFINANCE.NS",
-    "BAJAJ FINSERV": "BAJAJFINSV.NS",
-    "WIPRO": "WIPRO.NS",
-    "POWER GRID": "POWERGRID.NS",
-    "NTPC": "NTPC.NS",
-    "ONGC": "ONGC.NS",
-    "COAL INDIA": "COALINDIA.NS",
-    "TATA MOTORS": "TATAMOTORS.NS",
-    "TATA STEEL": "TATASTEEL.NS",
-    "LARSEN & TOUBRO": "LT.NS",
-    "HCL TECHNOLOGIES": "HCLTECH.NS",
-    "ADANI PORTS": "ADANIPORTS.NS",
-    "TECH MAHINDRA": "TECHM.NS",
-    "PIDILITE": "PIDILITIND.NS",
-    "ULTRATECH CEMENT": "ULTRACEMCO.NS",
-    "ASIAN PAINTS": "ASIANPAINT.NS",
-    "MAHINDRA & MAHINDRA": "MAHINDRA.NS",
-    "INDIAN OIL": "IOC.NS",
-    "BHARAT ELECTRONICS": "BEL.NS",
-    "BPCL": "BPCL.NS",
-    "JSW STEEL": "JSWSTEEL.NS",
-    "BAJAJ AUTO": "BAJAJAUTO.NS",
-    "TITAN": "TITAN.NS",
-    "DMART": "DMART.NS",
-    "GAIL": "GAIL.NS",
-    "CIPLA": "CIPLA.NS",
-    "EICHER MOTORS": "EICHERMOT.NS",
-    "SBI LIFE": "SBILIFE.NS",
-    "INDUSIND BANK": "INDUSINDBK.NS",
-    "LTIMINDTREE": "LTIM.NS",
+# Derived from the symbol master (data/symbols/symbols.csv); kept for existing imports.
+from utils.symbol_master import get_symbol_master
 
-    # Global Companies
-    "APPLE": "AAPL",
-    "TESLA": "TSLA",
-    "META": "META",
-    "GOOGLE": "GOOGL",
-    "ALPHABET": "GOOGL",
-    "AMAZON": "AMZN",
-    "MICROSOFT": "MSFT",
-    "NVIDIA": "NVDA",
-    "JPMORGAN": "JPM",
-    "VISA": "V",
-    "MASTERCARD": "MA",
-    "JOHNSON & JOHNSON": "JNJ",
-    "PROCTER & GAMBLE": "PG",
-    "BANK OF AMERICA": "BAC",
-    "WALMART": "WMT",
-    "DISNEY": "DIS",
-    "COCA COLA": "KO",
-    "PEPSICO": "PEP",
-    "MCDONALDS": "MCD",
-    "ADOBE": "ADBE",
-    "INTEL": "INTC",
-    "IBM": "IBM",
-    "BERKSHIRE HATHAWAY": "BRK-B",
-    "TSMC": "TSM",
-    "BROADCOM": "AVGO",
-    "ASML": "ASML",
-    "ELI LILLY": "LLY",
-    "COSTCO": "COST",
-    "ORACLE": "ORCL",
-    "EXXON MOBIL": "XOM",
-    "CHEVRON": "CVX",
-    "CONOCOPHILLIPS": "COP",
-    "SAP": "SAP",
-    "NOVO NORDISK": "NVO",
-    "PHILIP MORRIS": "PM",
-    "SALESFORCE": "CRM",
-    "ALIBABA": "BABA",
-    "AMGEN": "AMGN",
-    "CITIGROUP": "C",
-    "HSBC": "HSBC",
-    "TEXAS INSTRUMENTS": "TXN",
-    "INTUIT": "INTU",
-    "UNITEDHEALTH": "UNH",
-    "HOME DEPOT": "HD",
-    "CISCO": "CSCO"
-}
+
+def __getattr__(name):
+    # Built from the symbol master on first access rather than at import
+    if name == "COMPANY_TO_TICKER":
+        global COMPANY_TO_TICKER
+        COMPANY_TO_TICKER = get_symbol_master().company_to_ticker()
+        return COMPANY_TO_TICKER
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
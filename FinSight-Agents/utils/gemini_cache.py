@@ -0,0 +1,150 @@
+import os
+import json
+import sqlite3
+import time
+
+# Fixed location next to the package (not the current working directory);
+# override with GEMINI_CACHE_PATH.
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gemini_cache.db"
+)
+CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at  REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_lru ON entries (namespace, accessed_at);
+"""
+
+
+class GeminiCache:
+    """
+    SQLite-backed cache for LLM responses.
+
+    Entries are written one row at a time (no whole-file rewrites), namespaced
+    per model name, bounded by an LRU size limit and optionally expired by TTL.
+    The database runs in WAL mode so several Streamlit worker processes can
+    share the same file.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=5000, default_ttl=None, touch_interval=60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        # Skip rewriting accessed_at on hot keys read more often than this.
+        self.touch_interval = touch_interval
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def get(self, key, namespace="default"):
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value, accessed_at, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            value, accessed_at, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                return None
+            if now - accessed_at >= self.touch_interval:
+                conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key),
+                )
+            return value
+        finally:
+            conn.close()
+
+    def set(self, key, value, namespace="default", ttl=None):
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, value, now, now, expires_at),
+            )
+            self._evict(conn, namespace, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _evict(self, conn, namespace, now):
+        conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (namespace, now),
+        )
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                "  SELECT key FROM entries WHERE namespace = ? "
+                "  ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, self.max_entries),
+            )
+
+    def delete(self, key, namespace="default"):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        finally:
+            conn.close()
+
+    def clear(self, namespace=None):
+        conn = self._connect()
+        try:
+            if namespace is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+        finally:
+            conn.close()
+
+    def __len__(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        finally:
+            conn.close()
+
+    def import_json(self, json_path, namespace="default"):
+        """One-off migration of the legacy whole-file JSON cache."""
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, "r") as f:
+            legacy = json.load(f)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO entries (namespace, key, value, created_at, accessed_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, NULL)",
+                [(namespace, k, v, now, now) for k, v in legacy.items()],
+            )
+            self._evict(conn, namespace, now)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return len(legacy)
@@ -0,0 +1,261 @@
+import asyncio
+import collections
+import os
+import random
+import threading
+import time
+import weakref
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def _genai():
+    """google.generativeai, imported on the first Gemini call rather than at startup."""
+    import google.generativeai as genai
+    return genai
+
+
+@lru_cache(maxsize=None)
+def rate_limit_errors():
+    from google.api_core import exceptions as api_exceptions
+    return (api_exceptions.ResourceExhausted, api_exceptions.TooManyRequests)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute` tokens/minute.
+
+    `acquire` reserves tokens up front (the bucket may go into debt) and sleeps
+    for however long the debt takes to refill, so concurrent callers queue fairly
+    instead of spinning.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Takes `amount` tokens and returns the seconds to wait before using them."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self, amount=1):
+        wait = self.reserve(amount)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, amount=1):
+        wait = self.reserve(amount)
+        if wait:
+            time.sleep(wait)
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "event", "granted")
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+
+def _grant(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ProcessSemaphore:
+    """
+    Counting semaphore shared by every thread and event loop in the process.
+
+    asyncio.Semaphore belongs to one loop, and Streamlit runs each script
+    execution on a fresh one, so per-loop semaphores would let every live loop
+    have its own `value` calls in flight. Waiters here queue FIFO across loops
+    and threads; a released slot is handed straight to the next waiter.
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+
+    async def acquire(self):
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except BaseException:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked()  # handed a slot while being cancelled: pass it on
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def acquire_sync(self):
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    def release(self):
+        with self._lock:
+            self._release_locked()
+
+    def _release_locked(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.event is not None:
+                waiter.granted = True
+                waiter.event.set()
+                return
+            try:
+                waiter.loop.call_soon_threadsafe(_grant, waiter.future)
+            except RuntimeError:  # its loop has closed; nobody is waiting there any more
+                continue
+            waiter.granted = True
+            return
+        self._value += 1
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    def __enter__(self):
+        self.acquire_sync()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def estimate_tokens(text):
+    # Rough heuristic (~4 characters per token); corrected from usage metadata after the call.
+    return max(1, len(text) // 4)
+
+
+class AsyncGeminiClient:
+    """
+    Long-lived Gemini client: `genai.configure` runs once, model handles are reused,
+    concurrency is bounded by a semaphore and requests/tokens per minute by token
+    buckets. All three limits are process-wide, shared by the sync path and every
+    event loop. Rate-limit errors are retried with exponential backoff and full jitter.
+    """
+
+    def __init__(self, model_name, api_key=None, max_concurrency=8, requests_per_minute=60,
+                 tokens_per_minute=1_000_000, expected_output_tokens=256, max_retries=4,
+                 base_delay=1.0, max_delay=30.0):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.expected_output_tokens = expected_output_tokens
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_limiter = TokenBucket(requests_per_minute)
+        self.token_limiter = TokenBucket(tokens_per_minute)
+        self._configured = False
+        self._configure_lock = threading.Lock()
+        self._sync_model = None
+        # grpc.aio channels are bound to the loop that created them, and Streamlit
+        # runs each script execution on a fresh loop.
+        self._loop_state = weakref.WeakKeyDictionary()
+        self._semaphore = ProcessSemaphore(max_concurrency)
+
+    def _configure(self):
+        if self._configured:
+            return
+        with self._configure_lock:
+            if self._configured:
+                return
+            api_key = self.api_key or os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables.")
+            genai = _genai()
+            genai.configure(api_key=api_key)
+            self._sync_model = genai.GenerativeModel(self.model_name)
+            self._configured = True
+
+    def _state_for_loop(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            # genai's default async client is shared and bound to the first loop. This
+            # builds one per loop through private API, so google-generativeai is pinned
+            # in requirements.txt and tests/test_gemini_client.py checks it still works.
+            from google.generativeai import client as genai_client
+            model = _genai().GenerativeModel(self.model_name)
+            model._async_client = genai_client._client_manager.make_client("generative_async")
+            state = (model, self._semaphore)
+            self._loop_state[loop] = state
+        return state
+
+    def _retry_delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _settle_tokens(self, response, estimated):
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", 0) if usage is not None else 0
+        if actual > estimated:
+            self.token_limiter.reserve(actual - estimated)
+
+    async def generate(self, prompt: str) -> str:
+        self._configure()
+        model, semaphore = self._state_for_loop()
+        estimated = estimate_tokens(prompt) + self.expected_output_tokens
+        for attempt in range(self.max_retries + 1):
+            await self.request_limiter.acquire()
+            await self.token_limiter.acquire(estimated)
+            try:
+                # Only the call holds a slot, so other prompts run while this one backs off
+                async with semaphore:
+                    response = await model.generate_content_async(prompt)
+            except rate_limit_errors():
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                print(f"[Gemini] Rate limited, retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                continue
+            self._settle_tokens(response, estimated)
+            return _response_text(response)
+
+    def generate_sync(self, prompt: str) -> str:
+        self._configure()
+        estimated = estimate_tokens(prompt) + self.expected_output_tokens
+        for attempt in range(self.max_retries + 1):
+            self.request_limiter.acquire_sync()
+            self.token_limiter.acquire_sync(estimated)
+            try:
+                with self._semaphore:
+                    response = self._sync_model.generate_content(prompt)
+            except rate_limit_errors():
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                print(f"[Gemini] Rate limited, retrying in {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+            self._settle_tokens(response, estimated)
+            return _response_text(response)
+
+
+def _response_text(response):
+    return response.text.strip() if hasattr(response, "text") else str(response)
@@ -1,40 +1,146 @@
-import google.generativeai as genai
 import os
-import hashlib
-import json
 import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+from utils.gemini_cache import GeminiCache, CACHE_PATH
+from utils.gemini_client import AsyncGeminiClient
+from utils.providers import GEMINI
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+
+CACHE_FILE = CACHE_PATH
+LEGACY_CACHE_FILE = os.path.join(os.path.dirname(CACHE_FILE), "gemini_cache.json")
+GEMINI_CACHE = GeminiCache(
+    CACHE_FILE,
+    max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "5000")),
+    default_ttl=float(os.getenv("GEMINI_CACHE_TTL", "0")) or None,
+)
+if not os.path.exists(CACHE_FILE) and os.path.exists(LEGACY_CACHE_FILE):
+    GEMINI_CACHE.import_json(LEGACY_CACHE_FILE, namespace=GEMINI_MODEL)
 
-CACHE_FILE = "gemini_cache.json"
-if os.path.exists(CACHE_FILE):
-    with open(CACHE_FILE, "r") as f:
-        GEMINI_CACHE = json.load(f)
-else:
-    GEMINI_CACHE = {}
+def prompt_key(prompt):
+    return hashlib.sha256(prompt.encode()).hexdigest()
 
-def cache_gemini_insight(prompt, response=None):
-    key = hashlib.sha256(prompt.encode()).hexdigest()
+def cache_gemini_insight(prompt, response=None, model=GEMINI_MODEL, ttl=None, key=None):
+    """Reads (or writes, if `response` is given) the cached answer for `prompt`.
+    `key` overrides the default prompt-hash key, e.g. with a canonical feature key."""
+    key = key or prompt_key(prompt)
     if response is not None:
-        GEMINI_CACHE[key] = response
-        with open(CACHE_FILE, "w") as f:
-            json.dump(GEMINI_CACHE, f)
-    return GEMINI_CACHE.get(key)
+        GEMINI_CACHE.set(key, response, namespace=model, ttl=ttl)
+        return response
+    return GEMINI_CACHE.get(key, namespace=model)
+
+class InflightRequests:
+    """
+    Single-flight table for LLM prompts. The first caller for a prompt hash
+    issues the request; concurrent callers with the same hash wait on the same
+    future. Uses `concurrent.futures.Future` so callers on different threads and
+    event loops (e.g. separate Streamlit sessions) can share a result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.issued = 0
+        self.coalesced = 0
+
+    def join(self, key):
+        """Returns (future, is_leader) for `key`."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            self.issued += 1
+            return future, True
+
+    def release(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"issued": self.issued, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+INFLIGHT = InflightRequests()
+
+def _settle(future, result=None, error=None):
+    if error is None:
+        future.set_result(result)
+    elif isinstance(error, Exception):
+        future.set_exception(error)
+    else:  # cancelled leader: followers see the cancellation rather than hanging
+        future.cancel()
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+def get_gemini_client() -> AsyncGeminiClient:
+    """Process-wide Gemini client, created on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = AsyncGeminiClient(
+                    GEMINI_MODEL,
+                    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")),
+                    requests_per_minute=int(os.getenv("GEMINI_RPM", "60")),
+                    tokens_per_minute=int(os.getenv("GEMINI_TPM", "1000000")),
+                )
+    return _CLIENT
 
 def get_gemini_insight(prompt: str) -> str:
     cached = cache_gemini_insight(prompt)
     if cached:
         print("[Gemini] Loaded from cache.")
         return cached
-    print("[Gemini] Calling Gemini API...")
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY not found in environment variables.")
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    result = response.text.strip() if hasattr(response, "text") else str(response)
-    cache_gemini_insight(prompt, result)
+    key = f"{GEMINI_MODEL}:{prompt_key(prompt)}"
+    future, leader = INFLIGHT.join(key)
+    if not leader:
+        print("[Gemini] Waiting on identical in-flight request.")
+        return future.result()
+    try:
+        print("[Gemini] Calling Gemini API...")
+        result = GEMINI.call((GEMINI_MODEL, prompt), lambda: get_gemini_client().generate_sync(prompt))
+        cache_gemini_insight(prompt, result)
+    except BaseException as e:
+        _settle(future, error=e)
+        raise
+    finally:
+        INFLIGHT.release(key)
+    _settle(future, result)
     return result
 
-async def get_gemini_insight_async(prompt: str) -> str:
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, get_gemini_insight, prompt)
\ No newline at end of file
+async def get_gemini_insight_async(prompt: str, cache_key=None, ttl=None, parse=None) -> str:
+    """
+    Cached, single-flight Gemini call. With `parse`, returns `parse(reply)` and
+    only caches replies that parse, so a malformed reply is asked again next time
+    instead of being served from the cache.
+    """
+    cached = cache_gemini_insight(prompt, key=cache_key)
+    if cached:
+        print("[Gemini] Loaded from cache.")
+        return parse(cached) if parse else cached
+    key = f"{GEMINI_MODEL}:{cache_key or prompt_key(prompt)}"
+    future, leader = INFLIGHT.join(key)
+    if not leader:
+        print("[Gemini] Waiting on identical in-flight request.")
+        # shield: a cancelled follower must not cancel the shared future
+        result = await asyncio.shield(asyncio.wrap_future(future))
+        return parse(result) if parse else result
+    try:
+        print("[Gemini] Calling Gemini API...")
+        result = await GEMINI.call_async((GEMINI_MODEL, prompt), lambda: get_gemini_client().generate(prompt))
+        # Still in flight until cached, so a caller arriving meanwhile waits instead of calling again
+        parsed = parse(result) if parse else result
+        cache_gemini_insight(prompt, result, ttl=ttl, key=cache_key)
+    except BaseException as e:
+        _settle(future, error=e)
+        raise
+    finally:
+        INFLIGHT.release(key)
+    _settle(future, result)
+    return parsed
@@ -0,0 +1,347 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+# Inputs are 2-D float arrays shaped (tickers x days), oldest day first. Rows
+# are each ticker's own bars, right-aligned and NaN-padded on the left when its
+# history is shorter (see `wide_arrays`); nothing is forward-filled. Every
+# function returns arrays of the same shape, NaN until each ticker's own
+# history covers the indicator's warm-up.
+
+SMA_WINDOWS = (20, 50)
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BOLLINGER_WINDOW, BOLLINGER_K = 20, 2.0
+VOLATILITY_WINDOW = 20
+TRADING_DAYS = 252
+
+INDICATORS = [
+    "sma_20", "sma_50", "ema_12", "ema_26", "macd", "macd_signal", "macd_hist",
+    "rsi_14", "bb_mid", "bb_upper", "bb_lower", "atr_14", "volatility_20",
+]
+
+
+def _as_2d(x):
+    x = np.asarray(x, dtype="float64")
+    return x[None, :] if x.ndim == 1 else x
+
+
+def _seen(x):
+    """Running count of valid values in each row."""
+    return np.cumsum(~np.isnan(x), axis=1)
+
+
+def _mask_warmup(out, bars, seen):
+    # Per row, so a NaN-padded short history warms up on its own bars
+    out[seen <= bars] = np.nan
+    return out
+
+
+def _rolling_sums(x, window):
+    """Sum over each trailing `window` via one cumulative sum; NaN until `window` values are seen."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] < window:
+        return out
+    valid = ~np.isnan(x)
+    has_gaps = not valid.all()
+    c = np.cumsum(np.where(valid, x, 0.0) if has_gaps else x, axis=1)
+    out[:, window - 1] = c[:, window - 1]
+    np.subtract(c[:, window:], c[:, :-window], out=out[:, window:])
+    if has_gaps:
+        n = np.cumsum(valid, axis=1)
+        counts = n[:, window - 1:].copy()
+        counts[:, 1:] -= n[:, :-window]
+        out[:, window - 1:][counts < window] = np.nan
+    return out
+
+
+def sma(x, window):
+    return _rolling_sums(_as_2d(x), window) / window
+
+
+def rolling_std(x, window, ddof=0):
+    x = _as_2d(x)
+    # Centre each row first so E[x^2] - E[x]^2 does not lose precision
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows
+        x = x - np.nanmean(x, axis=1, keepdims=True)
+    mean = _rolling_sums(x, window) / window
+    var = _rolling_sums(x * x, window) / window - mean * mean
+    var = np.clip(var, 0.0, None) * (window / (window - ddof))
+    return np.sqrt(var)
+
+
+def _ewm_step(prev, cur, alpha):
+    return np.where(np.isnan(prev), cur, alpha * cur + (1 - alpha) * prev)
+
+
+def _ewm(x, alpha):
+    """Recursive exponential average (pandas `ewm(alpha=..., adjust=False)`), vectorized over tickers."""
+    # Step along days over a (days x tickers) copy so each step touches contiguous memory
+    xt = np.ascontiguousarray(x.T)
+    out = np.empty_like(xt)
+    prev = xt[0].copy()
+    out[0] = prev
+    gaps = np.isnan(xt).any()
+    for t in range(1, xt.shape[0]):
+        cur = xt[t]
+        prev *= 1 - alpha
+        prev += alpha * cur
+        if gaps:
+            np.copyto(prev, cur, where=np.isnan(prev))
+        out[t] = prev
+    return out.T
+
+
+def ema(x, span):
+    x = _as_2d(x)
+    return _mask_warmup(_ewm(x, 2.0 / (span + 1)), span - 1, _seen(x))
+
+
+def macd(close, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """Returns (macd line, signal line, histogram)."""
+    close = _as_2d(close)
+    line = _ewm(close, 2.0 / (fast + 1)) - _ewm(close, 2.0 / (slow + 1))
+    sig = _ewm(line, 2.0 / (signal + 1))
+    seen = _seen(close)
+    _mask_warmup(line, slow - 1, seen)
+    _mask_warmup(sig, slow + signal - 2, seen)
+    return line, sig, line - sig
+
+
+def _rsi_averages(close, period):
+    delta = np.diff(close, axis=1, prepend=close[:, :1])
+    # A ticker's first bar (after NaN padding) has no change, as on day one
+    delta[np.isnan(delta) & ~np.isnan(close)] = 0.0
+    gain, loss = np.clip(delta, 0, None), np.clip(-delta, 0, None)
+    return _ewm(gain, 1.0 / period), _ewm(loss, 1.0 / period)
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+
+
+def rsi(close, period=RSI_PERIOD):
+    """Wilder RSI (exponential smoothing with alpha = 1 / period)."""
+    close = _as_2d(close)
+    avg_gain, avg_loss = _rsi_averages(close, period)
+    return _mask_warmup(_rsi_from_averages(avg_gain, avg_loss), period, _seen(close))
+
+
+def bollinger(close, window=BOLLINGER_WINDOW, k=BOLLINGER_K):
+    """Returns (middle, upper, lower) bands, using the population standard deviation."""
+    mid = sma(close, window)
+    std = rolling_std(close, window)
+    return mid, mid + k * std, mid - k * std
+
+
+def true_range(high, low, close):
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    prev_close = np.where(np.isnan(prev_close), close, prev_close)
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, period=ATR_PERIOD):
+    close = _as_2d(close)
+    return _mask_warmup(_ewm(true_range(high, low, close), 1.0 / period), period - 1, _seen(close))
+
+
+def log_returns(close):
+    close = _as_2d(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.log(close[:, 1:] / close[:, :-1])
+    return np.concatenate([np.full((close.shape[0], 1), np.nan), returns], axis=1)
+
+
+def volatility(close, window=VOLATILITY_WINDOW):
+    """Annualized rolling standard deviation of daily log returns."""
+    returns = log_returns(close)
+    out = np.full(returns.shape, np.nan)
+    out[:, 1:] = rolling_std(returns[:, 1:], window, ddof=1)
+    return out * np.sqrt(TRADING_DAYS)
+
+
+def compute_indicators(high, low, close):
+    """Every indicator in `INDICATORS` over the full history, as {name: tickers x days array}."""
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    fast = _ewm(close, 2.0 / (MACD_FAST + 1))
+    slow = _ewm(close, 2.0 / (MACD_SLOW + 1))
+    line = fast - slow
+    seen = _seen(close)
+    sig = _mask_warmup(_ewm(line, 2.0 / (MACD_SIGNAL + 1)), MACD_SLOW + MACD_SIGNAL - 2, seen)
+    _mask_warmup(line, MACD_SLOW - 1, seen)
+    smas = {window: sma(close, window) for window in SMA_WINDOWS}
+    mid = smas[BOLLINGER_WINDOW] if BOLLINGER_WINDOW in smas else sma(close, BOLLINGER_WINDOW)
+    band = BOLLINGER_K * rolling_std(close, BOLLINGER_WINDOW)
+    return {
+        "sma_20": smas[20],
+        "sma_50": smas[50],
+        "ema_12": _mask_warmup(fast, MACD_FAST - 1, seen),
+        "ema_26": _mask_warmup(slow, MACD_SLOW - 1, seen),
+        "macd": line,
+        "macd_signal": sig,
+        "macd_hist": line - sig,
+        "rsi_14": rsi(close),
+        "bb_mid": mid,
+        "bb_upper": mid + band,
+        "bb_lower": mid - band,
+        "atr_14": atr(high, low, close),
+        "volatility_20": volatility(close),
+    }
+
+
+class IndicatorEngine:
+    """
+    Latest indicator values for a fixed ticker universe, kept up to date bar by bar.
+
+    Built once from history; `update` then folds in one new bar per ticker in
+    O(tickers x window) by carrying the recursive averages forward and keeping
+    only the trailing closes the window indicators need.
+    """
+
+    def __init__(self, tickers, high, low, close):
+        self.tickers = list(tickers)
+        high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+        self.bars = close.shape[1]
+        # Warm-up is per ticker: rows of shorter histories are NaN-padded on the left
+        self.counts = (~np.isnan(close)).sum(axis=1)
+        fast = _ewm(close, 2.0 / (MACD_FAST + 1))
+        slow = _ewm(close, 2.0 / (MACD_SLOW + 1))
+        self._ema_fast, self._ema_slow = fast[:, -1], slow[:, -1]
+        self._signal = _ewm(fast - slow, 2.0 / (MACD_SIGNAL + 1))[:, -1]
+        avg_gain, avg_loss = _rsi_averages(close, RSI_PERIOD)
+        self._avg_gain, self._avg_loss = avg_gain[:, -1], avg_loss[:, -1]
+        self._atr = _ewm(true_range(high, low, close), 1.0 / ATR_PERIOD)[:, -1]
+        self._capacity = max(max(SMA_WINDOWS), BOLLINGER_WINDOW, VOLATILITY_WINDOW + 1)
+        self._closes = close[:, -self._capacity:].copy()
+        self.values = self._latest()
+
+    @classmethod
+    def from_frame(cls, market_data):
+        tickers, arrays = wide_arrays(market_data)
+        return cls(tickers, arrays["high"], arrays["low"], arrays["close"])
+
+    def update(self, high, low, close):
+        """Adds one bar (1-D arrays in `tickers` order) and returns the new latest values."""
+        high, low, close = (np.asarray(a, dtype="float64") for a in (high, low, close))
+        prev_close = self._closes[:, -1]
+        fast, slow, sig = (2.0 / (n + 1) for n in (MACD_FAST, MACD_SLOW, MACD_SIGNAL))
+        self._ema_fast = _ewm_step(self._ema_fast, close, fast)
+        self._ema_slow = _ewm_step(self._ema_slow, close, slow)
+        self._signal = _ewm_step(self._signal, self._ema_fast - self._ema_slow, sig)
+        delta = close - prev_close
+        self._avg_gain = _ewm_step(self._avg_gain, np.clip(delta, 0, None), 1.0 / RSI_PERIOD)
+        self._avg_loss = _ewm_step(self._avg_loss, np.clip(-delta, 0, None), 1.0 / RSI_PERIOD)
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+        self._atr = _ewm_step(self._atr, tr, 1.0 / ATR_PERIOD)
+        keep = self._closes if self._closes.shape[1] < self._capacity else self._closes[:, 1:]
+        self._closes = np.concatenate([keep, close[:, None]], axis=1)
+        self.bars += 1
+        self.counts += ~np.isnan(close)
+        self.values = self._latest()
+        return self.values
+
+    def _window(self, window):
+        if self.bars < window:
+            return None
+        return self._closes[:, -window:]
+
+    def _ready(self, value, bars):
+        """`value` for tickers with at least `bars` bars of their own, NaN for the rest."""
+        return np.where(self.counts >= bars, value, np.nan)
+
+    def _latest(self):
+        n = len(self.tickers)
+        nan = np.full(n, np.nan)
+        values = {}
+        for window in SMA_WINDOWS:
+            closes = self._window(window)
+            values[f"sma_{window}"] = self._ready(closes.mean(axis=1), window) if closes is not None else nan
+        line = self._ema_fast - self._ema_slow
+        values["ema_12"] = self._ready(self._ema_fast, MACD_FAST)
+        values["ema_26"] = self._ready(self._ema_slow, MACD_SLOW)
+        values["macd"] = self._ready(line, MACD_SLOW)
+        values["macd_signal"] = self._ready(self._signal, MACD_SLOW + MACD_SIGNAL - 1)
+        values["macd_hist"] = values["macd"] - values["macd_signal"]
+        values["rsi_14"] = self._ready(_rsi_from_averages(self._avg_gain, self._avg_loss), RSI_PERIOD + 1)
+        closes = self._window(BOLLINGER_WINDOW)
+        if closes is not None:
+            mid, std = closes.mean(axis=1), closes.std(axis=1)
+            mid, std = self._ready(mid, BOLLINGER_WINDOW), self._ready(std, BOLLINGER_WINDOW)
+            values.update(bb_mid=mid, bb_upper=mid + BOLLINGER_K * std, bb_lower=mid - BOLLINGER_K * std)
+        else:
+            values.update(bb_mid=nan, bb_upper=nan, bb_lower=nan)
+        values["atr_14"] = self._ready(self._atr, ATR_PERIOD)
+        closes = self._window(VOLATILITY_WINDOW + 1)
+        if closes is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = np.log(closes[:, 1:] / closes[:, :-1])
+            values["volatility_20"] = self._ready(returns.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS),
+                                                  VOLATILITY_WINDOW + 1)
+        else:
+            values["volatility_20"] = nan
+        return values
+
+    def frame(self):
+        """Latest values as a DataFrame indexed by ticker."""
+        return pd.DataFrame(self.values, index=pd.Index(self.tickers, name="ticker"))[INDICATORS]
+
+
+def wide_arrays(market_data):
+    """
+    Pivots a long market-data frame into (tickers, {field: tickers x bars array})
+    in one pass. Each row holds that ticker's own bars with a valid close,
+    right-aligned so the last column is its latest session and shorter
+    histories are NaN-padded on the left. Nothing is forward-filled, so tickers
+    on different exchange calendars are never compared against copied bars.
+    """
+    fields = ["open", "high", "low", "close", "volume"]
+    frame = market_data[market_data["close"].notna()]
+    frame = frame.assign(ticker=frame["ticker"].astype(str)).sort_values(["ticker", "date"], kind="stable")
+    tickers, rows = np.unique(frame["ticker"].to_numpy(), return_inverse=True)
+    if len(frame) == 0:
+        return [], {field: np.empty((0, 0)) for field in fields}
+    # Position of each bar counted back from its ticker's latest bar
+    from_end = frame.groupby("ticker", sort=False).cumcount(ascending=False).to_numpy()
+    width = int(from_end.max()) + 1
+    columns = width - 1 - from_end
+    arrays = {}
+    for field in fields:
+        values = np.full((len(tickers), width), np.nan)
+        values[rows, columns] = frame[field].to_numpy(dtype="float64")
+        arrays[field] = values
+    return list(tickers), arrays
+
+
+def latest_indicators(market_data):
+    """Latest value of every indicator per ticker, as a DataFrame indexed by ticker."""
+    if market_data is None or len(market_data) == 0:
+        return pd.DataFrame(columns=INDICATORS, index=pd.Index([], name="ticker"))
+    return IndicatorEngine.from_frame(market_data).frame()
+
+
+def technical_signal(values):
+    """
+    Coarse label from one ticker's latest indicators: "Overbought"/"Oversold"
+    from RSI, else "Bullish"/"Bearish" when price vs the 50-day SMA and the
+    MACD histogram agree, else "Neutral". None while indicators are warming up.
+    """
+    rsi_value, close = values.get("rsi_14"), values.get("close")
+    sma_value, hist = values.get("sma_50"), values.get("macd_hist")
+    if rsi_value is None or np.isnan(rsi_value):
+        return None
+    if rsi_value >= 70:
+        return "Overbought"
+    if rsi_value <= 30:
+        return "Oversold"
+    if None in (close, sma_value, hist) or np.isnan(sma_value) or np.isnan(hist):
+        return "Neutral"
+    if close > sma_value and hist > 0:
+        return "Bullish"
+    if close < sma_value and hist < 0:
+        return "Bearish"
+    return "Neutral"
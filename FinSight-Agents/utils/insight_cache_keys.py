@@ -0,0 +1,78 @@
+import hashlib
+import math
+import threading
+from dataclasses import dataclass
+
+
+@dataclass
+class CanonicalKeyConfig:
+    """
+    Bucketing used to build feature-based insight cache keys.
+
+    price_bucket_pct:    width of a price-change bucket, in percentage points
+    volume_bucket_ratio: volume buckets are geometric; each is this many times the previous
+    max_staleness:       seconds a canonical entry may be served before it expires
+    """
+    price_bucket_pct: float = 0.5
+    volume_bucket_ratio: float = 2.0
+    max_staleness: float = 900.0
+
+
+def _headline_hash(headline):
+    normalized = " ".join((headline or "").lower().split())
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def canonical_features(meta, config):
+    """Reduces an insight_meta row to the coarse features that drive the insight."""
+    pct = meta.get("price_change_pct")
+    volume = meta.get("volume")
+    price_bucket = "na" if pct is None else str(math.floor(pct / config.price_bucket_pct))
+    if volume is None or volume <= 0 or (isinstance(volume, float) and math.isnan(volume)):
+        volume_bucket = "na"
+    else:
+        volume_bucket = str(math.floor(math.log(volume) / math.log(config.volume_bucket_ratio)))
+    return (
+        meta["ticker"],
+        meta.get("trend"),
+        meta.get("overall_sentiment"),
+        price_bucket,
+        volume_bucket,
+        _headline_hash(meta.get("top_headline")),
+        meta.get("technical_signal"),
+    )
+
+
+def canonical_insight_key(meta, config):
+    features = canonical_features(meta, config)
+    return hashlib.sha256(("insight:v2|" + "|".join(map(str, features))).encode()).hexdigest()
+
+
+class CacheKeyStats:
+    """Counts cache hits with exact prompt keys vs canonical keys over the same lookups."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.exact_hits = 0
+        self.canonical_hits = 0
+
+    def record(self, exact_hit, canonical_hit):
+        with self._lock:
+            self.lookups += 1
+            self.exact_hits += int(exact_hit)
+            self.canonical_hits += int(canonical_hit)
+
+    def report(self):
+        with self._lock:
+            lookups = self.lookups or 1
+            exact_rate = self.exact_hits / lookups
+            canonical_rate = self.canonical_hits / lookups
+            return {
+                "lookups": self.lookups,
+                "exact_hits": self.exact_hits,
+                "canonical_hits": self.canonical_hits,
+                "exact_hit_rate": round(exact_rate, 4),
+                "canonical_hit_rate": round(canonical_rate, 4),
+                "hit_rate_improvement": round(canonical_rate - exact_rate, 4),
+            }
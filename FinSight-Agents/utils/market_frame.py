@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+MARKET_COLUMNS = ["ticker", "date", "open", "high", "low", "close", "volume"]
+
+
+def empty_market_frame():
+    frame = pd.DataFrame({c: pd.Series(dtype="float64") for c in MARKET_COLUMNS})
+    frame["ticker"] = frame["ticker"].astype("category")
+    frame["date"] = pd.to_datetime(frame["date"])
+    return frame
+
+
+def to_long_frame(frame):
+    """
+    Converts a yfinance-shaped frame (Date index, (field, ticker) columns) into
+    the long market-data format: one row per ticker and date, columns
+    `MARKET_COLUMNS`, sorted by ticker then date. Rows without a close are dropped.
+
+    Built straight from the per-field 2-D arrays, so the cost is linear in
+    tickers x dates.
+    """
+    if frame is None or frame.empty or not isinstance(frame.columns, pd.MultiIndex):
+        return empty_market_frame()
+    tickers = list(dict.fromkeys(frame.columns.get_level_values(1)))
+    dates = frame.index.to_numpy()
+    fields = set(frame.columns.get_level_values(0))
+    data = {
+        "ticker": pd.Categorical(np.repeat(tickers, len(dates)), categories=tickers),
+        "date": np.tile(dates, len(tickers)),
+    }
+    for field in FIELDS:
+        if field in fields:
+            values = frame[field].reindex(columns=tickers).to_numpy(dtype="float64")
+            data[field.lower()] = values.T.ravel()
+        else:
+            data[field.lower()] = np.full(len(tickers) * len(dates), np.nan)
+    long = pd.DataFrame(data, columns=MARKET_COLUMNS)
+    return long[long["close"].notna()].reset_index(drop=True)
+
+
+def market_tickers(market_data):
+    """Tickers present in a long market-data frame, in frame order."""
+    if market_data is None or len(market_data) == 0:
+        return []
+    return list(pd.unique(market_data["ticker"].astype(str)))
+
+
+def latest_bars(market_data):
+    """Each ticker's most recent row, indexed by ticker."""
+    if market_data is None or len(market_data) == 0:
+        return empty_market_frame().set_index("ticker")
+    latest = market_data.sort_values(["ticker", "date"]).groupby("ticker", observed=True, sort=False).tail(1)
+    latest = latest.set_index(latest["ticker"].astype(str)).drop(columns="ticker")
+    latest.index.name = "ticker"
+    return latest
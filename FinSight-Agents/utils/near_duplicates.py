@@ -0,0 +1,91 @@
+import hashlib
+import os
+import re
+from functools import lru_cache
+import numpy as np
+
+SIMHASH_BITS = 64
+# Minimum SimHash similarity (1 - Hamming distance / 64) for two articles to count as one story
+NEWS_DUPLICATE_THRESHOLD = float(os.getenv("NEWS_DUPLICATE_THRESHOLD", "0.85"))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _features(text):
+    tokens = _TOKEN.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def simhash(text):
+    """64-bit SimHash of `text` over its words and word bigrams."""
+    features = _features(text)
+    if not features:
+        return 0
+    hashes = np.fromiter((_feature_hash(f) for f in features), dtype=np.uint64, count=len(features))
+    votes = ((hashes[:, None] >> _SHIFTS) & np.uint64(1)).sum(axis=0)
+    bits = (votes * 2 > len(features)).astype(np.uint64) << _SHIFTS
+    return int(np.bitwise_or.reduce(bits))
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def max_distance(threshold):
+    return int(SIMHASH_BITS * (1 - threshold) + 1e-9)
+
+
+def near_duplicate_clusters(texts, threshold=NEWS_DUPLICATE_THRESHOLD):
+    """
+    Cluster label for every text: the index of the first text of its cluster.
+
+    Texts within `max_distance(threshold)` bits of each other are joined.
+    Each hash is split into distance + 1 bands; by the pigeonhole principle two
+    hashes that close agree exactly on at least one band, so only texts sharing
+    a band bucket are compared and the batch is processed in roughly linear time.
+    """
+    hashes = [simhash(text) for text in texts]
+    distance = max_distance(threshold)
+    bands = min(distance + 1, SIMHASH_BITS)
+    width = SIMHASH_BITS // bands
+    parent = list(range(len(hashes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = {}
+    for i, value in enumerate(hashes):
+        for band in range(bands):
+            # The last band takes any leftover bits
+            bits = width if band < bands - 1 else SIMHASH_BITS - width * band
+            key = (band, (value >> (band * width)) & ((1 << bits) - 1))
+            for j in buckets.setdefault(key, []):
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j and hamming(value, hashes[j]) <= distance:
+                    # Keep the earliest text as the cluster's representative
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+            buckets[key].append(i)
+    return [find(i) for i in range(len(hashes))]
+
+
+def collapse_near_duplicates(articles, threshold=NEWS_DUPLICATE_THRESHOLD):
+    """
+    Keeps the first article of each near-duplicate cluster (by title and
+    description), in order, with a `duplicates` count of how many articles
+    it stands for.
+    """
+    texts = [(a.get("title") or "") + " " + (a.get("description") or "") for a in articles]
+    labels = near_duplicate_clusters(texts, threshold)
+    counts = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    return [{**articles[i], "duplicates": counts[i]} for i in range(len(articles)) if labels[i] == i]
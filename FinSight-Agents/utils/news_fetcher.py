@@ -1,6 +1,11 @@
+import asyncio
 import os
-import requests
+import weakref
+from functools import lru_cache
 from dotenv import load_dotenv
+from utils.news_router import ArticleRouter, combined_groups, combined_query
+from utils.news_store import get_news_store
+from utils.providers import NEWSAPI, uses_local_state
 
 load_dotenv()  # Loads variables from .env
 
@@ -13,21 +18,65 @@ FINANCIAL_SOURCES = [
 FINANCIAL_KEYWORDS = [
     "stock", "market", "share", "nse", "bse", "exchange", "price", "equity", "ipo", "sensex", "nifty"
 ]
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+NEWS_TIMEOUT = float(os.getenv("NEWS_TIMEOUT", "10"))  # seconds per request
+NEWS_MAX_CONCURRENCY = int(os.getenv("NEWS_MAX_CONCURRENCY", "8"))
+# Multi-company requests share combined queries; companies routed fewer than
+# NEWS_MIN_COVERAGE articles from them are fetched on their own instead.
+NEWS_COMBINED_QUERIES = os.getenv("NEWS_COMBINED_QUERIES", "1") == "1"
+NEWS_MIN_COVERAGE = int(os.getenv("NEWS_MIN_COVERAGE", "3"))
 
-def fetch_and_process_news(query, num_articles=5):
+@lru_cache(maxsize=None)
+def _session():
+    """Keep-alive connection pool for the synchronous path, created on first use."""
+    import requests
+    return requests.Session()
+
+def fetch_and_process_news(query, num_articles=5, store=None):
+    """
+    Financial news for `query`. Served from the local article store while the
+    query is fresh; otherwise only articles newer than the newest stored one
+    are requested, via the NewsAPI provider (recordable and replayable offline).
+    Recording and replaying skip the store, so the request never depends on it.
+    """
+    if not uses_local_state():
+        return NEWSAPI.call(_news_key(query, num_articles), lambda: _fetch_news_live(query, num_articles))
+    store = store or get_news_store()
+    if not store.is_fresh(query):
+        _, since = store.state(query)
+        fresh = NEWSAPI.call(_news_key(query, num_articles),
+                             lambda: _fetch_news_live(query, num_articles, since))
+        store.add(query, fresh)
+    return store.articles(query, num_articles)
+
+def _news_key(query, num_articles):
+    # Only the caller's inputs: `since` comes from the local store, which is only
+    # consulted in live mode, where nothing is recorded
+    return ("everything", query, num_articles)
+
+def _api_key():
     api_key = os.getenv("NEWSAPI_KEY")
     if not api_key:
         raise ValueError("NEWSAPI_KEY not found in environment variables.")
+    return api_key
+
+def _request_params(query, num_articles, since=None):
     # Query for both the term and financial context
-    search_query = f"{query} stock OR {query} share OR {query} market"
-    sources = ",".join(FINANCIAL_SOURCES)
-    url = (
-        f"https://newsapi.org/v2/everything?q={search_query}"
-        f"&language=en&pageSize={num_articles*2}&sources={sources}&apiKey={api_key}"
-    )
-    response = requests.get(url)
-    response.raise_for_status()
-    articles = response.json().get("articles", [])
+    return _search_params(f"{query} stock OR {query} share OR {query} market", num_articles * 2, since)
+
+def _search_params(search_query, page_size, since=None):
+    params = {
+        "q": search_query,
+        "language": "en",
+        "pageSize": page_size,
+        "sources": ",".join(FINANCIAL_SOURCES),
+        "apiKey": _api_key(),
+    }
+    if since:
+        params["from"] = since
+    return params
+
+def _process_articles(articles, num_articles):
     # Post-filter for financial keywords
     filtered = [
         {
@@ -43,10 +92,181 @@ def fetch_and_process_news(query, num_articles=5):
     ]
     return filtered[:num_articles]
 
+def _fetch_news_live(query, num_articles, since=None):
+    response = _session().get(NEWSAPI_URL, params=_request_params(query, num_articles, since), timeout=NEWS_TIMEOUT)
+    response.raise_for_status()
+    return _process_articles(response.json().get("articles", []), num_articles)
+
+class AsyncNewsClient:
+    """
+    Async NewsAPI client with one pooled keep-alive aiohttp session per event
+    loop, a per-request timeout and at most `max_concurrency` requests in
+    flight. Responses go through the same NewsAPI provider as
+    `fetch_and_process_news`, so recorded corpora work for both. With a
+    `store` (see utils/news_store.py), fresh queries are answered locally and
+    stale ones only ask for articles newer than the newest stored; the store
+    is not used while recording or replaying.
+    """
+
+    def __init__(self, max_concurrency=NEWS_MAX_CONCURRENCY, timeout=NEWS_TIMEOUT, store=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.store = store
+        # aiohttp sessions are bound to the loop that created them, and Streamlit
+        # runs each script execution on a fresh loop.
+        self._loop_state = weakref.WeakKeyDictionary()
+
+    def _state_for_loop(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None or state[0].closed:
+            import aiohttp
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            state = (session, asyncio.Semaphore(self.max_concurrency))
+            self._loop_state[loop] = state
+        return state
+
+    def _store(self):
+        # Recorded requests must not depend on what this machine has stored
+        return self.store if uses_local_state() else None
+
+    async def _get(self, params):
+        session, semaphore = self._state_for_loop()
+        async with semaphore:
+            async with session.get(NEWSAPI_URL, params=params) as response:
+                response.raise_for_status()
+                payload = await response.json()
+        return payload.get("articles", [])
+
+    async def _fetch_live(self, query, num_articles, since=None):
+        return _process_articles(await self._get(_request_params(query, num_articles, since)), num_articles)
+
+    async def fetch_combined(self, companies, num_articles=5, since=None):
+        """Financial articles mentioning any of `companies`, from a single request."""
+        query = combined_query(companies)
+        page_size = min(100, num_articles * 2 * len(companies))
+
+        async def live():
+            return _process_articles(await self._get(_search_params(query, page_size, since)), page_size)
+
+        return await NEWSAPI.call_async(_news_key(query, page_size), live)
+
+    async def fetch(self, query, num_articles=5, refresh=False):
+        """Articles for `query`; `refresh` skips the store's freshness check."""
+        store = self._store()
+        if store is None:
+            return await NEWSAPI.call_async(_news_key(query, num_articles),
+                                            lambda: self._fetch_live(query, num_articles))
+        if refresh or not store.is_fresh(query):
+            _, since = store.state(query)
+            fresh = await NEWSAPI.call_async(_news_key(query, num_articles),
+                                             lambda: self._fetch_live(query, num_articles, since))
+            store.add(query, fresh)
+        return store.articles(query, num_articles)
+
+    async def fetch_many(self, queries, num_articles=5, refresh=False):
+        """
+        Fetches all `queries` concurrently and yields `(query, articles, error)`
+        as each one finishes, so callers can start on the fastest results first.
+        A failed query yields an empty list and its exception.
+        """
+        async def fetch_one(query):
+            try:
+                return query, await self.fetch(query, num_articles, refresh), None
+            except Exception as e:
+                return query, [], e
+
+        for next_done in asyncio.as_completed([fetch_one(query) for query in dict.fromkeys(queries)]):
+            yield await next_done
+
+    async def fetch_many_combined(self, queries, num_articles=5, min_coverage=NEWS_MIN_COVERAGE):
+        """
+        Like `fetch_many`, but packs the queries (company names) into as few
+        combined NewsAPI requests as fit the query-length limit and routes each
+        returned article to the companies it mentions. Companies left with fewer
+        than `min_coverage` articles are then fetched one by one.
+        """
+        queries = list(dict.fromkeys(queries))
+        store = self._store()
+        if store is not None:
+            stale = []
+            for query in queries:
+                if store.is_fresh(query):
+                    yield query, store.articles(query, num_articles), None
+                else:
+                    stale.append(query)
+            queries = stale
+        if len(queries) < 2:
+            async for item in self.fetch_many(queries, num_articles):
+                yield item
+            return
+
+        async def fetch_group(group):
+            since = None
+            if store is not None:
+                # Newer than what every member has already seen
+                newest = [store.state(company)[1] for company in group]
+                since = min(newest) if all(newest) else None
+            try:
+                return group, await self.fetch_combined(group, num_articles, since), None
+            except Exception as e:
+                return group, [], e
+
+        router = ArticleRouter(queries)
+        thin = {}
+        groups = combined_groups(queries, num_articles * 2)
+        for next_done in asyncio.as_completed([fetch_group(group) for group in groups]):
+            group, articles, error = await next_done
+            routed = router.route(articles, num_articles)
+            for company in group:
+                available = routed[company]
+                if error is None and store is not None:
+                    # Count what is already stored too, but only mark the company
+                    # refreshed once it is known to be covered
+                    store.add(company, available, refreshed=False)
+                    available = store.articles(company, num_articles)
+                if error is None and len(available) >= min(min_coverage, num_articles):
+                    if store is not None:
+                        store.add(company, routed[company])
+                    yield company, available, None
+                else:
+                    thin[company] = available
+
+        async for company, articles, error in self.fetch_many(list(thin), num_articles, refresh=True):
+            # Keep whatever the combined query found if the single fetch fails too
+            yield company, (thin[company] if error is not None else articles), error
+
+    async def close(self):
+        """Closes the session bound to the running loop, if any."""
+        state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].close()
+
+NEWS_CLIENT = AsyncNewsClient(store=get_news_store())
+
 class NewsFetcherAdapter:
+    def __init__(self, client=None, combined=NEWS_COMBINED_QUERIES):
+        self.client = client or NEWS_CLIENT
+        self.combined = combined
+
     def get_news(self, query, num_articles):
         return fetch_and_process_news(query, num_articles)
 
+    def fetch_many(self, queries, num_articles):
+        if self.combined:
+            return self.client.fetch_many_combined(queries, num_articles)
+        return self.client.fetch_many(queries, num_articles)
+
+    def save_scores(self, scores, scorer=None):
+        """Keeps sentiment scores ({article id: compound}) from the `scorer` version with the stored articles."""
+        (self.client.store or get_news_store()).set_scores(scores, scorer)
+
+    async def close(self):
+        await self.client.close()
+
 if __name__ == "__main__":
     news = fetch_and_process_news("RELIANCE", num_articles=3)
     for article in news:
@@ -0,0 +1,78 @@
+import re
+from utils.symbol_master import get_symbol_master
+
+NEWSAPI_MAX_QUERY_LENGTH = 500  # NewsAPI rejects longer `q` values
+NEWSAPI_MAX_PAGE_SIZE = 100
+FINANCIAL_CONTEXT = "(stock OR share OR market)"
+
+
+def _term(text):
+    return f'"{text}"' if " " in text else text
+
+
+def combined_query(companies):
+    """One NewsAPI query covering every company in financial context."""
+    return "(" + " OR ".join(_term(company) for company in companies) + ") AND " + FINANCIAL_CONTEXT
+
+
+def combined_groups(companies, per_company=10, max_length=NEWSAPI_MAX_QUERY_LENGTH):
+    """
+    Packs companies into as few combined queries as possible, keeping each query
+    under NewsAPI's length limit and each group small enough that a single
+    page can hold `per_company` articles for every member.
+    """
+    max_companies = max(1, NEWSAPI_MAX_PAGE_SIZE // max(per_company, 1))
+    groups, current = [], []
+    for company in companies:
+        if current and (len(current) == max_companies or len(combined_query(current + [company])) > max_length):
+            groups.append(current)
+            current = []
+        current.append(company)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def entity_terms(company, master=None):
+    """Names an article may use for `company`: the query itself plus the symbol master's name and aliases."""
+    master = master or get_symbol_master()
+    terms = [company]
+    symbol = master.lookup(company)
+    record = master.get(symbol) if symbol else None
+    if record is not None:
+        terms += [record.name, *record.aliases]
+    return list(dict.fromkeys(terms))
+
+
+class ArticleRouter:
+    """
+    Assigns articles from a combined query back to the companies they mention.
+
+    Every company's terms are compiled into one case-insensitive, word-bounded
+    alternation (longest terms first), so routing an article is a single regex
+    scan over its title and description.
+    """
+
+    def __init__(self, companies, master=None):
+        self.companies = list(companies)
+        self._terms = {}  # lower-cased term -> company
+        for company in self.companies:
+            for term in entity_terms(company, master):
+                self._terms.setdefault(term.lower(), company)
+        pattern = "|".join(re.escape(term) for term in sorted(self._terms, key=len, reverse=True))
+        # Lookarounds rather than \b, which fails when a term starts or ends with
+        # punctuation (e.g. the "." of "Ltd." followed by a space)
+        self._regex = re.compile(rf"(?<!\w)(?:{pattern})(?!\w)", re.IGNORECASE)
+
+    def companies_for(self, article):
+        text = (article.get("title") or "") + " " + (article.get("description") or "")
+        return list(dict.fromkeys(self._terms[match.lower()] for match in self._regex.findall(text)))
+
+    def route(self, articles, num_articles):
+        """{company: up to `num_articles` articles mentioning it}; an article can belong to several companies."""
+        routed = {company: [] for company in self.companies}
+        for article in articles:
+            for company in self.companies_for(article):
+                if len(routed[company]) < num_articles:
+                    routed[company].append(article)
+        return routed
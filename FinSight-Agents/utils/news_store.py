@@ -0,0 +1,185 @@
+import hashlib
+import os
+import sqlite3
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+NEWS_STORE_PATH = os.getenv(
+    "NEWS_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "news", "news.db"),
+)
+# Seconds a query's stored articles are served without asking NewsAPI again
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "900"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id              TEXT PRIMARY KEY,
+    url             TEXT,
+    title           TEXT,
+    description     TEXT,
+    content         TEXT,
+    source          TEXT,
+    published_at    TEXT,
+    fetched_at      REAL NOT NULL,
+    sentiment_score REAL,
+    sentiment_scorer TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS query_articles (
+    query      TEXT NOT NULL,
+    article_id TEXT NOT NULL,
+    PRIMARY KEY (query, article_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS queries (
+    query            TEXT PRIMARY KEY,
+    refreshed_at     REAL NOT NULL,
+    newest_published TEXT
+) WITHOUT ROWID;
+"""
+
+_ARTICLE_FIELDS = ("title", "content", "description", "url", "published_at", "source")
+# Query parameters that only track the click, never pick the story; dropped from article ids
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "ref", "ref_src", "cmpid", "ocid", "smid", "s_cid", "guccounter",
+}
+
+
+def article_id(article):
+    """
+    Hash of the article's URL without fragment or tracking parameters (`utm_*`
+    and TRACKING_PARAMS), so the same story reached through different queries
+    or tracking links is stored once. Other query parameters are kept, sorted,
+    since some publishers pick the story by them (`article.php?id=123`).
+    Articles without a URL fall back to source and title.
+    """
+    url = article.get("url")
+    if url:
+        parts = urlsplit(url)
+        params = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                        if not name.lower().startswith("utm_") and name.lower() not in TRACKING_PARAMS)
+        key = parts.netloc.lower() + parts.path.rstrip("/") + ("?" + urlencode(params) if params else "")
+    else:
+        key = f"{article.get('source')}|{article.get('title')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class NewsStore:
+    """
+    SQLite store of fetched news articles, in WAL mode like the Gemini cache.
+
+    Articles are keyed by `article_id` and linked to every query that returned
+    them. Each query remembers when it was last refreshed and the newest
+    `published_at` seen, so refreshes only need to ask for newer articles.
+    Sentiment scores are stored on the article with the version of the scorer
+    that produced them, so it is only scored once per scorer.
+    """
+
+    def __init__(self, path=NEWS_STORE_PATH, ttl=NEWS_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+        if "sentiment_scorer" not in columns:
+            conn.execute("ALTER TABLE articles ADD COLUMN sentiment_scorer TEXT")
+        return conn
+
+    def state(self, query):
+        """(refreshed_at, newest_published) for `query`, or (None, None) if it was never fetched."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT refreshed_at, newest_published FROM queries WHERE query = ?", (query,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row if row else (None, None)
+
+    def is_fresh(self, query, now=None):
+        refreshed_at, _ = self.state(query)
+        return refreshed_at is not None and (now or time.time()) - refreshed_at < self.ttl
+
+    def add(self, query, articles, now=None, refreshed=True):
+        """
+        Stores `articles` under `query` and returns how many were not stored
+        before. With `refreshed` the query is also marked as refreshed now.
+        """
+        now = now or time.time()
+        rows = [(article_id(a),) + tuple(a.get(field) for field in _ARTICLE_FIELDS) + (now,) for a in articles]
+        newest = max((a["published_at"] for a in articles if a.get("published_at")), default=None)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles (id, title, content, description, url, published_at, source, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = conn.total_changes - before
+            conn.executemany(
+                "INSERT OR IGNORE INTO query_articles (query, article_id) VALUES (?, ?)",
+                [(query, row[0]) for row in rows],
+            )
+            if refreshed:
+                conn.execute(
+                    "INSERT INTO queries (query, refreshed_at, newest_published) VALUES (?, ?, ?) "
+                    "ON CONFLICT (query) DO UPDATE SET refreshed_at = excluded.refreshed_at, "
+                    "newest_published = NULLIF(MAX(COALESCE(newest_published, ''), "
+                    "COALESCE(excluded.newest_published, '')), '')",
+                    (query, now, newest),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return added
+
+    def articles(self, query, limit=10):
+        """The newest `limit` stored articles for `query`, with their `id`, `sentiment_score` and `sentiment_scorer`."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT a.id, a.title, a.content, a.description, a.url, a.published_at, a.source, a.sentiment_score, "
+                "a.sentiment_scorer "
+                "FROM query_articles q JOIN articles a ON a.id = q.article_id WHERE q.query = ? "
+                "ORDER BY a.published_at DESC, a.fetched_at DESC LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            dict(zip(("id",) + _ARTICLE_FIELDS + ("sentiment_score", "sentiment_scorer"), row))
+            for row in rows
+        ]
+
+    def set_scores(self, scores, scorer=None):
+        """Saves sentiment scores given as {article_id: compound score}, produced by the `scorer` version."""
+        if not scores:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE articles SET sentiment_score = ?, sentiment_scorer = ? WHERE id = ?",
+                [(score, scorer, key) for key, score in scores.items()],
+            )
+        finally:
+            conn.close()
+
+
+_STORE = None
+
+
+def get_news_store():
+    """Process-wide NewsStore at NEWS_STORE_PATH."""
+    global _STORE
+    if _STORE is None:
+        _STORE = NewsStore()
+    return _STORE
@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import pandas as pd
+from utils.providers import YFINANCE, current_date, uses_local_state
+
+OHLCV_STORE_DIR = os.getenv(
+    "OHLCV_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ohlcv"),
+)
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+_COVERAGE_KEY = b"finsight.coverage"
+
+
+def download_range(symbols, start, end, interval="1d"):
+    """
+    Raw yfinance download for [start, end); (field, symbol) MultiIndex columns.
+    Every network fetch of price data goes through here and the yfinance
+    provider, so it can be recorded and replayed offline. While recording or
+    replaying, the store asks for whole requested ranges rather than its own
+    gaps (see `OHLCVStore.get_history`), so the key only holds the caller's inputs.
+    """
+    return YFINANCE.call(("download_range", list(symbols), str(start), str(end), interval),
+                         lambda: _download_range(symbols, start, end, interval))
+
+
+def _download_range(symbols, start, end, interval="1d"):
+    import yfinance as yf  # only needed when the store has a gap to fill
+    return yf.download(tickers=symbols, start=start, end=end, interval=interval, progress=False)
+
+
+def _day(value):
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts.normalize()
+
+
+def merge_ranges(ranges):
+    """Merges overlapping or touching [start, end) ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(covered, start, end):
+    """Parts of [start, end) not inside any covered range."""
+    gaps, cursor = [], start
+    for c_start, c_end in merge_ranges(covered):
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def period_to_range(period, today=None):
+    """
+    Translates a yfinance period ("1d", "5d", "1mo", "1y", "ytd", "max") into a
+    [start, end) date range plus, for day periods, the number of trailing bars to keep.
+    """
+    today = _day(today or current_date())
+    end = today + pd.Timedelta(days=1)
+    if period == "max":
+        return pd.Timestamp("1970-01-01"), end, None
+    if period == "ytd":
+        return pd.Timestamp(year=today.year, month=1, day=1), end, None
+    if period.endswith("mo"):
+        return today - pd.DateOffset(months=int(period[:-2])), end, None
+    if period.endswith("y"):
+        return today - pd.DateOffset(years=int(period[:-1])), end, None
+    if period.endswith("d"):
+        bars = int(period[:-1])
+        # Enough calendar days to cover `bars` sessions across weekends and holidays
+        return today - pd.Timedelta(days=bars * 2 + 7), end, bars
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def _empty_bars():
+    # A DatetimeIndex even when empty, so date comparisons on it still work
+    return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], name="Date"), dtype="float64")
+
+
+def _has_sessions(start, end):
+    """Whether [start, end) contains a weekday, i.e. a range a fetch should return bars for."""
+    return len(pd.bdate_range(start, end - pd.Timedelta(days=1))) > 0
+
+
+def _ticker_slice(frame, ticker):
+    """Long (Date-indexed, OHLCV columns) frame for one ticker out of a yfinance frame."""
+    if frame is None or frame.empty:
+        return _empty_bars()
+    if isinstance(frame.columns, pd.MultiIndex):
+        if ticker not in frame.columns.get_level_values(1):
+            return _empty_bars()
+        frame = frame.xs(ticker, axis=1, level=1)
+    frame = frame.reindex(columns=FIELDS).dropna(how="all")
+    if getattr(frame.index, "tz", None) is not None:
+        frame.index = frame.index.tz_localize(None)
+    frame.index.name = "Date"
+    return frame
+
+
+class OHLCVStore:
+    """
+    Local Parquet store of OHLCV bars, one file per ticker and interval:
+
+        {root}/interval=1d/AAPL.parquet
+
+    Each file records the [start, end) date ranges it fully covers in its
+    Parquet metadata, so a request only downloads the missing gaps. Ranges are
+    never marked covered past the start of today, so the current session's bar
+    is always refreshed.
+    """
+
+    def __init__(self, root=OHLCV_STORE_DIR, fetch=download_range):
+        self.root = root
+        self.fetch = fetch
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.root, f"interval={interval}", f"{ticker.replace('/', '_')}.parquet")
+
+    def _lock(self, ticker, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((ticker, interval), threading.Lock())
+
+    def read(self, ticker, interval="1d"):
+        """Returns (bars, covered ranges) for one ticker."""
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            return _empty_bars(), []
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        raw = (table.schema.metadata or {}).get(_COVERAGE_KEY, b"[]")
+        ranges = [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in json.loads(raw)]
+        bars = table.to_pandas()
+        bars.index.name = "Date"
+        return bars, ranges
+
+    def write(self, ticker, interval, bars, ranges):
+        path = self._path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(bars.astype("float64"), preserve_index=True)
+        coverage = json.dumps([(s.isoformat(), e.isoformat()) for s, e in merge_ranges(ranges)])
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), _COVERAGE_KEY: coverage.encode()})
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)  # atomic, so concurrent readers never see a partial file
+
+    def get_history(self, tickers, start, end, interval="1d"):
+        """
+        Bars for `tickers` in [start, end) as a yfinance-shaped frame with
+        (field, ticker) columns. Only gaps missing from the store are downloaded,
+        batched across tickers that share the same gap.
+
+        While recording or replaying provider calls the store is bypassed: the
+        whole range is requested for all `tickers` at once and nothing is
+        written, so what is on disk changes neither the request nor the answer.
+        """
+        start, end = _day(start), _day(end)
+        cutoff = _day(current_date())
+        local = uses_local_state()
+        stored, plans = {}, {}
+        for ticker in tickers:
+            stored[ticker] = self.read(ticker, interval) if local else (_empty_bars(), [])
+            for gap in missing_ranges(stored[ticker][1], start, end):
+                plans.setdefault(gap, []).append(ticker)
+
+        for (gap_start, gap_end), group in plans.items():
+            frame = self.fetch(group, gap_start.date().isoformat(), gap_end.date().isoformat(), interval)
+            if not local:
+                stored.update((ticker, (_ticker_slice(frame, ticker), [])) for ticker in group)
+                continue
+            for ticker in group:
+                with self._lock(ticker, interval):
+                    bars, ranges = self.read(ticker, interval)
+                    fresh = _ticker_slice(frame, ticker)
+                    if not fresh.empty:
+                        bars = pd.concat([bars, fresh]) if not bars.empty else fresh
+                        bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+                    # A gap only counts as covered once it returned bars (or holds no sessions at all);
+                    # an empty answer from a delisted symbol or a failed download is retried next time
+                    covered = min(gap_end, cutoff)
+                    if gap_start < cutoff and (not fresh.empty or not _has_sessions(gap_start, covered)):
+                        ranges = ranges + [(gap_start, covered)]
+                    elif fresh.empty:
+                        continue
+                    self.write(ticker, interval, bars, ranges)
+                    stored[ticker] = (bars, ranges)
+
+        pieces = {}
+        for ticker in tickers:
+            bars = stored[ticker][0]
+            bars = bars[(bars.index >= start) & (bars.index < end)]
+            if not bars.empty:
+                pieces[ticker] = bars
+        if not pieces:
+            return pd.DataFrame()
+        frame = pd.concat(pieces, axis=1, names=["Ticker", "Price"]).swaplevel(0, 1, axis=1)
+        return frame.sort_index(axis=1, level=0)
+
+    def get_period(self, tickers, period="1d", interval="1d"):
+        """Like `yf.download(period=...)`, served from the store."""
+        start, end, bars = period_to_range(period)
+        frame = self.get_history(tickers, start, end, interval)
+        if frame.empty or bars is None:
+            return frame
+        # Keep each ticker's last `bars` sessions (exchanges may trade on different days);
+        # sessions are calendar dates, so intraday intervals keep every bar of those days
+        keep = set()
+        for ticker in tickers:
+            if ('Close', ticker) in frame.columns:
+                index = frame[('Close', ticker)].dropna().index
+                sessions = index.normalize().unique()[-bars:]
+                keep.update(index[index.normalize().isin(sessions)])
+        return frame.loc[sorted(keep)]
+
+
+_STORE = None
+
+
+def get_ohlcv_store():
+    global _STORE
+    if _STORE is None:
+        _STORE = OHLCVStore()
+    return _STORE
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import pandas as pd
+
+# live:   call the real service
+# record: call the real service and save every response (and its latency) to the corpus
+# replay: serve responses from the corpus only; never touches the network
+PROVIDER_MODE = os.getenv("FINSIGHT_PROVIDER_MODE", "live")
+CORPUS_PATH = os.getenv(
+    "FINSIGHT_CORPUS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "corpus", "corpus.db"),
+)
+# Multiplier on recorded latency injected during replay; 0 serves instantly
+REPLAY_LATENCY_SCALE = float(os.getenv("FINSIGHT_REPLAY_LATENCY", "0"))
+# Fixed "today" (YYYY-MM-DD) for period ranges; by default live runs use the
+# wall clock and replays the date the corpus was recorded on
+FINSIGHT_TODAY = os.getenv("FINSIGHT_TODAY")
+
+MODES = ("live", "record", "replay")
+
+
+class ReplayMiss(LookupError):
+    """Replay mode was asked for a call that is not in the corpus."""
+
+
+class Corpus:
+    """
+    Recorded responses in one SQLite file, keyed by (service, request hash).
+    Payloads are zlib-compressed bytes; the codec for each service decides
+    how they are encoded.
+    """
+
+    def __init__(self, path=CORPUS_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS calls (
+                    service TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    latency REAL NOT NULL,
+                    recorded_at REAL NOT NULL,
+                    PRIMARY KEY (service, key)
+                ) WITHOUT ROWID
+                """
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, service, key):
+        """Returns (payload bytes, latency seconds) or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, latency FROM calls WHERE service = ? AND key = ?", (service, key)
+            ).fetchone()
+        return (zlib.decompress(row[0]), row[1]) if row else None
+
+    def put(self, service, key, payload, latency):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO calls (service, key, payload, latency, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (service, key, zlib.compress(payload, 6), latency, time.time()),
+            )
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+
+
+class JsonCodec:
+    @staticmethod
+    def encode(value):
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    @staticmethod
+    def decode(payload):
+        return json.loads(payload)
+
+
+class FrameCodec:
+    """DataFrames as Parquet bytes (keeps MultiIndex columns and the Date index)."""
+
+    @staticmethod
+    def encode(frame):
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def decode(payload):
+        return pd.read_parquet(io.BytesIO(payload))
+
+
+def request_key(parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+_STATE = {"mode": PROVIDER_MODE, "corpus": None, "latency_scale": REPLAY_LATENCY_SCALE, "today": FINSIGHT_TODAY,
+          "date_saved": False}
+_STATE_LOCK = threading.Lock()
+
+
+def configure(mode, corpus_path=None, latency_scale=None, today=None):
+    """
+    Switches every provider to `mode` ("live", "record" or "replay") at runtime.
+    `today` pins the date period ranges are computed from (see `current_date`).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown provider mode: {mode}")
+    with _STATE_LOCK:
+        _STATE["mode"] = mode
+        _STATE["corpus"] = Corpus(corpus_path) if corpus_path else None
+        _STATE["today"] = today or FINSIGHT_TODAY
+        _STATE["date_saved"] = False
+        if latency_scale is not None:
+            _STATE["latency_scale"] = latency_scale
+
+
+def provider_mode():
+    return _STATE["mode"]
+
+
+def _corpus():
+    with _STATE_LOCK:
+        if _STATE["corpus"] is None:
+            _STATE["corpus"] = Corpus()
+        return _STATE["corpus"]
+
+
+def uses_local_state():
+    """
+    Whether local stores of earlier responses (the OHLCV and news stores) may
+    shape requests. Not while recording or replaying: the corpus is keyed on
+    the caller's inputs only, so it replays the same on any machine.
+    """
+    return provider_mode() == "live"
+
+
+def current_date():
+    """
+    The date "today" for period ranges like "6mo". Live runs use the wall clock.
+    Recording saves the date to the corpus, and replay reuses it, so a corpus
+    recorded on one day still replays on the next. A date pinned with
+    `configure(today=...)` or FINSIGHT_TODAY overrides both.
+    """
+    today, mode = _STATE["today"], provider_mode()
+    if mode == "record" and not _STATE["date_saved"]:
+        today = pd.Timestamp(today or pd.Timestamp.now()).date().isoformat()
+        _corpus().put("clock", "today", JsonCodec.encode(today), 0.0)
+        with _STATE_LOCK:
+            _STATE["today"], _STATE["date_saved"] = today, True
+    elif today is None:
+        if mode == "live":
+            return pd.Timestamp.now().normalize()
+        hit = _corpus().get("clock", "today")
+        if hit is None:
+            raise ReplayMiss("The corpus has no recorded date")
+        today = JsonCodec.decode(hit[0])
+        with _STATE_LOCK:
+            _STATE["today"] = today
+    return pd.Timestamp(today).normalize()
+
+
+class Provider:
+    """
+    Record/replay wrapper around one external service.
+
+    `call(parts, fn)` runs `fn()` in live mode; in record mode it also stores
+    the result under a hash of `parts`; in replay mode it returns the stored
+    result (sleeping for the recorded latency times the replay latency scale)
+    and raises ReplayMiss if there is none. `call_async` is the same for
+    coroutine functions.
+    """
+
+    def __init__(self, service, codec=JsonCodec):
+        self.service = service
+        self.codec = codec
+
+    def _replay(self, parts):
+        hit = _corpus().get(self.service, request_key(parts))
+        if hit is None:
+            raise ReplayMiss(f"No recorded {self.service} response for {parts!r}")
+        payload, latency = hit
+        return self.codec.decode(payload), latency * _STATE["latency_scale"]
+
+    def _record(self, parts, value, started):
+        _corpus().put(self.service, request_key(parts), self.codec.encode(value), time.perf_counter() - started)
+
+    def call(self, parts, fn):
+        mode = provider_mode()
+        if mode == "replay":
+            value, delay = self._replay(parts)
+            if delay:
+                time.sleep(delay)
+            return value
+        started = time.perf_counter()
+        value = fn()
+        if mode == "record":
+            self._record(parts, value, started)
+        return value
+
+    async def call_async(self, parts, fn):
+        mode = provider_mode()
+        if mode == "replay":
+            value, delay = self._replay(parts)
+            if delay:
+                await asyncio.sleep(delay)
+            return value
+        started = time.perf_counter()
+        value = await fn()
+        if mode == "record":
+            self._record(parts, value, started)
+        return value
+
+
+YFINANCE = Provider("yfinance", FrameCodec)
+NEWSAPI = Provider("newsapi")
+GEMINI = Provider("gemini")
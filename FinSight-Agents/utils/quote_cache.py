@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "60"))
+
+# (timezone, open, close) per exchange; weekday sessions only, holidays are not modelled.
+SESSIONS = {
+    "NSE": (ZoneInfo("Asia/Kolkata"), dtime(9, 15), dtime(15, 30)),
+    "US": (ZoneInfo("America/New_York"), dtime(9, 30), dtime(16, 0)),
+}
+SUFFIX_EXCHANGES = {".NS": "NSE", ".BO": "NSE"}
+
+
+def exchange_for(symbol):
+    for suffix, exchange in SUFFIX_EXCHANGES.items():
+        if symbol.upper().endswith(suffix):
+            return exchange
+    return "US"
+
+
+def is_market_open(symbol, now=None):
+    tz, open_at, close_at = SESSIONS[exchange_for(symbol)]
+    local = datetime.fromtimestamp(now if now is not None else time.time(), tz)
+    return local.weekday() < 5 and open_at <= local.time() < close_at
+
+
+def next_open(symbol, now=None):
+    """Epoch seconds of the next session open strictly after `now`."""
+    tz, open_at, _ = SESSIONS[exchange_for(symbol)]
+    local = datetime.fromtimestamp(now if now is not None else time.time(), tz)
+    day = local.date()
+    while True:
+        candidate = datetime.combine(day, open_at, tz)
+        if candidate > local and candidate.weekday() < 5:
+            return candidate.timestamp()
+        day += timedelta(days=1)
+
+
+def quote_expiry(symbol, now=None, open_ttl=QUOTE_CACHE_TTL):
+    """
+    When a quote fetched at `now` goes stale: `open_ttl` seconds while the
+    market is open (but never past the close, so the closing bar is picked
+    up), otherwise at the next open.
+    """
+    now = now if now is not None else time.time()
+    tz, _, close_at = SESSIONS[exchange_for(symbol)]
+    if is_market_open(symbol, now):
+        local = datetime.fromtimestamp(now, tz)
+        close = datetime.combine(local.date(), close_at, tz).timestamp()
+        return min(now + open_ttl, close)
+    return next_open(symbol, now)
+
+
+class QuoteCache:
+    """
+    In-process cache of per-ticker quotes, shared by every agent.
+
+    Keys are (ticker, period, interval); entries expire by the ticker's
+    exchange session (see `quote_expiry`).
+    """
+
+    def __init__(self, open_ttl=QUOTE_CACHE_TTL, clock=time.time):
+        self.open_ttl = open_ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        expires_at = quote_expiry(key[0], self.clock(), self.open_ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+
+    def get_many(self, keys):
+        """Returns ({key: value} for fresh hits, [keys that missed])."""
+        hits, misses = {}, []
+        for key in keys:
+            value = self.get(key)
+            if value is None:
+                misses.append(key)
+            else:
+                hits[key] = value
+        return hits, misses
+
+    def set_many(self, mapping):
+        for key, value in mapping.items():
+            self.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+QUOTE_CACHE = QuoteCache()
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from utils.indicators import TRADING_DAYS, log_returns, wide_arrays
+
+VOLUME_LOOKBACK = 20
+VOLATILITY_LOOKBACK = 20
+
+
+def _last_change_pct(close):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (close[:, -1] / close[:, -2] - 1) * 100 if close.shape[1] > 1 else np.full(len(close), np.nan)
+
+
+def pct_move(arrays):
+    """Size of the latest day's move, either direction."""
+    return np.abs(_last_change_pct(arrays["close"]))
+
+
+def gainers(arrays):
+    return _last_change_pct(arrays["close"])
+
+
+def losers(arrays):
+    return -_last_change_pct(arrays["close"])
+
+
+def volume_spike(arrays):
+    """Latest volume relative to the average of the previous `VOLUME_LOOKBACK` days."""
+    volume = arrays["volume"]
+    if volume.shape[1] < 2:
+        return np.full(len(volume), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return volume[:, -1] / np.nanmean(volume[:, -VOLUME_LOOKBACK - 1:-1], axis=1)
+
+
+def volatility(arrays):
+    """Annualized standard deviation of the last `VOLATILITY_LOOKBACK` daily log returns."""
+    returns = log_returns(arrays["close"])[:, -VOLATILITY_LOOKBACK:]
+    if returns.shape[1] < 3:
+        return np.full(len(returns), np.nan)
+    return np.nanstd(returns, axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+
+
+SCREEN_CRITERIA = {
+    "pct_move": pct_move,
+    "gainers": gainers,
+    "losers": losers,
+    "volume_spike": volume_spike,
+    "volatility": volatility,
+}
+
+
+def _percentile_ranks(values):
+    """Rank of each value in [0, 1] (higher value, higher rank); NaN ranks lowest."""
+    filled = np.where(np.isnan(values), -np.inf, values)
+    order = filled.argsort(kind="stable")
+    ranks = np.empty(len(values))
+    ranks[order] = np.arange(len(values))
+    return ranks / max(len(values) - 1, 1)
+
+
+def screen(market_data, criteria=("pct_move",), top_n=10):
+    """
+    Ranks every ticker in a long market-data frame and returns the top `top_n`.
+
+    `criteria` is a criterion name, a list of names (equal weights) or a
+    {name: weight} dict; see `SCREEN_CRITERIA`. With several criteria the
+    score is the weighted mean of each criterion's percentile rank, so
+    criteria on different scales combine fairly.
+
+    Returns:
+        pd.DataFrame: indexed by ticker, one column per criterion, the latest
+        `close` and `score`, best first.
+    """
+    if isinstance(criteria, str):
+        criteria = [criteria]
+    weights = dict(criteria) if isinstance(criteria, dict) else {name: 1.0 for name in criteria}
+    unknown = set(weights) - set(SCREEN_CRITERIA)
+    if unknown:
+        raise ValueError(f"Unknown screen criteria: {', '.join(sorted(unknown))}")
+    if market_data is None or len(market_data) == 0:
+        return pd.DataFrame(columns=list(weights) + ["close", "score"])
+
+    tickers, arrays = wide_arrays(market_data)
+    metrics = {name: SCREEN_CRITERIA[name](arrays) for name in weights}
+    if len(weights) == 1:
+        score = next(iter(metrics.values()))
+    else:
+        total = sum(weights.values())
+        score = sum(weights[name] * _percentile_ranks(values) for name, values in metrics.items()) / total
+    result = pd.DataFrame(metrics, index=pd.Index(tickers, name="ticker"))
+    result["close"] = arrays["close"][:, -1]
+    result["score"] = score
+    result = result[result["score"].notna()]
+    return result.sort_values("score", ascending=False, kind="stable").head(top_n)
@@ -0,0 +1,455 @@
+import asyncio
+import hashlib
+import os
+import queue
+import sqlite3
+import string
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
+
+# Largest difference from nltk's `polarity_scores(text)["compound"]`, which
+# rounds to 4 decimals; the batch scorer returns the unrounded value.
+VADER_TOLERANCE = 1e-4
+# Batches larger than this are split across worker processes when `processes` is set
+VADER_CHUNK_SIZE = int(os.getenv("VADER_CHUNK_SIZE", "20000"))
+# "vader" (lexicon, default) or "finbert" (local transformers model)
+SENTIMENT_SCORER = os.getenv("SENTIMENT_SCORER", "vader")
+FINBERT_MODEL = os.getenv("FINBERT_MODEL", "ProsusAI/finbert")
+SENTIMENT_CACHE_PATH = os.getenv(
+    "SENTIMENT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sentiment", "scores.db"),
+)
+# Seconds the micro-batcher waits for more requests before calling the scorer
+SENTIMENT_BATCH_WAIT = float(os.getenv("SENTIMENT_BATCH_WAIT", "0.01"))
+
+_SO_THIS = ("so", "this")
+
+
+@lru_cache(maxsize=None)
+def load_vader_analyzer():
+    """
+    nltk's SentimentIntensityAnalyzer, built once per process. nltk is only
+    imported here, and the VADER lexicon is downloaded the first time it is
+    missing.
+    """
+    import nltk
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    try:
+        nltk.data.find("sentiment/vader_lexicon.zip")
+    except LookupError:
+        nltk.download("vader_lexicon", quiet=True)
+    return SentimentIntensityAnalyzer()
+
+
+class SentimentScorer(ABC):
+    """
+    A sentiment backend: `score(texts)` returns one compound score in [-1, 1]
+    per text as a NumPy array. `version` must change whenever scores could
+    (model, lexicon or rules), since cached scores are keyed by it, and
+    `max_batch_size` is the most texts to pass in one call (None: no limit).
+    """
+
+    version = None
+    max_batch_size = None
+
+    @abstractmethod
+    def score(self, texts):
+        pass
+
+    def polarity_scores(self, text):
+        """Compound-only stand-in for nltk's API, for callers that score one text."""
+        return {"compound": round(float(self.score([text])[0]), 4)}
+
+
+class VaderBatchScorer(SentimentScorer):
+    """
+    Batch VADER: `score(texts)` returns a NumPy array of compound scores that
+    match nltk's SentimentIntensityAnalyzer within VADER_TOLERANCE.
+
+    The rules are nltk's, ported so that each text is tokenized once with
+    precompiled sets instead of nltk's per-text punctuation x word product
+    table. Texts with no lexicon word skip the rules entirely, duplicate texts
+    are scored once, and the final normalization and punctuation emphasis
+    run vectorized over the batch. `processes` spreads large batches over a
+    process pool.
+    """
+
+    def __init__(self, analyzer=None):
+        analyzer = analyzer or load_vader_analyzer()
+        constants = analyzer.constants
+        self.lexicon = analyzer.lexicon
+        self.booster = constants.BOOSTER_DICT
+        self.negate = constants.NEGATE
+        self.idioms = constants.SPECIAL_CASE_IDIOMS
+        self.c_incr = constants.C_INCR
+        self.b_decr = constants.B_DECR
+        self.n_scalar = constants.N_SCALAR
+        self._punc = frozenset(constants.PUNC_LIST)
+        self._punc_lengths = sorted({len(p) for p in constants.PUNC_LIST})
+        self._punc_chars = frozenset(string.punctuation)
+        # Words that can take part in an idiom or multi-word booster; without
+        # one nearby, the idiom check cannot change a valence
+        self._idiom_words = frozenset(
+            word for phrase in list(self.idioms) + [b for b in self.booster if " " in b] for word in phrase.split()
+        )
+        self._remove_punctuation = constants.REGEX_REMOVE_PUNCTUATION
+        lexicon_hash = hashlib.sha1(repr(sorted(self.lexicon.items())).encode("utf-8")).hexdigest()[:12]
+        self.version = f"vader-1:{lexicon_hash}"
+
+    def tokens(self, text):
+        """nltk's SentiText.words_and_emoticons: tokens longer than one character, edge punctuation stripped."""
+        words_only = {w for w in self._remove_punctuation.sub("", text).split() if len(w) > 1}
+        tokens = []
+        for token in text.split():
+            if len(token) < 2:
+                continue
+            if token[-1] in self._punc_chars:
+                for k in self._punc_lengths:
+                    if token[-k:] in self._punc and token[:-k] in words_only:
+                        token = token[:-k]
+                        break
+            if token[0] in self._punc_chars and token not in words_only:
+                for k in self._punc_lengths:
+                    if token[:k] in self._punc and token[k:] in words_only:
+                        token = token[k:]
+                        break
+            tokens.append(token)
+        return tokens
+
+    def _negated(self, word):
+        lower = word.lower()
+        return lower in self.negate or "n't" in lower
+
+    def _booster_scalar(self, word, valence, is_cap_diff):
+        scalar = self.booster.get(word.lower(), 0.0)
+        if scalar:
+            if valence < 0:
+                scalar = -scalar
+            if is_cap_diff and word.isupper():
+                scalar += self.c_incr if valence > 0 else -self.c_incr
+        return scalar
+
+    def _idioms(self, valence, words, i):
+        idioms = self.idioms
+        onezero = f"{words[i - 1]} {words[i]}"
+        twoonezero = f"{words[i - 2]} {words[i - 1]} {words[i]}"
+        twoone = f"{words[i - 2]} {words[i - 1]}"
+        threetwoone = f"{words[i - 3]} {words[i - 2]} {words[i - 1]}"
+        threetwo = f"{words[i - 3]} {words[i - 2]}"
+        for seq in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if seq in idioms:
+                valence = idioms[seq]
+                break
+        if len(words) - 1 > i:
+            zeroone = f"{words[i]} {words[i + 1]}"
+            if zeroone in idioms:
+                valence = idioms[zeroone]
+        if len(words) - 1 > i + 1:
+            zeroonetwo = f"{words[i]} {words[i + 1]} {words[i + 2]}"
+            if zeroonetwo in idioms:
+                valence = idioms[zeroonetwo]
+        if threetwo in self.booster or twoone in self.booster:
+            valence += self.b_decr
+        return valence
+
+    def _valence(self, words, lower, i, is_cap_diff):
+        lexicon = self.lexicon
+        valence = lexicon[lower[i]]
+        if is_cap_diff and words[i].isupper():
+            valence += self.c_incr if valence > 0 else -self.c_incr
+        for start_i in range(3):
+            j = i - start_i - 1
+            if i > start_i and lower[j] not in lexicon:
+                s = self._booster_scalar(words[j], valence, is_cap_diff)
+                if start_i == 1 and s != 0:
+                    s *= 0.95
+                if start_i == 2 and s != 0:
+                    s *= 0.9
+                valence += s
+                # nltk's _never_check
+                if start_i == 0:
+                    if self._negated(words[i - 1]):
+                        valence *= self.n_scalar
+                elif start_i == 1:
+                    if words[i - 2] == "never" and words[i - 1] in _SO_THIS:
+                        valence *= 1.5
+                    elif self._negated(words[i - 2]):
+                        valence *= self.n_scalar
+                else:
+                    if (words[i - 3] == "never" and words[i - 2] in _SO_THIS) or words[i - 1] in _SO_THIS:
+                        valence *= 1.25
+                    elif self._negated(words[i - 3]):
+                        valence *= self.n_scalar
+                    if not self._idiom_words.isdisjoint(words[i - 3:i + 3]):
+                        valence = self._idioms(valence, words, i)
+        # nltk's _least_check
+        if i > 1 and lower[i - 1] not in lexicon and lower[i - 1] == "least":
+            if lower[i - 2] != "at" and lower[i - 2] != "very":
+                valence *= self.n_scalar
+        elif i > 0 and lower[i - 1] not in lexicon and lower[i - 1] == "least":
+            valence *= self.n_scalar
+        return valence
+
+    def valence_sum(self, text):
+        """Sum of the per-token valences of `text` after nltk's "but" rule (0.0 without lexicon words)."""
+        if not isinstance(text, str):
+            text = str(text.encode("utf-8"))
+        words = self.tokens(text)
+        lower = [w.lower() for w in words]
+        if self.lexicon.keys().isdisjoint(lower):
+            return 0.0
+        n = len(words)
+        allcaps = sum(1 for w in words if w.isupper())
+        is_cap_diff = 0 < allcaps < n
+        # nltk scores every occurrence of a token at the token's first position
+        first_index = {}
+        for idx, token in enumerate(words):
+            first_index.setdefault(token, idx)
+        cache = {}
+        sentiments = []
+        for token in words:
+            if token not in cache:
+                i = first_index[token]
+                if (i < n - 1 and lower[i] == "kind" and lower[i + 1] == "of") or lower[i] in self.booster:
+                    cache[token] = 0
+                elif lower[i] in self.lexicon:
+                    cache[token] = self._valence(words, lower, i, is_cap_diff)
+                else:
+                    cache[token] = 0
+            sentiments.append(cache[token])
+        if "but" in lower:
+            bi = lower.index("but")
+            sentiments = [s * 0.5 if k < bi else s * 1.5 if k > bi else s for k, s in enumerate(sentiments)]
+        return float(sum(sentiments))
+
+    def _score_unique(self, texts):
+        sums = np.fromiter((self.valence_sum(text) for text in texts), dtype=np.float64, count=len(texts))
+        exclamations = np.minimum(np.fromiter((str(t).count("!") for t in texts), dtype=np.int64, count=len(texts)), 4) * 0.292
+        questions = np.fromiter((str(t).count("?") for t in texts), dtype=np.int64, count=len(texts))
+        amplifier = exclamations + np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0.0)
+        sums = sums + np.sign(sums) * amplifier
+        return sums / np.sqrt(sums * sums + 15)
+
+    def score(self, texts, processes=None, chunk_size=VADER_CHUNK_SIZE):
+        """Compound score for every text, as a float64 array in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0)
+        if processes and processes > 1 and len(texts) > chunk_size:
+            chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+            with ProcessPoolExecutor(processes) as pool:
+                return np.concatenate(list(pool.map(_score_chunk, chunks)))
+        positions = {}
+        index = np.fromiter((positions.setdefault(text, len(positions)) for text in texts),
+                            dtype=np.intp, count=len(texts))
+        return self._score_unique(list(positions))[index]
+
+
+_WORKER_SCORER = None
+
+
+def _score_chunk(texts):
+    global _WORKER_SCORER
+    if _WORKER_SCORER is None:
+        _WORKER_SCORER = VaderBatchScorer()
+    return _WORKER_SCORER.score(texts)
+
+
+class TransformersScorer(SentimentScorer):
+    """
+    Local Hugging Face text classifier, FinBERT by default. Needs the optional
+    `transformers` package and a backend such as torch. The compound score is
+    P(positive) - P(negative).
+    """
+
+    max_batch_size = 32
+
+    def __init__(self, model_name=FINBERT_MODEL, max_batch_size=None):
+        from transformers import pipeline
+
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size or self.max_batch_size
+        self.version = f"transformers:{model_name}"
+        self._pipeline = pipeline("text-classification", model=model_name, top_k=None, truncation=True)
+
+    def score(self, texts):
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0)
+        signs = {"positive": 1.0, "negative": -1.0}
+        results = self._pipeline(texts, batch_size=self.max_batch_size)
+        return np.array([sum(signs.get(r["label"].lower(), 0.0) * r["score"] for r in labels) for labels in results])
+
+
+SENTIMENT_SCORERS = {
+    "vader": VaderBatchScorer,
+    "finbert": TransformersScorer,
+}
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    Content-addressed SQLite store of scores keyed by (scorer version, text
+    hash), so unchanged text is never rescored by the same scorer and
+    switching scorers back and forth keeps both sets of results.
+    """
+
+    def __init__(self, path=SENTIMENT_CACHE_PATH):
+        self.path = path
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores (scorer TEXT NOT NULL, text_hash TEXT NOT NULL, "
+            "score REAL NOT NULL, PRIMARY KEY (scorer, text_hash)) WITHOUT ROWID"
+        )
+        return conn
+
+    def get_many(self, scorer, hashes):
+        """{text hash: score} for the hashes already scored by `scorer`."""
+        hashes = list(hashes)
+        found = {}
+        conn = self._connect()
+        try:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT text_hash, score FROM scores WHERE scorer = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [scorer, *chunk],
+                )
+                found.update(rows)
+        finally:
+            conn.close()
+        return found
+
+    def put_many(self, scorer, scores):
+        """Stores {text hash: score} for `scorer`."""
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (scorer, text_hash, score) VALUES (?, ?, ?)",
+                [(scorer, key, float(score)) for key, score in scores.items()],
+            )
+        finally:
+            conn.close()
+
+
+class CachedScorer(SentimentScorer):
+    """
+    Wraps a scorer with a ScoreCache: only texts the scorer has not seen (by
+    version and content hash) are scored, in chunks of its max_batch_size.
+    """
+
+    def __init__(self, scorer, cache=None):
+        self.scorer = scorer
+        self.cache = cache or ScoreCache()
+        self.version = scorer.version
+        self.max_batch_size = scorer.max_batch_size
+
+    def score(self, texts):
+        texts = list(texts)
+        hashes = [text_hash(text) for text in texts]
+        known = self.cache.get_many(self.version, set(hashes))
+        missing = {key: text for key, text in zip(hashes, texts) if key not in known}
+        if missing:
+            keys, pending = list(missing), list(missing.values())
+            step = self.max_batch_size or len(pending)
+            scores = np.concatenate([self.scorer.score(pending[i:i + step]) for i in range(0, len(pending), step)])
+            fresh = dict(zip(keys, scores.tolist()))
+            self.cache.put_many(self.version, fresh)
+            known.update(fresh)
+        return np.array([known[key] for key in hashes], dtype=np.float64)
+
+
+class MicroBatcher(SentimentScorer):
+    """
+    Coalesces score requests from concurrent callers (any thread or event loop,
+    e.g. several Streamlit sessions) into shared calls to the wrapped scorer.
+
+    A background thread takes the first waiting request, collects whatever
+    else arrives within `max_wait` seconds (up to the scorer's max_batch_size
+    texts), scores them all in one call and hands each caller its slice.
+    """
+
+    def __init__(self, scorer, max_wait=SENTIMENT_BATCH_WAIT):
+        self.scorer = scorer
+        self.max_wait = max_wait
+        self.version = scorer.version
+        self.max_batch_size = scorer.max_batch_size
+        self.calls = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts):
+        """Queues `texts` and returns a concurrent.futures.Future of their scores."""
+        future = Future()
+        self._queue.put((list(texts), future))
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="sentiment-batcher", daemon=True)
+                    self._worker.start()
+        return future
+
+    def score(self, texts):
+        return self.submit(texts).result()
+
+    async def score_async(self, texts):
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while not self.max_batch_size or size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        texts = [text for texts, _ in batch for text in texts]
+        try:
+            self.calls += 1
+            scores = np.asarray(self.scorer.score(texts)) if texts else np.zeros(0)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        offset = 0
+        for texts, future in batch:
+            future.set_result(scores[offset:offset + len(texts)])
+            offset += len(texts)
+
+
+_SCORER = None
+_SCORER_LOCK = threading.Lock()
+
+
+def get_sentiment_scorer():
+    """Process-wide scorer named by SENTIMENT_SCORER, behind the score cache and micro-batcher."""
+    global _SCORER
+    if _SCORER is None:
+        with _SCORER_LOCK:
+            if _SCORER is None:
+                _SCORER = MicroBatcher(CachedScorer(SENTIMENT_SCORERS[SENTIMENT_SCORER]()))
+    return _SCORER
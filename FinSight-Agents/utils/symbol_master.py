@@ -0,0 +1,103 @@
+import csv
+import os
+import threading
+from typing import NamedTuple, Tuple
+
+SYMBOLS_FILE = os.getenv(
+    "SYMBOLS_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "symbols", "symbols.csv"),
+)
+
+
+class SymbolRecord(NamedTuple):
+    symbol: str
+    exchange: str
+    currency: str
+    name: str
+    aliases: Tuple[str, ...]
+
+
+def normalize_key(text):
+    """Lookup key for names and aliases: upper case, spaces and dots dropped."""
+    return text.upper().replace(" ", "").replace(".", "")
+
+
+class SymbolMaster:
+    """
+    Single in-memory index of every listed symbol.
+
+    Loaded once from a compact CSV (symbol, exchange, currency, name, pipe-separated
+    aliases). Records are tuples and the indexes plain dicts, so forward
+    (symbol -> record), reverse (name -> symbol) and alias lookups are O(1) and a
+    full NSE + NASDAQ listing stays at a few MB.
+    """
+
+    def __init__(self, records):
+        self.records = {}
+        self._keys = {}  # normalized name/alias -> symbol
+        for record in records:
+            self.records[record.symbol] = record
+        for record in self.records.values():
+            for text in (record.name,) + record.aliases:
+                self._keys.setdefault(normalize_key(text), record.symbol)
+
+    @classmethod
+    def load(cls, path=SYMBOLS_FILE):
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)  # header
+            return cls(
+                SymbolRecord(row[0], row[1], row[2], row[3], tuple(a for a in row[4].split("|") if a))
+                for row in reader if row
+            )
+
+    def __contains__(self, symbol):
+        return symbol in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, symbol):
+        return self.records.get(symbol)
+
+    def display_name(self, symbol):
+        record = self.records.get(symbol)
+        return record.name if record else symbol
+
+    def lookup(self, text):
+        """Resolves a ticker, company name or alias to a symbol (None if unknown)."""
+        text = text.strip()
+        upper = text.upper()
+        if upper in self.records:
+            return upper
+        return self._keys.get(normalize_key(text))
+
+    def symbols(self, exchange=None):
+        if exchange is None:
+            return list(self.records)
+        return [r.symbol for r in self.records.values() if r.exchange == exchange]
+
+    def company_to_ticker(self):
+        """Upper-case name and alias -> symbol, the shape of the old COMPANY_TO_TICKER dict."""
+        mapping = {}
+        for record in self.records.values():
+            for text in (record.name,) + record.aliases:
+                mapping.setdefault(text.upper(), record.symbol)
+        return mapping
+
+    def ticker_to_company(self):
+        return {symbol: record.name for symbol, record in self.records.items()}
+
+
+_MASTER = None
+_MASTER_LOCK = threading.Lock()
+
+
+def get_symbol_master():
+    """Process-wide SymbolMaster, loaded on first use."""
+    global _MASTER
+    if _MASTER is None:
+        with _MASTER_LOCK:
+            if _MASTER is None:
+                _MASTER = SymbolMaster.load()
+    return _MASTER
@@ -0,0 +1,192 @@
+import re
+from dataclasses import dataclass
+from utils.symbol_master import get_symbol_master
+
+# Words that are never treated as symbols, even when they spell a ticker or
+# are one typo away from a company name.
+STOPWORDS = {
+    "A", "ABOUT", "ALL", "AN", "AND", "ANY", "ARE", "AS", "AT", "BE", "BUY", "BY", "CAN", "COMPARE",
+    "DO", "DOING", "FOR", "FROM", "GIVE", "HOLD", "HOW", "I", "IN", "INSIGHT", "INSIGHTS", "IS",
+    "IT", "LATEST", "ME", "MARKET", "MY", "NEWS", "NOW", "OF", "ON", "OR", "OUT", "PRICE",
+    "PRICES", "SELL", "SHARE", "SHARES", "SHOULD", "SHOW", "STOCK", "STOCKS", "TELL", "THE",
+    "THIS", "TO", "TODAY", "TREND", "US", "VS", "WEEK", "WHAT", "WHATS", "WITH", "HAPPENING",
+}
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9&.\-']*|&")
+_END = "$"  # trie terminal marker
+
+
+@dataclass
+class SymbolMatch:
+    symbol: str
+    matched: str
+    source: str  # "ticker", "name", "alias", "fuzzy" or "llm"
+
+
+def _normalize(token):
+    token = token.upper().rstrip(".")
+    if token.endswith("'S"):
+        token = token[:-2]
+    token = token.replace("'", "")
+    return "AND" if token == "&" else token
+
+
+def _name_tokens(name):
+    return [t for t in (_normalize(t) for t in _TOKEN_RE.findall(name)) if t]
+
+
+def _bounded_edit_distance(a, b, limit):
+    """
+    Edit distance counting adjacent transpositions as one edit ("Nvidai" -> "Nvidia"),
+    or limit + 1 as soon as it is known to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, prev2[j - 2] + 1)
+            cur.append(cost)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SymbolResolver:
+    """
+    Resolves free-text queries to tickers without calling the LLM.
+
+    Tickers, company names and aliases are compiled once into a token trie, and
+    a query is matched in a single left-to-right pass (longest match wins).
+    Unmatched words get a bounded fuzzy match against the name vocabulary.
+    """
+
+    def __init__(self, symbol_master=None):
+        symbol_master = symbol_master or get_symbol_master()
+        self.tickers = set(symbol_master.records)
+        self._trie = {}
+        self._fuzzy_vocab = {}  # first letter -> [(compact name, ticker)]
+        for record in symbol_master.records.values():
+            self._add(_name_tokens(record.name), record.symbol, "name")
+            for alias in record.aliases:
+                self._add(_name_tokens(alias), record.symbol, "alias")
+            base = record.symbol.split(".")[0]
+            if base != record.symbol and base not in STOPWORDS:
+                self._add([base], record.symbol, "alias")
+
+    def _add(self, tokens, ticker, source):
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, (ticker, source))
+        compact = "".join(tokens)
+        if len(compact) >= 4:
+            self._add_compact(compact, ticker)
+
+    def _add_compact(self, compact, ticker):
+        bucket = self._fuzzy_vocab.setdefault(compact[0], [])
+        if (compact, ticker) not in bucket:
+            bucket.append((compact, ticker))
+        node = self._trie.setdefault(compact, {})
+        node.setdefault(_END, (ticker, "alias"))
+
+    def _match_ticker(self, raw, token):
+        # Bare tickers only count when written in capitals, so English words that
+        # spell one ("cost", "dis", "pep") are left to names and the LLM fallback.
+        return token in self.tickers and not any(c.islower() for c in raw.rstrip(".").removesuffix("'s"))
+
+    def _fuzzy(self, token):
+        if len(token) < 4 or token in STOPWORDS:
+            return None
+        limit = 1 if len(token) <= 6 else 2
+        best = None
+        for compact, ticker in self._fuzzy_vocab.get(token[0], ()):
+            distance = _bounded_edit_distance(token, compact, limit)
+            if distance <= limit and (best is None or distance < best[0]):
+                best = (distance, ticker)
+        return best[1] if best else None
+
+    def resolve(self, query):
+        """Returns SymbolMatch objects in query order, one per distinct ticker."""
+        raw_tokens = _TOKEN_RE.findall(query)
+        tokens = [_normalize(t) for t in raw_tokens]
+        found = []  # (token position, SymbolMatch)
+        unmatched = []
+
+        def emit(pos, symbol, matched, source):
+            found.append((pos, SymbolMatch(symbol, matched, source)))
+
+        i = 0
+        while i < len(tokens):
+            node, hit, j = self._trie, None, i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    hit = (j, node[_END])
+            token = tokens[i]
+            if hit and not (hit[0] == i + 1 and token in STOPWORDS):
+                end, (ticker, source) = hit
+                emit(i, ticker, " ".join(raw_tokens[i:end]), source)
+                i = end
+            elif self._match_ticker(raw_tokens[i], token):
+                emit(i, token, raw_tokens[i], "ticker")
+                i += 1
+            else:
+                unmatched.append(i)
+                i += 1
+
+        # Bounded fuzzy pass over leftover words; adjacent pairs catch typos in two-word names.
+        used = set()
+        for k, idx in enumerate(unmatched):
+            if idx in used:
+                continue
+            if k + 1 < len(unmatched) and unmatched[k + 1] == idx + 1:
+                ticker = self._fuzzy(tokens[idx] + tokens[idx + 1])
+                if ticker and tokens[idx] not in STOPWORDS and tokens[idx + 1] not in STOPWORDS:
+                    emit(idx, ticker, f"{raw_tokens[idx]} {raw_tokens[idx + 1]}", "fuzzy")
+                    used.update((idx, idx + 1))
+                    continue
+            ticker = self._fuzzy(tokens[idx])
+            if ticker:
+                emit(idx, ticker, raw_tokens[idx], "fuzzy")
+                used.add(idx)
+
+        matches, seen = [], set()
+        for _, match in sorted(found, key=lambda item: item[0]):
+            if match.symbol not in seen:
+                seen.add(match.symbol)
+                matches.append(match)
+        return matches
+
+
+_RESOLVER = None
+
+
+def get_resolver():
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = SymbolResolver()
+    return _RESOLVER
+
+
+def resolve_symbols(query):
+    return get_resolver().resolve(query)
+
+
+async def resolve_symbols_with_fallback(query, llm_extract):
+    """
+    Resolves locally first; only when nothing is found, asks `llm_extract`
+    (an async callable returning names/tickers) and maps its answer locally.
+    """
+    matches = resolve_symbols(query)
+    if matches:
+        return matches
+    items = await llm_extract(query)
+    return [SymbolMatch(m.symbol, m.matched, "llm") for m in resolve_symbols(", ".join(items))]
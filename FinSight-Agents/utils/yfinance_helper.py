@@ -1,6 +1,115 @@
-import yfinance as yf
+import asyncio
+import os
+import time
+from contextlib import nullcontext
+from functools import lru_cache
+import pandas as pd
+from utils.market_frame import to_long_frame
+from utils.ohlcv_store import get_ohlcv_store
+from utils.quote_cache import QUOTE_CACHE
 
-def fetch_stock_data(symbols: list) -> list[dict]:
+def _split_by_symbol(frame: pd.DataFrame, symbols: list) -> dict:
+    """Per-symbol column slices of a (field, symbol) frame, skipping symbols without data."""
+    pieces = {}
+    for symbol in symbols:
+        if ('Close', symbol) in frame.columns and not frame[('Close', symbol)].isna().all():
+            pieces[symbol] = frame.xs(symbol, axis=1, level=1, drop_level=False).dropna(how="all")
+    return pieces
+
+def download_stock_frame(symbols: list, period="1d", interval="1d", cache=QUOTE_CACHE) -> pd.DataFrame:
+    """
+    Get OHLCV data for a list of symbols. Fresh quotes come from the in-process
+    quote cache; only the symbols that miss are read from the local OHLCV store,
+    which in turn downloads only date ranges it has not seen yet, through the
+    yfinance provider (see `ohlcv_store.download_range`).
+
+    Returns:
+        pd.DataFrame: Date-indexed frame with (field, symbol) MultiIndex columns.
+    """
+    keys = [(symbol, period, interval) for symbol in symbols]
+    hits, misses = cache.get_many(keys)
+    if misses:
+        missed = [key[0] for key in misses]
+        frame = get_ohlcv_store().get_period(missed, period=period, interval=interval)
+        fetched = {(symbol, period, interval): piece
+                   for symbol, piece in _split_by_symbol(frame, missed).items()}
+        cache.set_many(fetched)
+        hits.update(fetched)
+    pieces = [hits[key] for key in keys if key in hits]
+    if not pieces:
+        return pd.DataFrame()
+    return pd.concat(pieces, axis=1).sort_index(axis=1, level=0)
+
+def missing_symbols(frame: pd.DataFrame, symbols: list) -> list:
+    """Symbols with no usable Close prices in a downloaded frame."""
+    if frame is None or frame.empty:
+        return list(symbols)
+    return [s for s in symbols if ('Close', s) not in frame.columns or frame[('Close', s)].isna().all()]
+
+async def fetch_stock_frame_async(symbols: list, period="1d", interval="1d", chunk_size=25, max_concurrency=4,
+                                  timeout=None, timings=None):
+    """
+    Download symbols in chunks on worker threads so the event loop is never blocked.
+
+    Chunks run concurrently, at most `max_concurrency` at a time. A failed chunk
+    does not fail the others. With `timeout` (seconds), chunks still running
+    when it expires are abandoned and their symbols reported as errors. If a
+    `timings` list is passed, one {"chunk", "symbols", "seconds", "status"}
+    dict is appended per chunk that started.
+
+    Returns:
+        tuple[pd.DataFrame, dict]: the combined frame and {symbol: error message}
+        for every symbol that could not be fetched.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+    async def run(index, chunk):
+        async with semaphore:
+            started, status = time.perf_counter(), "ok"
+            try:
+                return await asyncio.to_thread(download_stock_frame, chunk, period, interval)
+            except asyncio.CancelledError:
+                status = "timeout"
+                raise
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                if timings is not None:
+                    timings.append({"chunk": index, "symbols": len(chunk),
+                                    "seconds": round(time.perf_counter() - started, 3), "status": status})
+
+    tasks = [asyncio.ensure_future(run(i, chunk)) for i, chunk in enumerate(chunks)]
+    pending = set()
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    outcomes = []
+    for task in tasks:
+        if task in pending:
+            outcomes.append(TimeoutError(f"latency budget of {timeout}s exceeded"))
+        else:
+            outcomes.append(task.exception() or task.result())
+    frames, errors = [], {}
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, Exception):
+            errors.update({s: f"Download failed: {outcome}" for s in chunk})
+            continue
+        errors.update({s: "No data returned" for s in missing_symbols(outcome, chunk)})
+        if outcome is not None and not outcome.empty:
+            frames.append(outcome)
+    if not frames:
+        return pd.DataFrame(), errors
+    frame = pd.concat(frames, axis=1).sort_index(axis=1, level=0)
+    # yfinance keeps all-NaN columns for failed symbols; drop them from the result
+    frame = frame.loc[:, [c[1] not in errors for c in frame.columns]]
+    return frame, errors
+
+def fetch_stock_data(symbols: list, period="1d") -> pd.DataFrame:
     """
     Fetch stock data for a list of symbols using yfinance.
     
@@ -8,25 +117,87 @@ def fetch_stock_data(symbols: list) -> list[dict]:
         symbols (list): List of stock symbols to fetch data for.
         
     Returns:
-        list[dict]: List of dictionaries containing stock data.
+        pd.DataFrame: Long market-data frame (ticker, date, open, high, low, close, volume).
     """
-    data = yf.download(tickers=symbols, period="1d")
-    return data.reset_index().to_dict('records')
+    return to_long_frame(download_stock_frame(symbols, period=period))
 
-def format_for_bigquery(yf_data: list[dict], symbols: list) -> list[dict]:
+BIGQUERY_COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume"]
+
+def bigquery_frame(market_data: pd.DataFrame, symbols: list = None) -> pd.DataFrame:
+    """
+    Long market-data frame in the BigQuery `stock_prices` layout: one row per
+    symbol and date with full OHLCV, volume as a nullable integer.
+    """
+    rows = market_data if symbols is None else market_data[market_data["ticker"].isin(symbols)]
+    out = rows.rename(columns={"ticker": "symbol"}).reindex(columns=BIGQUERY_COLUMNS)
+    out["symbol"] = out["symbol"].astype(str)
+    out["date"] = pd.to_datetime(out["date"]).dt.normalize()
+    out["volume"] = out["volume"].round().astype("Int64")
+    return out.reset_index(drop=True)
+
+def format_for_bigquery(market_data: pd.DataFrame, symbols: list) -> list[dict]:
+    """
+    Converts a long market-data frame to a list of dicts for BigQuery
+    streaming inserts. Missing values become None.
     """
-    Converts yfinance wide-format data to a list of dicts for BigQuery.
+    out = bigquery_frame(market_data, symbols)
+    out["date"] = out["date"].dt.strftime("%Y-%m-%d")
+    return out.astype(object).where(out.notna(), None).to_dict('records')
+
+@lru_cache(maxsize=None)
+def _parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("symbol", pa.string()), ("date", pa.date32()),
+        ("open", pa.float64()), ("high", pa.float64()), ("low", pa.float64()), ("close", pa.float64()),
+        ("volume", pa.int64()),
+    ])
+
+def export_market_data(symbols: list, path: str, start, end, interval="1d", chunk_size=50) -> int:
+    """
+    Exports full OHLCV history for `symbols` in [start, end) to `path`.
+
+    The format follows the extension: `.parquet`, `.ndjson`/`.jsonl` or `.csv`.
+    Symbols are read from the OHLCV store `chunk_size` at a time and each chunk
+    is appended to the file (a Parquet row group, or lines of text), so memory
+    stays bounded by one chunk however many symbols and years are exported.
+
+    Returns:
+        int: number of rows written.
     """
-    records = []
-    for row in yf_data:
-        date = row.get('Date')
-        for symbol in symbols:
-            records.append({
-                "symbol": symbol,
-                "date": date.isoformat() if hasattr(date, "isoformat") else str(date),
-                "close": row.get(('Close', symbol))
-            })
-    return records
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".parquet", ".ndjson", ".jsonl", ".csv"):
+        raise ValueError(f"Unsupported export format: {ext}")
+    store = get_ohlcv_store()
+    written = 0
+    writer = None
+    with open(path, "w", encoding="utf-8") if ext != ".parquet" else nullcontext() as f:
+        try:
+            for i in range(0, len(symbols), chunk_size):
+                chunk = symbols[i:i + chunk_size]
+                out = bigquery_frame(to_long_frame(store.get_history(chunk, start, end, interval)))
+                if out.empty:
+                    continue
+                if ext == ".parquet":
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+                    writer = writer or pq.ParquetWriter(path, _parquet_schema())
+                    writer.write_table(pa.Table.from_pandas(out, schema=_parquet_schema(), preserve_index=False))
+                else:
+                    out["date"] = out["date"].dt.strftime("%Y-%m-%d")
+                    if ext == ".csv":
+                        out.to_csv(f, index=False, header=written == 0)
+                    else:
+                        text = out.to_json(orient="records", lines=True)
+                        f.write(text if text.endswith("\n") else text + "\n")
+                written += len(out)
+            if ext == ".parquet" and writer is None:
+                import pyarrow.parquet as pq
+                pq.write_table(_parquet_schema().empty_table(), path)
+        finally:
+            if writer is not None:
+                writer.close()
+    return written
 
 # if __name__ == "__main__":
 #     symbols = ["RELIANCE.NS", "TCS.NS", "HDFCBANK.NS"]